@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""Benchmark the bot's handlers against an in-memory spreadsheet.
+
+Synthetic updates are fed through the real dispatcher, so handlers,
+middlewares, caches, the scheduler and the gspread transport all run as
+in production. Only Telegram and Google are replaced: Telegram by a
+session that accepts every request, and Google by a fake gspread client
+that sleeps --latency seconds per call.
+
+Each scenario starts with cold caches. It reports throughput, p50/p95
+latency per iteration, and the Sheets API calls it made.
+
+    python benchmarks/bench_handlers.py --rows 1000,10000 --latency 0.05
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_gspread import ADMIN_ID, EVENT_TYPES, RARE_CATEGORY, FakeClient, FakeSpreadsheet, seed
+
+def _callback(update_id: int, user_id: int, data: str) -> dict:
+    return {"update_id": update_id, "callback_query": {
+        "id": str(update_id), "from": {"id": user_id, "is_bot": False, "first_name": "Bench"},
+        "chat_instance": "bench", "data": data,
+        "message": {"message_id": 1, "date": 0, "chat": {"id": user_id, "type": "private"}, "text": "menu"}}}
+
+def _message(update_id: int, user_id: int, text: str) -> dict:
+    return {"update_id": update_id, "message": {
+        "message_id": update_id, "date": 0, "chat": {"id": user_id, "type": "private"},
+        "from": {"id": user_id, "is_bot": False, "first_name": "Bench"}, "text": text}}
+
+def _wizard(today) -> list[tuple[str, str]]:
+    from zoom_impact_bot.commands.event_management import (PICK_EVENT_TYPE, PICK_MC, PICK_PRESENTER,
+                                                           SAVE_EVENT_FINAL, TOGGLE_IMPACT)
+    day = (today + timedelta(days=3)).isoformat()
+    return [("callback", PICK_EVENT_TYPE.pack(EVENT_TYPES[0])), ("message", day), ("message", "20:30"),
+            ("message", "https://zoom.us/j/1"), ("callback", PICK_MC.pack("MC 1")),
+            ("callback", PICK_PRESENTER.pack("Presenter 2")), ("callback", TOGGLE_IMPACT.pack("Speaker 3")),
+            ("callback", TOGGLE_IMPACT.pack("Speaker 4")), ("callback", SAVE_EVENT_FINAL.pack())]
+
+def scenarios(today) -> dict[str, list[tuple[str, str]]]:
+    from zoom_impact_bot.commands.list_recognitions import SHOW_CATEGORY
+    return {
+        "menu": [("message", "/menu")],
+        "next": [("callback", "next")],
+        "today": [("callback", "today")],
+        "week": [("callback", "week")],
+        "recognition_months": [("callback", "filter_month")],
+        "recognitions_by_category": [("callback", SHOW_CATEGORY.pack(RARE_CATEGORY))],
+        "save_event_wizard": _wizard(today),
+    }
+
+def _percentile(samples: list[float], pct: int) -> float:
+    if len(samples) < 2:
+        return samples[0] if samples else 0.0
+    return statistics.quantiles(samples, n=100, method="inclusive")[pct - 1]
+
+async def run_scenario(dp, bot, book, steps, iterations: int, concurrency: int) -> dict:
+    from aiogram.types import Update
+    from zoom_impact_bot import sheets
+
+    for cache in (sheets.events_index, sheets.recognitions_store, sheets.role_index,
+                  sheets.templates_tab, sheets.categories_tab, sheets.event_types_tab):
+        cache.invalidate()
+    before = Counter(book.calls)
+    latencies: list[float] = []
+    next_id = iter(range(1, 10 ** 9))
+    pending = iter(range(iterations))
+
+    async def worker(user_id: int) -> None:
+        for _ in pending:
+            started = time.perf_counter()
+            for kind, payload in steps:
+                raw = (_message if kind == "message" else _callback)(next(next_id), user_id, payload)
+                await dp.feed_update(bot, Update.model_validate(raw))
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(ADMIN_ID + i % 5) if i < 5 else worker(ADMIN_ID + 10_000 + i)
+                           for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    await sheets.append_queue.flush()
+    calls = book.calls - before
+    return {
+        "iterations": len(latencies),
+        "throughput": len(latencies) / elapsed,
+        "p50_ms": _percentile(latencies, 50) * 1000,
+        "p95_ms": _percentile(latencies, 95) * 1000,
+        "api_calls": sum(calls.values()),
+        "calls": {f"{tab}.{op}": count for (tab, op), count in sorted(calls.items())},
+    }
+
+async def bench(args) -> list[dict]:
+    from aiogram import Bot
+    from aiogram.client.session.base import BaseSession
+    from zoom_impact_bot import repos, sheets
+    from zoom_impact_bot.mirror import SheetMirror
+    from zoom_impact_bot.run import build_dispatcher
+    from zoom_impact_bot.storage import TTLMemoryStorage
+
+    class NullSession(BaseSession):
+        """Accepts every Bot API request without sending it."""
+
+        async def make_request(self, bot, method, timeout=None):
+            return True
+
+        async def stream_content(self, url, headers=None, timeout=30, chunk_size=65536, raise_for_status=True):
+            yield b""
+
+        async def close(self) -> None:
+            pass
+
+    bot = Bot("123456:BENCH", session=NullSession())
+    today = datetime.now(sheets.TZ).date()
+    results = []
+    for rows in args.rows:
+        book = FakeSpreadsheet(seed(rows, today), args.latency)
+        sheets.registry = sheets.WorksheetRegistry(lambda: FakeClient(book), "Bench", book.id)
+        if args.backend == "sqlite":
+            path = os.path.join(tempfile.mkdtemp(), "bench.sqlite3")
+            db = SheetMirror(path, sheets.TZ)
+            for tab, values in seed(rows, today).items():
+                db.replace(tab, values)
+            db.close()
+            repos.use(repos.sqlite_repos(path))
+        elif args.backend == "memory":
+            repos.use(repos.memory_repos(seed(rows, today)))
+        for name, steps in scenarios(today).items():
+            if args.scenario and name not in args.scenario:
+                continue
+            dp = build_dispatcher(TTLMemoryStorage())
+            # Handlers print diagnostics; keep them out of the report
+            with contextlib.redirect_stdout(io.StringIO()):
+                result = await run_scenario(dp, bot, book, steps, args.iterations, args.concurrency)
+            result.update(scenario=name, rows=rows)
+            results.append(result)
+            print(f"{name:<26} {rows:>7} {result['iterations']:>5} {result['throughput']:>9.1f} "
+                  f"{result['p50_ms']:>9.1f} {result['p95_ms']:>9.1f} {result['api_calls']:>6}", flush=True)
+            if args.verbose:
+                for call, count in result["calls"].items():
+                    print(f"{'':<28}{call}: {count}")
+    await sheets.aclose()
+    sheets.shutdown()
+    return results
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", default="1000,10000,100000",
+                        help="comma-separated Events/Recognitions sizes (default: %(default)s)")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per Sheets call (default: %(default)s)")
+    parser.add_argument("--iterations", type=int, default=50, help="iterations per scenario (default: %(default)s)")
+    parser.add_argument("--concurrency", type=int, default=10, help="simulated users at once (default: %(default)s)")
+    parser.add_argument("--backend", choices=("sheets", "sqlite", "memory"), default="sheets",
+                        help="data backend the handlers use (default: %(default)s)")
+    parser.add_argument("--scenario", action="append", help="run only this scenario (repeatable)")
+    parser.add_argument("--real-quota", action="store_true",
+                        help="keep the 60/min Sheets quota instead of lifting it for the run")
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("-v", "--verbose", action="store_true", help="list API calls per tab and operation")
+    args = parser.parse_args()
+    args.rows = [int(n) for n in args.rows.split(",")]
+
+    # sheets reads its configuration at import time
+    os.environ["SHEETS_BACKEND"] = "gspread"
+    os.environ["SHEETS_MIRROR"] = ""
+    os.environ["DATA_BACKEND"] = "sheets"
+    os.environ.setdefault("SLOW_UPDATE_SECONDS", "3600")
+    if not args.real_quota:
+        for name in ("SHEETS_READS_PER_MINUTE", "SHEETS_WRITES_PER_MINUTE"):
+            os.environ[name] = "1000000"
+        os.environ["SHEETS_BURST"] = "1000000"
+
+    print(f"{'scenario':<26} {'rows':>7} {'iters':>5} {'per sec':>9} {'p50 ms':>9} {'p95 ms':>9} {'calls':>6}")
+    results = asyncio.run(bench(args))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""In-memory stand-in for the parts of gspread the bot uses.
+
+Every worksheet call sleeps for the configured latency on the calling
+thread, as a real HTTP round trip would, and is counted per tab and
+operation.
+"""
+import re
+import threading
+import time
+from collections import Counter
+from datetime import date, timedelta
+
+def _column_number(letters: str) -> int:
+    number = 0
+    for ch in letters:
+        number = number * 26 + ord(ch) - 64
+    return number
+
+def _column_letters(number: int) -> str:
+    letters = ""
+    while number:
+        number, rest = divmod(number - 1, 26)
+        letters = chr(65 + rest) + letters
+    return letters
+
+def _bounds(rng: str | None) -> tuple[int, int, int | None, int | None]:
+    """(first row, first column, last row, last column), 1-based, from an A1 range like 'A5:I' or 'B:D'."""
+    if not rng:
+        return 1, 1, None, None
+    rng = rng.rpartition("!")[2]
+    corners = []
+    for part in rng.split(":"):
+        match = re.fullmatch(r"([A-Z]*)(\d*)", part)
+        corners.append((_column_number(match[1]) if match[1] else None, int(match[2]) if match[2] else None))
+    (c1, r1), (c2, r2) = corners[0], corners[-1]
+    return r1 or 1, c1 or 1, r2, c2
+
+def _trim(row: list[str]) -> list[str]:
+    row = list(row)
+    while row and row[-1] == "":
+        row.pop()
+    return row
+
+class FakeWorksheet:
+    def __init__(self, book: "FakeSpreadsheet", title: str, rows: list[list[str]]):
+        self.book = book
+        self.title = title
+        self.rows = rows
+
+    def get_all_values(self) -> list[list[str]]:
+        self.book.call(self.title, "get_all_values")
+        return self._read(None)
+
+    def get_values(self, rng: str | None = None, major_dimension: str = "ROWS") -> list[list[str]]:
+        self.book.call(self.title, "get_values")
+        return self._read(rng, major_dimension)
+
+    def batch_get(self, ranges: list[str], major_dimension: str = "ROWS") -> list[list[list[str]]]:
+        self.book.call(self.title, "batch_get")
+        return [self._read(rng, major_dimension) for rng in ranges]
+
+    def append_rows(self, rows: list[list[str]], **kwargs) -> dict:
+        self.book.call(self.title, "append_rows")
+        with self.book.lock:
+            first = len(self.rows) + 1
+            self.rows.extend(list(row) for row in rows)
+            last = len(self.rows)
+        width = _column_letters(max((len(row) for row in rows), default=1))
+        return {"updates": {"updatedRange": f"'{self.title}'!A{first}:{width}{last}", "updatedRows": len(rows)}}
+
+    def batch_update(self, data: list[dict], **kwargs) -> dict:
+        self.book.call(self.title, "batch_update")
+        with self.book.lock:
+            for item in data:
+                r1, c1, _, _ = _bounds(item["range"])
+                for i, values in enumerate(item["values"]):
+                    while len(self.rows) < r1 + i:
+                        self.rows.append([])
+                    row = self.rows[r1 - 1 + i]
+                    for j, value in enumerate(values):
+                        row.extend([""] * (c1 + j - len(row)))
+                        row[c1 - 1 + j] = value
+        return {"totalUpdatedCells": sum(len(values) for item in data for values in item["values"])}
+
+    def _read(self, rng: str | None, major_dimension: str = "ROWS") -> list[list[str]]:
+        r1, c1, r2, c2 = _bounds(rng)
+        with self.book.lock:
+            selected = [_trim(row[c1 - 1:c2]) for row in self.rows[r1 - 1:r2]]
+        while selected and not selected[-1]:
+            selected.pop()
+        if major_dimension == "COLUMNS":
+            width = max((len(row) for row in selected), default=0)
+            return [_trim([row[i] if i < len(row) else "" for row in selected]) for i in range(width)]
+        return selected
+
+class FakeSpreadsheet:
+    def __init__(self, tabs: dict[str, list[list[str]]], latency: float = 0.0, key: str = "bench"):
+        self.id = key
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.calls: Counter[tuple[str, str]] = Counter()
+        self._worksheets = [FakeWorksheet(self, title, rows) for title, rows in tabs.items()]
+
+    def worksheets(self) -> list[FakeWorksheet]:
+        self.call("*", "fetch_sheet_metadata")
+        return list(self._worksheets)
+
+    def worksheet(self, title: str) -> FakeWorksheet:
+        return next(ws for ws in self._worksheets if ws.title == title)
+
+    def call(self, tab: str, op: str) -> None:
+        with self.lock:
+            self.calls[(tab, op)] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+class FakeClient:
+    def __init__(self, spreadsheet: FakeSpreadsheet):
+        self.spreadsheet = spreadsheet
+
+    def open(self, title: str) -> FakeSpreadsheet:
+        return self.spreadsheet
+
+    def open_by_key(self, key: str) -> FakeSpreadsheet:
+        return self.spreadsheet
+
+MONTHS = ["January", "February", "March", "April", "May", "June",
+          "July", "August", "September", "October", "November", "December"]
+CATEGORIES = ["Rising Star", "Team Builder", "Top Recruiter", "Consistency", "Mentor", "Speaker", "Closer"]
+# Rare on purpose, so filtering by it measures lookup cost rather than rendering
+RARE_CATEGORY = "Legend"
+EVENT_TYPES = ["Weekly Zoom", "Training", "Launch", "Workshop"]
+ADMIN_ID = 1000
+
+def seed(rows: int, today: date) -> dict[str, list[list[str]]]:
+    """Tabs with `rows` Events and Recognitions rows, events spread around today at about four a day."""
+    half = max(rows // 8, 1)
+    events = [["Type", "Date", "Time", "Zoom Link", "MC", "Presenter", "Impact", "Status", "Notes"]]
+    for i in range(rows):
+        day = today + timedelta(days=i // 4 - half)
+        events.append([EVENT_TYPES[i % len(EVENT_TYPES)], day.isoformat(), f"{8 + (i % 4) * 4:02d}:30",
+                       f"https://zoom.us/j/{100000 + i}", f"MC {i % 20}", f"Presenter {i % 30}",
+                       f"Speaker {i % 40}, Speaker {(i + 7) % 40}", "Scheduled", ""])
+    recognitions = [["Upline", "Downline", "Category", "Month", "Remarks"]]
+    for i in range(rows):
+        category = RARE_CATEGORY if i % 1000 == 999 else CATEGORIES[i % len(CATEGORIES)]
+        month = f"{MONTHS[i % 12]} {2020 + (i // 12) % 6}"
+        recognitions.append([f"Upline {i % 300}", f"Member {i}", category, month, "Great work"])
+    user_roles = [["Admins", "MCs", "Presenters", "Impact Speakers"]]
+    for i in range(500):
+        user_roles.append([str(ADMIN_ID + i) if i < 5 else "", f"MC {i % 20}" if i < 20 else "",
+                           f"Presenter {i % 30}" if i < 30 else "", f"Speaker {i % 40}" if i < 40 else ""])
+    return {
+        "Events": events,
+        "Recognitions": recognitions,
+        "UserRoles": user_roles,
+        "Templates": [["key", "url"], ["slides", "https://example.com/slides"],
+                      ["guidelines", "https://example.com/guidelines"]],
+        "EventTypes": [["Event Type"]] + [[name] for name in EVENT_TYPES],
+        "Recognition-Categories": [["Category"]] + [[name] for name in CATEGORIES + [RARE_CATEGORY]],
+    }
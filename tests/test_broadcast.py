@@ -0,0 +1,132 @@
+import asyncio
+
+import pytest
+from aiogram.exceptions import (TelegramBadRequest, TelegramForbiddenError, TelegramNetworkError,
+                                TelegramRetryAfter)
+from aiogram.methods import SendMessage
+
+from zoom_impact_bot import broadcast, scheduler
+from zoom_impact_bot.broadcast import BLOCKED, FAILED, SENT, BroadcastReport, Broadcaster, Delivery
+from zoom_impact_bot.commands import announce
+
+METHOD = SendMessage(chat_id=1, text="Hello")
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+class FakeAsyncio:
+    """asyncio for the broadcast module, with sleeps that move the fake clock instead of waiting."""
+
+    def __init__(self, clock: Clock):
+        self.clock = clock
+
+    def __getattr__(self, name):
+        return getattr(asyncio, name)
+
+    async def sleep(self, delay: float) -> None:
+        # A real sleep always takes a little time, even when a refill is a rounding error away
+        wake = self.clock.now + max(delay, 1e-6)
+        await asyncio.sleep(0)
+        self.clock.now = max(self.clock.now, wake)
+
+class StubBot:
+    """Records send_message calls, raising the errors queued for a chat first."""
+
+    def __init__(self, clock: Clock, errors: dict[int, list[Exception]] | None = None):
+        self.clock = clock
+        self.errors = errors or {}
+        self.calls: list[tuple[int, float]] = []
+        self.messages: list[tuple[int, str]] = []
+
+    async def send_message(self, chat_id: int, text: str, parse_mode: str | None = None):
+        self.calls.append((chat_id, self.clock.now))
+        if self.errors.get(chat_id):
+            raise self.errors[chat_id].pop(0)
+        self.messages.append((chat_id, text))
+
+    def send(self, chat_id: int):
+        return self.send_message(chat_id, "Hello")
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(broadcast, "time", clock)
+    monkeypatch.setattr(scheduler, "time", clock)
+    monkeypatch.setattr(broadcast, "asyncio", FakeAsyncio(clock))
+    return clock
+
+def test_sends_stay_within_the_global_rate(clock):
+    bot = StubBot(clock)
+    sender = Broadcaster(rate=10, chat_interval=1, concurrency=8)
+    report = asyncio.run(sender.run(range(50), bot.send))
+    assert report.counts() == {SENT: 50}
+    times = sorted(at for _, at in bot.calls)
+    # A burst of 10, then one every 0.1s
+    assert times[9] == times[0]
+    assert all(at - times[0] >= (i + 1 - 10) / 10 - 1e-9 for i, at in enumerate(times))
+    assert times[-1] - times[0] == pytest.approx(4.0, abs=0.01)
+
+def test_each_chat_gets_one_message_and_keeps_its_gap(clock):
+    bot = StubBot(clock)
+    sender = Broadcaster(rate=30, chat_interval=1, concurrency=4)
+
+    async def main():
+        await sender.run([7, 7, 8], bot.send)
+        await sender.run([7], bot.send)
+    asyncio.run(main())
+    assert sorted(chat_id for chat_id, _ in bot.calls) == [7, 7, 8]
+    first, second = [at for chat_id, at in bot.calls if chat_id == 7]
+    assert second - first >= 1
+
+def test_retry_after_pauses_every_worker_then_retries(clock):
+    bot = StubBot(clock, {3: [TelegramRetryAfter(METHOD, "Flood control exceeded", retry_after=5)]})
+    sender = Broadcaster(rate=30, chat_interval=0, concurrency=1)
+    report = asyncio.run(sender.run([3, 4, 5], bot.send))
+    assert report.counts() == {SENT: 3}
+    assert (report.flood_waits, report.deliveries[3].attempts) == (1, 2)
+    flooded = bot.calls[0][1]
+    assert all(at >= flooded + 5 for _, at in bot.calls[1:])
+
+def test_blocked_and_rejected_chats_are_not_retried(clock):
+    bot = StubBot(clock, {1: [TelegramForbiddenError(METHOD, "Forbidden: bot was blocked by the user")],
+                          2: [TelegramBadRequest(METHOD, "Bad Request: chat not found")]})
+    report = asyncio.run(Broadcaster(rate=30, chat_interval=0).run([1, 2, 3], bot.send))
+    assert {chat_id: (d.status, d.attempts) for chat_id, d in report.deliveries.items()} == {
+        1: (BLOCKED, 1), 2: (FAILED, 1), 3: (SENT, 1)}
+    assert report.deliveries[2].error == "Bad Request: chat not found"
+
+def test_network_errors_are_retried_up_to_the_attempt_limit(clock):
+    bot = StubBot(clock, {1: [TelegramNetworkError(METHOD, "timeout")],
+                          2: [TelegramNetworkError(METHOD, "timeout")] * 3})
+    report = asyncio.run(Broadcaster(rate=30, chat_interval=0, attempts=3).run([1, 2], bot.send))
+    assert (report.deliveries[1].status, report.deliveries[1].attempts) == (SENT, 2)
+    assert (report.deliveries[2].status, report.deliveries[2].attempts) == (FAILED, 3)
+
+def test_summary_counts_each_outcome_and_lists_failures():
+    deliveries = {chat_id: Delivery(chat_id, SENT) for chat_id in range(5)}
+    deliveries[5] = Delivery(5, BLOCKED, error="Forbidden")
+    for chat_id in range(6, 9):
+        deliveries[chat_id] = Delivery(chat_id, FAILED, error="<chat not found>")
+    report = BroadcastReport(deliveries, started=0.0, finished=2.0, flood_waits=1)
+    lines = report.summary(failures_shown=2).split("\n")
+    assert "✅ <b>Delivered:</b> 5/9" in lines
+    assert "🚫 <b>Blocked the bot:</b> 1" in lines
+    assert "❌ <b>Failed:</b> 3" in lines
+    assert "⏱ <b>Took:</b> 2.0s (2.5 msg/s)" in lines
+    assert "⏳ <b>Flood waits:</b> 1" in lines
+    assert "   <code>6</code>: &lt;chat not found&gt;" in lines
+    assert lines[-1] == "   …and 1 more"
+
+def test_announcement_reports_back_to_the_admin(clock, monkeypatch):
+    bot = StubBot(clock, {2: [TelegramForbiddenError(METHOD, "Forbidden: bot was blocked by the user")]})
+    monkeypatch.setattr(announce, "broadcaster", Broadcaster(rate=30, chat_interval=0))
+    asyncio.run(announce._broadcast(bot, 99, [1, 2, 3], {"text": "Hello everyone"}))
+    assert bot.messages[:-1] == [(1, "Hello everyone"), (3, "Hello everyone")]
+    admin, summary = bot.messages[-1]
+    assert admin == 99
+    assert "✅ <b>Delivered:</b> 2/3" in summary
+    assert "🚫 <b>Blocked the bot:</b> 1" in summary
@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+from zoom_impact_bot import callbacks
+from zoom_impact_bot.callbacks import Action, CallbackRouter, Choice, digest
+
+NAMES = ["Asha", "Bilal", "Chen Wei", "Dr. Verylongname " * 6]
+
+async def _names() -> list[str]:
+    return NAMES
+
+ROW = Action("test_row", int, int)
+NAME = Action("test_name", Choice(_names))
+PLAIN = Action("test_plain")
+
+class FakeCallback:
+    def __init__(self, data: str):
+        self.data = data
+        self.answers = []
+
+    async def answer(self, text=None, show_alert=None):
+        self.answers.append(text)
+
+def test_ints_round_trip():
+    data = ROW.pack(12345, 0)
+    assert data == "test_row.9ix.0"
+    assert ROW.unpack(data.partition(".")[2]) == (12345, 0)
+
+def test_choice_round_trip_without_process_state():
+    data = NAME.pack("Chen Wei")
+    assert data == f"test_name.{digest('Chen Wei')}"
+    hashed = NAME.unpack(data.partition(".")[2])
+    assert asyncio.run(NAME.resolve(hashed)) == ("Chen Wei",)
+
+def test_digest_is_stable():
+    # Buttons sent before a restart or by another replica must still decode
+    assert digest("Asha") == "cdfix8"
+    assert len({digest(name) for name in NAMES}) == len(NAMES)
+
+def test_choice_gone_from_list_does_not_resolve():
+    hashed = NAME.unpack(NAME.pack("Someone Removed").partition(".")[2])
+    assert asyncio.run(NAME.resolve(hashed)) is None
+
+def test_long_names_fit_telegram_limit():
+    assert len(NAME.pack(NAMES[3]).encode()) <= callbacks.MAX_BYTES
+
+def test_over_length_is_rejected():
+    wide = Action("test_wide", int, int, int, int, int, int, int, int, int, int)
+    with pytest.raises(ValueError):
+        wide.pack(*[36 ** 6] * 10)
+
+def test_wrong_argument_count_is_rejected():
+    with pytest.raises(TypeError):
+        ROW.pack(1)
+
+def test_malformed_payloads_do_not_unpack():
+    assert ROW.unpack("1") is None
+    assert ROW.unpack("1.!") is None
+    assert NAME.unpack("abc") is None
+    assert PLAIN.unpack("x") is None
+
+def test_duplicate_and_unsupported_actions_are_rejected():
+    with pytest.raises(ValueError):
+        Action("test_row")
+    with pytest.raises(ValueError):
+        Action("test.dot")
+    with pytest.raises(TypeError):
+        Action("test_str", str)
+
+def test_dispatch_routes_by_code():
+    router = CallbackRouter()
+    seen = []
+
+    @router.on(NAME)
+    async def picked(cb, name):
+        seen.append(name)
+
+    cb = FakeCallback(NAME.pack("Bilal"))
+    asyncio.run(router.dispatch(cb, state=None))
+    assert seen == ["Bilal"]
+    assert router.route_name(cb) == "picked"
+
+@pytest.mark.parametrize("data", ["unknown_code", "test_name.zzzzzz", "test_name", None, ""])
+def test_undecodable_buttons_answer_expired(data):
+    router = CallbackRouter()
+
+    @router.on(NAME)
+    async def picked(cb, name):
+        raise AssertionError("should not be called")
+
+    cb = FakeCallback(data)
+    asyncio.run(router.dispatch(cb))
+    assert cb.answers == [callbacks.EXPIRED]
@@ -0,0 +1,219 @@
+import asyncio
+import os
+import sys
+from datetime import date
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+from fake_gspread import FakeSpreadsheet, seed
+
+from zoom_impact_bot import indexes
+from zoom_impact_bot.indexes import CachedTab, EventsIndex, RecognitionsStore, RoleIndex, ValuesTab
+
+TODAY = date(2030, 1, 15)
+
+def _book(rows: int = 20) -> FakeSpreadsheet:
+    return FakeSpreadsheet(seed(rows, TODAY))
+
+def _store(book: FakeSpreadsheet, full_every: int = 0) -> RecognitionsStore:
+    tab = book.worksheet("Recognitions")
+
+    async def load():
+        return tab.get_values()
+
+    async def load_tail(first_row):
+        return tab.get_values(f"A{first_row}:E")
+    return RecognitionsStore(load, 3600, tail_loader=load_tail, full_every=full_every)
+
+def _downlines(store: RecognitionsStore) -> list[str]:
+    return [record.downline for record in store.query()]
+
+def test_refresh_fetches_only_the_new_tail():
+    book = _book()
+    store = _store(book)
+    asyncio.run(store.get())
+    tab = book.worksheet("Recognitions")
+    tab.rows.append(["Upline 1", "Newcomer", "Mentor", "May 2030", ""])
+    tab.rows.append(["Upline 2", "Second", "Legend", "May 2030", ""])
+
+    asyncio.run(store.refresh())
+    assert (store.loads, store.tail_loads, store.resyncs) == (1, 1, 0)
+    assert store.rows == 23
+    assert _downlines(store)[-2:] == ["Newcomer", "Second"]
+    assert [record.downline for record in store.query(month="may 2030", category="legend")] == ["Second"]
+    assert book.calls[("Recognitions", "get_values")] == 2
+
+def test_changed_watermark_row_forces_a_full_reload():
+    book = _book()
+    store = _store(book)
+    asyncio.run(store.get())
+    book.worksheet("Recognitions").rows.pop()
+
+    asyncio.run(store.refresh())
+    assert (store.loads, store.tail_loads, store.resyncs) == (2, 0, 1)
+    assert store.rows == 20
+    assert "Member 19" not in _downlines(store)
+
+def test_edits_above_the_watermark_arrive_with_the_periodic_full_reload():
+    book = _book()
+    store = _store(book, full_every=2)
+    asyncio.run(store.get())
+    book.worksheet("Recognitions").rows[5][1] = "Renamed"
+
+    for _ in range(2):
+        asyncio.run(store.refresh())
+        assert "Renamed" not in _downlines(store)
+    assert store.tail_loads == 2
+
+    asyncio.run(store.refresh())
+    assert (store.loads, store.tail_loads) == (2, 2)
+    assert "Renamed" in _downlines(store)
+
+def test_row_added_after_the_watermark_moves_it():
+    book = _book()
+    store = _store(book)
+    asyncio.run(store.get())
+    row = ["Upline 3", "Added", "Mentor", "June 2030", "Thanks"]
+    book.worksheet("Recognitions").append_rows([row])
+
+    store.add(22, row)
+    assert store.rows == 22
+    assert _downlines(store)[-1] == "Added"
+    asyncio.run(store.get())
+    assert store.loads == 1
+
+    # The next tail sync starts from the added row and finds it unchanged
+    asyncio.run(store.refresh())
+    assert (store.loads, store.tail_loads, store.resyncs) == (1, 1, 0)
+    assert _downlines(store).count("Added") == 1
+
+def test_row_after_another_writers_rows_waits_for_a_tail_sync():
+    book = _book()
+    store = _store(book)
+    asyncio.run(store.get())
+    tab = book.worksheet("Recognitions")
+    tab.rows.append(["Upline 4", "From the sheet", "Mentor", "July 2030", ""])
+    row = ["Upline 5", "From the bot", "Mentor", "July 2030", ""]
+    tab.append_rows([row])
+
+    store.add(23, row)
+    assert store.rows == 21
+    assert "From the bot" not in _downlines(store)
+
+    asyncio.run(store.get())
+    assert (store.loads, store.tail_loads) == (1, 1)
+    assert store.rows == 23
+    assert _downlines(store)[-2:] == ["From the sheet", "From the bot"]
+
+def test_events_reload_whole_and_pick_up_edits_to_old_rows():
+    book = _book()
+    tab = book.worksheet("Events")
+
+    async def load():
+        return tab.get_values()
+    index = EventsIndex(load, 3600)
+    asyncio.run(index.get())
+    tab.rows[3][4] = "MC Replaced"
+
+    asyncio.run(index.refresh())
+    assert index.loads == 2
+    assert index.row(4)[4] == "MC Replaced"
+    # Only the edited row is parsed again
+    assert index.parsed == 21
+
+def test_cached_tab_requires_apply_and_add():
+    with pytest.raises(TypeError):
+        CachedTab()
+
+    class ApplyOnly(CachedTab):
+        def _apply(self, values):
+            pass
+    with pytest.raises(TypeError):
+        ApplyOnly()
+
+def test_values_tab_add_puts_the_row_in_place():
+    tab = ValuesTab()
+    tab.load([["key", "url"], ["slides", "a"]])
+    tab.add(3, ["guidelines", "b"])
+    assert tab.column(0) == ["key", "slides", "guidelines"]
+    tab.add(2, ["slides", "c"])
+    assert tab.values[1] == ["slides", "c"]
+
+def test_role_index_add_writes_a_row_across_its_columns():
+    index = RoleIndex()
+    index.load([["Admins", "1"], ["MCs", "Asha"], ["Presenters"], ["Impact Speakers"]])
+    index._add(3, ["2", "", "Bo"])
+    assert index.columns[0] == ["Admins", "1", "2"]
+    assert index.columns[2] == ["Presenters", "", "Bo"]
+    assert index.user_ids() == [1, 2]
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+class RolesTab:
+    """UserRoles as the column-major A:D read returns it, counting loads."""
+
+    def __init__(self, columns):
+        self.columns = columns
+        self.loads = 0
+
+    async def load(self):
+        self.loads += 1
+        return [list(column) for column in self.columns]
+
+def test_role_index_skips_non_numeric_ids():
+    tab = RolesTab([["Admins", "101", " 102 ", "@someone", "", "1e3", "-5", "²", "Admins"],
+                    ["MCs", "101", "Asha"], ["Presenters", "103"], ["Impact Speakers", "103", "103"]])
+    index = RoleIndex(tab.load, 60)
+
+    async def main():
+        return [await index.roles(user_id) for user_id in (101, 102, 103, 104)]
+    assert asyncio.run(main()) == [("Admin", "MC"), ("Admin",), ("Presenter", "Impact Speaker"), ()]
+    assert index.user_ids() == [101, 102, 103]
+
+def test_role_index_refreshes_after_its_ttl(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(indexes, "time", clock)
+    tab = RolesTab([["Admins", "101"]])
+    index = RoleIndex(tab.load, 60)
+
+    async def main():
+        assert await index.roles(101) == ("Admin",)
+        tab.columns = [["Admins", "202"]]
+        clock.now += 59
+        assert await index.roles(202) == ()
+        clock.now += 2
+        # Past the TTL the stale roles are still served while one refresh runs in the background
+        assert await index.roles(202) == ()
+        await index.refresh()
+        return await index.roles(202), await index.roles(101)
+    assert asyncio.run(main()) == (("Admin",), ())
+    assert tab.loads == 2
+
+def test_role_index_reloads_before_answering_once_invalidated():
+    tab = RolesTab([["Admins"], ["MCs", "101"]])
+    index = RoleIndex(tab.load, 3600)
+
+    async def main():
+        assert await index.roles(101) == ("MC",)
+        tab.columns = [["Admins", "101"], ["MCs"]]
+        index.invalidate()
+        return await index.roles(101)
+    assert asyncio.run(main()) == ("Admin",)
+    assert tab.loads == 2
+
+def test_role_index_is_invalidated_when_the_mirror_pulls_user_roles(monkeypatch):
+    from zoom_impact_bot import sheets
+    index = RoleIndex(RolesTab([["Admins", "101"]]).load, 3600)
+    index.load([["Admins", "101"]])
+    monkeypatch.setattr(sheets, "role_index", index)
+    sheets._mirror_pulled("Events")
+    assert index.loaded
+    sheets._mirror_pulled("UserRoles")
+    assert not index.loaded
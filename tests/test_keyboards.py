@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+from pydantic import ValidationError
+
+from zoom_impact_bot import keyboards, repos
+from zoom_impact_bot.callbacks import Action, Choice
+from zoom_impact_bot.keyboards import KeyboardCache, picker, toggles
+from zoom_impact_bot.rows import Choices
+
+async def _names() -> list[str]:
+    return []
+
+PICK = Action("test_pick", Choice(_names))
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = KeyboardCache(size=8)
+    monkeypatch.setattr(keyboards, "keyboards", cache)
+    return cache
+
+def _texts(markup) -> list[str]:
+    return [button.text for row in markup.inline_keyboard for button in row]
+
+def test_picker_is_built_once_per_version(cache):
+    first = picker("test", PICK, Choices(["Asha", "Bilal"], version=1))
+    # Another parse of the same version is a hit without looking at the names
+    again = picker("test", PICK, Choices(["Asha", "Bilal"], version=1))
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert _texts(again) == _texts(first) == ["Asha", "Bilal"]
+
+    edited = picker("test", PICK, Choices(["Asha", "Bilal", "Chen"], version=2))
+    assert _texts(edited) == ["Asha", "Bilal", "Chen"]
+    assert cache.misses == 2
+
+def test_plain_choices_are_their_own_version(cache):
+    picker("test", PICK, ["Jan", "Feb"])
+    picker("test", PICK, ("Jan", "Feb"))
+    picker("test", PICK, ["Jan", "Feb", "Mar"])
+    assert (cache.hits, cache.misses) == (1, 2)
+
+def test_toggles_are_cached_per_selection(cache):
+    choices = Choices(["Asha", "Bilal"], version=1)
+    assert _texts(toggles("test", PICK, choices, [])) == ["☐ Asha", "☐ Bilal"]
+    assert _texts(toggles("test", PICK, choices, ["Bilal", "Gone"])) == ["☐ Asha", "☑ Bilal"]
+    toggles("test", PICK, choices, ["Bilal"])
+    assert (cache.hits, cache.misses) == (1, 2)
+
+def test_handed_out_markups_cannot_change_the_cached_one(cache):
+    choices = Choices(["Asha", "Bilal"], version=1)
+    mine = picker("test", PICK, choices)
+    mine.inline_keyboard.pop()
+    mine.inline_keyboard[0].append(mine.inline_keyboard[0][0])
+    with pytest.raises(ValidationError):
+        mine.inline_keyboard[0][0].text = "Changed"
+    assert _texts(picker("test", PICK, choices)) == ["Asha", "Bilal"]
+
+def test_roster_is_parsed_once_until_user_roles_change(cache, capsys):
+    data = repos.memory_repos({"UserRoles": [["Admins", "MCs"], ["1", "Asha"], ["", "Bilal"]]})
+    parses = repos._parsed.parses
+
+    async def mcs():
+        return (await data.roles.assignable())[0]
+
+    async def main():
+        first = await mcs()
+        assert await mcs() is first
+        assert repos._parsed.parses == parses + 1
+        picker("mcs", PICK, first)
+        picker("mcs", PICK, await mcs())
+        assert (cache.hits, cache.misses) == (1, 1)
+
+        data.roles.index.add(4, ["", "Chen"])
+        changed = await mcs()
+        assert list(changed) == ["Asha", "Bilal", "Chen"]
+        assert _texts(picker("mcs", PICK, changed)) == ["Asha", "Bilal", "Chen"]
+        assert cache.misses == 2
+    asyncio.run(main())
+    assert capsys.readouterr().out == ""
@@ -0,0 +1,109 @@
+import asyncio
+import os
+import sys
+from datetime import date
+
+import pytest
+from aiogram import Dispatcher
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+from fake_gspread import CATEGORIES, seed
+
+from zoom_impact_bot import callbacks, repos
+from zoom_impact_bot.commands import list_recognitions
+from zoom_impact_bot.commands.list_recognitions import (MESSAGE_LIMIT, PageCache, _length, page_keyboard,
+                                                        recognition_pages, render_pages)
+
+def _record(text: str) -> dict:
+    return {"upline": text, "downline": text, "category": text, "month": text, "remarks": text}
+
+def test_pages_fit_with_oversize_fields_in_every_column():
+    # Emoji are two UTF-16 units and '&' escapes to five characters
+    for text in ("😀" * 5000, "&" * 5000, "<b>" * 2000, "x" * 20000):
+        pages = render_pages([_record(text)] * 7, "Recognitions for " + text)
+        assert pages
+        assert all(_length(page) <= MESSAGE_LIMIT for page in pages)
+
+def test_every_record_is_rendered_once():
+    recognitions = [_record(f"name {number} " + "é" * 900) for number in range(30)]
+    pages = render_pages(recognitions, "All Recognitions")
+    text = "".join(pages)
+    assert all(f"<b>{number}.</b>" in text for number in range(1, 31))
+    assert pages[-1].endswith(f"<i>Page {len(pages)} of {len(pages)}</i>")
+
+def test_short_lists_render_on_one_page_without_footer():
+    pages = render_pages([_record("Ann & Bo")], "All Recognitions")
+    assert len(pages) == 1
+    assert "Ann &amp; Bo" in pages[0]
+    assert "Page" not in pages[0]
+
+class FakeMessage:
+    def __init__(self):
+        self.edits = []
+
+    async def edit_text(self, text, reply_markup=None, parse_mode=None):
+        self.edits.append((text, reply_markup))
+
+class FakeCallback:
+    def __init__(self, data: str):
+        self.data = data
+        self.message = FakeMessage()
+        self.answers = []
+
+    async def answer(self, text=None, show_alert=None):
+        self.answers.append(text)
+
+@pytest.fixture
+def router(monkeypatch) -> callbacks.CallbackRouter:
+    data = repos.memory_repos(seed(3600, date(2031, 5, 6)))
+    monkeypatch.setattr(repos, "recognitions", data.recognitions)
+    monkeypatch.setattr(repos, "reference", data.reference)
+    monkeypatch.setattr(list_recognitions, "result_pages", PageCache())
+    dp = Dispatcher()
+    list_recognitions.register(dp)
+    return callbacks.router(dp)
+
+def _next(markup) -> str:
+    return next(button.callback_data for button in markup.inline_keyboard[0] if button.text.startswith("Next"))
+
+def test_page_buttons_survive_a_restart(router, monkeypatch):
+    category = CATEGORIES[2]
+
+    async def main():
+        recognitions = await repos.recognitions.query(category=category)
+        pages = recognition_pages(recognitions, category=category)
+        assert len(pages) > 2
+        data = _next(page_keyboard(pages, 0, category=category))
+        # A new process has none of the rendered lists
+        monkeypatch.setattr(list_recognitions, "result_pages", PageCache())
+        cb = FakeCallback(data)
+        await router.dispatch(cb)
+        return pages, cb
+    pages, cb = asyncio.run(main())
+    assert cb.answers == [None]
+    text, markup = cb.message.edits[0]
+    assert text == pages[1]
+    assert [button.text for button in markup.inline_keyboard[0]] == ["◀ Prev", "Next ▶"]
+    assert list_recognitions.result_pages.stats()["misses"] == 1
+
+def test_every_filter_flips_from_the_cache(router):
+    async def flip(data: str) -> FakeCallback:
+        cb = FakeCallback(data)
+        await router.dispatch(cb)
+        return cb
+
+    async def main():
+        months = await repos.recognitions.months()
+        for month, category in ((None, None), (months[0], None), (None, CATEGORIES[0])):
+            recognitions = await repos.recognitions.query(month=month, category=category)
+            pages = recognition_pages(recognitions, month, category)
+            assert len(pages) > 1
+            cb = await flip(_next(page_keyboard(pages, 0, month, category)))
+            assert cb.message.edits[0][0] == pages[1]
+        # Past the last page of a list that has since shrunk
+        cb = await flip(list_recognitions.FLIP_ALL.pack(10_000))
+        assert cb.answers == ["This list has changed. Open List Recognitions again."]
+        assert cb.message.edits == []
+    asyncio.run(main())
+    assert list_recognitions.result_pages.stats()["hits"] >= 2
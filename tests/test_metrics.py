@@ -0,0 +1,22 @@
+import asyncio
+
+import aiohttp
+from aiohttp.test_utils import unused_port
+
+from zoom_impact_bot import metrics
+
+def test_metrics_server_listens_on_localhost_by_default():
+    port = unused_port()
+
+    async def main():
+        runner = await metrics.start_server(port)
+        try:
+            assert [site.name for site in runner.sites] == [f"http://127.0.0.1:{port}"]
+            async with aiohttp.ClientSession() as session:
+                async with session.get(f"http://127.0.0.1:{port}/metrics") as resp:
+                    return resp.status, await resp.text()
+        finally:
+            await runner.cleanup()
+    status, text = asyncio.run(main())
+    assert status == 200
+    assert "bot_handler_seconds" in text
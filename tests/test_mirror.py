@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+from zoom_impact_bot.mirror import MirrorSync, SheetMirror
+
+HEADER = ["Upline", "Downline", "Category", "Month", "Remarks"]
+
+class FlakyTransport:
+    """One tab in memory; the next `fail` appends raise, after landing if `land` is set."""
+
+    def __init__(self, rows):
+        self.rows = [list(row) for row in rows]
+        self.fail = 0
+        self.land = True
+        self.appends = 0
+
+    async def get_values(self, tab, rng=None, major_dimension="ROWS"):
+        if rng and not rng.startswith("A:"):
+            first = int(rng[1:rng.index(":")])
+            return [list(row) for row in self.rows[first - 1:]]
+        return [list(row) for row in self.rows]
+
+    async def append_rows(self, tab, rows):
+        self.appends += 1
+        start = len(self.rows) + 1
+        if self.fail:
+            self.fail -= 1
+            if self.land:
+                self.rows.extend(list(row) for row in rows)
+            raise TimeoutError("append timed out")
+        self.rows.extend(list(row) for row in rows)
+        return {"updates": {"updatedRange": f"'{tab}'!A{start}:E{start + len(rows) - 1}"}}
+
+    async def batch_update(self, tab, data):
+        return {}
+
+def _sync(transport, tmp_path):
+    mirror = SheetMirror(str(tmp_path / "mirror.sqlite3"))
+    mirror.replace("Recognitions", transport.rows)
+
+    async def get():
+        return transport
+    return mirror, MirrorSync(mirror, get, tabs=("Recognitions",))
+
+def test_append_that_landed_before_failing_is_not_sent_again(tmp_path):
+    transport = FlakyTransport([HEADER, ["A", "B", "Cat", "Jan", "x"]])
+    mirror, sync = _sync(transport, tmp_path)
+    mirror.append("Recognitions", ["C", "D", "Cat", "Feb", "y"])
+    transport.fail = 1
+    # Someone else appends between the lost response and the retry
+    with pytest.raises(TimeoutError):
+        asyncio.run(sync.push())
+    transport.rows.append(["E", "F", "Cat", "Mar", "z"])
+
+    asyncio.run(sync.push())
+    assert transport.appends == 1
+    assert transport.rows.count(["C", "D", "Cat", "Feb", "y"]) == 1
+    assert mirror.pending() == 0
+    assert mirror.values("Recognitions")[2] == ["C", "D", "Cat", "Feb", "y"]
+
+def test_append_that_did_not_land_is_sent_again(tmp_path):
+    transport = FlakyTransport([HEADER])
+    mirror, sync = _sync(transport, tmp_path)
+    mirror.append("Recognitions", ["C", "D", "Cat", "Feb", "y"])
+    mirror.append("Recognitions", ["G", "H", "Cat", "Apr", ""])
+    transport.fail = 1
+    transport.land = False
+    with pytest.raises(TimeoutError):
+        asyncio.run(sync.push())
+
+    asyncio.run(sync.push())
+    assert transport.appends == 2
+    assert transport.rows[1:] == [["C", "D", "Cat", "Feb", "y"], ["G", "H", "Cat", "Apr", ""]]
+    assert mirror.pending() == 0
+
+def test_rows_queued_after_a_lost_append_go_in_the_next_request(tmp_path):
+    transport = FlakyTransport([HEADER])
+    mirror, sync = _sync(transport, tmp_path)
+    mirror.append("Recognitions", ["C", "D", "Cat", "Feb", "y"])
+    transport.fail = 1
+    with pytest.raises(TimeoutError):
+        asyncio.run(sync.push())
+    mirror.append("Recognitions", ["G", "H", "Cat", "Apr", "w"])
+
+    asyncio.run(sync.push())
+    assert transport.rows[1:] == [["C", "D", "Cat", "Feb", "y"], ["G", "H", "Cat", "Apr", "w"]]
+    assert transport.appends == 2
+    assert mirror.pending() == 0
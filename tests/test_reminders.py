@@ -0,0 +1,131 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from zoom_impact_bot import reminders
+from zoom_impact_bot.reminders import ReminderScheduler, describe, parse_leads
+from zoom_impact_bot.sheets import TZ
+
+START = datetime(2031, 5, 6, 20, 30, tzinfo=TZ)
+HOUR = timedelta(hours=1)
+TEN_MINUTES = timedelta(minutes=10)
+
+def _event(start: datetime, event_type: str = "Weekly Zoom") -> dict:
+    return {"type": event_type, "date": start.strftime("%Y-%m-%d"), "time": start.strftime("%H:%M"),
+            "zoom_link": "https://zoom.us/j/1", "mc": "MC 1", "presenter": "Presenter 1", "impact": "",
+            "status": "Scheduled", "notes": ""}
+
+def test_each_lead_fires_once_per_event():
+    schedule = ReminderScheduler([HOUR, TEN_MINUTES])
+    events = [(2, _event(START))]
+    assert schedule.sync(events, now=START - 2 * HOUR) == 1
+    assert schedule.next_fire() == START - HOUR
+    assert schedule.due(now=START - HOUR - timedelta(seconds=1)) == []
+    assert schedule.due(now=START - HOUR) == [(events[0][1], HOUR)]
+    assert schedule.due(now=START - HOUR) == []
+
+    # An unchanged row is not scheduled again
+    assert schedule.sync(events, now=START - HOUR) == 0
+    assert schedule.due(now=START - TEN_MINUTES) == [(events[0][1], TEN_MINUTES)]
+    assert schedule.sync(events, now=START - TEN_MINUTES) == 0
+    assert schedule.due(now=START) == []
+    assert schedule.next_fire() is None
+
+def test_only_leads_still_ahead_are_scheduled():
+    schedule = ReminderScheduler([HOUR, TEN_MINUTES])
+    schedule.sync([(2, _event(START))], now=START - timedelta(minutes=30))
+    assert schedule.due(now=START - TEN_MINUTES) == [(_event(START), TEN_MINUTES)]
+    assert schedule.stats()["dropped"] == 0
+
+def test_edited_time_moves_the_reminder():
+    schedule = ReminderScheduler([HOUR])
+    schedule.sync([(2, _event(START))], now=START - 2 * HOUR)
+    later = START + timedelta(minutes=45)
+    assert schedule.sync([(2, _event(later))], now=START - 2 * HOUR) == 1
+    # The old time is skipped, the new one fires once
+    assert schedule.due(now=START - HOUR) == []
+    assert schedule.next_fire() == later - HOUR
+    assert schedule.due(now=later - HOUR) == [(_event(later), HOUR)]
+    assert schedule.due(now=later) == []
+
+def test_other_edits_send_the_latest_event():
+    schedule = ReminderScheduler([HOUR])
+    schedule.sync([(2, _event(START))], now=START - 2 * HOUR)
+    edited = {**_event(START), "mc": "MC 2"}
+    schedule.sync([(2, edited)], now=START - 2 * HOUR)
+    assert schedule.due(now=START - HOUR) == [(edited, HOUR)]
+
+def test_deleted_events_are_dropped():
+    schedule = ReminderScheduler([HOUR])
+    other = START + timedelta(minutes=5)
+    schedule.sync([(2, _event(START)), (3, _event(other, "Training"))], now=START - 2 * HOUR)
+    assert schedule.sync([(3, _event(other, "Training"))], now=START - 2 * HOUR) == 1
+    assert schedule.stats()["rows"] == 1
+    assert schedule.next_fire() == other - HOUR
+    assert schedule.due(now=other - HOUR) == [(_event(other, "Training"), HOUR)]
+
+def test_stale_entries_are_compacted_away():
+    schedule = ReminderScheduler([HOUR])
+    for minute in range(10):
+        schedule.sync([(2, _event(START + timedelta(minutes=minute)))], now=START - 2 * HOUR)
+    assert schedule.stats()["pending"] < 10
+
+def test_reminders_missed_by_more_than_the_late_limit_are_not_sent():
+    schedule = ReminderScheduler([HOUR])
+    schedule.sync([(2, _event(START))], now=START - 2 * HOUR)
+    assert schedule.due(now=START - HOUR + timedelta(minutes=6)) == []
+    assert schedule.stats()["dropped"] == 1
+
+class Clock:
+    def __init__(self, now: datetime):
+        self.now = now
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock(START - 2 * HOUR)
+
+    class FakeDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return clock.now
+
+    monkeypatch.setattr(reminders, "datetime", FakeDatetime)
+    monkeypatch.setattr(reminders, "REMINDER_SYNC_INTERVAL", 0.01)
+    return clock
+
+def test_run_sends_each_due_reminder_once_across_syncs(clock):
+    schedule = ReminderScheduler([HOUR])
+    # The first sync finds the reminder 50ms ahead, so run() sleeps that long (in real time)
+    clock.now = START - HOUR - timedelta(milliseconds=50)
+    events = [(2, _event(START)), (3, _event(START + HOUR, "Training"))]
+    syncs = []
+    sent = []
+
+    async def source():
+        syncs.append(clock.now)
+        return events
+
+    async def notify(event, lead):
+        sent.append((event["type"], lead))
+
+    async def main():
+        running = asyncio.ensure_future(schedule.run(source, notify))
+        while not syncs:
+            await asyncio.sleep(0.01)
+        clock.now = START - HOUR
+        # Several more syncs of the same rows go by
+        await asyncio.sleep(0.2)
+        running.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await running
+    asyncio.run(main())
+    assert len(syncs) > 2
+    assert sent == [("Weekly Zoom", HOUR)]
+    assert schedule.stats()["sent"] == 1
+
+def test_lead_times_parse_and_read_back():
+    assert parse_leads("10m, 24h,1h,,1h") == [timedelta(hours=24), HOUR, TEN_MINUTES]
+    assert [describe(lead) for lead in parse_leads("1d,90m,1m")] == ["1 day", "90 minutes", "1 minute"]
+    with pytest.raises(SystemExit):
+        parse_leads("1w")
@@ -0,0 +1,84 @@
+import asyncio
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+from fake_gspread import ADMIN_ID, CATEGORIES, EVENT_TYPES, RARE_CATEGORY, FakeClient, FakeSpreadsheet, seed
+
+from zoom_impact_bot import repos, sheets
+from zoom_impact_bot.indexes import EventsIndex, RecognitionsStore, RoleIndex, ValuesTab
+from zoom_impact_bot.mirror import SheetMirror
+from zoom_impact_bot.write_queue import AppendQueue
+
+TODAY = datetime.now(sheets.TZ).date()
+
+def _sheets_repos(tabs, monkeypatch, tmp_path) -> repos.Repos:
+    book = FakeSpreadsheet(tabs)
+    monkeypatch.setattr(sheets, "registry", sheets.WorksheetRegistry(lambda: FakeClient(book), "bench"))
+    monkeypatch.setattr(sheets, "_transport", None)
+    # Fresh caches, so nothing loaded by another test leaks in
+    monkeypatch.setattr(sheets, "events_index", EventsIndex(sheets._load_events, 3600, sheets.TZ))
+    monkeypatch.setattr(sheets, "recognitions_store", RecognitionsStore(
+        sheets._load_recognitions, 3600, tail_loader=sheets._tail_loader("Recognitions", "E")))
+    monkeypatch.setattr(sheets, "role_index", RoleIndex(sheets._load_roles, 3600))
+    for name, tab in (("templates_tab", "Templates"), ("categories_tab", "Recognition-Categories"),
+                      ("event_types_tab", "EventTypes")):
+        monkeypatch.setattr(sheets, name, ValuesTab(sheets._tab_loader(tab), 3600))
+    monkeypatch.setattr(sheets, "append_queue", AppendQueue(sheets._append_rows, delay=0.01))
+    return repos.sheets_repos()
+
+def _sqlite_repos(tabs, monkeypatch, tmp_path) -> repos.Repos:
+    path = str(tmp_path / "data.sqlite3")
+    db = SheetMirror(path, sheets.TZ)
+    for tab, values in tabs.items():
+        db.replace(tab, values)
+    db.close()
+    return repos.sqlite_repos(path)
+
+def _memory_repos(tabs, monkeypatch, tmp_path) -> repos.Repos:
+    return repos.memory_repos(tabs)
+
+@pytest.fixture(params=[_sheets_repos, _sqlite_repos, _memory_repos], ids=["sheets", "sqlite", "memory"])
+def data(request, monkeypatch, tmp_path) -> repos.Repos:
+    return request.param(seed(40, TODAY), monkeypatch, tmp_path)
+
+def test_backends_answer_alike(data):
+    tomorrow = TODAY + timedelta(days=1)
+
+    async def main():
+        assert "Admin" in await data.roles.roles(ADMIN_ID)
+        assert await data.roles.roles(1) == ()
+        assert ADMIN_ID in await data.roles.users()
+        mcs, presenters, impacts = await data.roles.assignable()
+        assert sorted(mcs) == sorted(f"MC {i}" for i in range(20))
+        assert len(presenters) == 30 and len(impacts) == 40
+
+        assert list(await data.reference.categories()) == CATEGORIES + [RARE_CATEGORY]
+        assert list(await data.reference.event_types()) == EVENT_TYPES
+        assert await data.reference.template("SLIDES") == "https://example.com/slides"
+        assert await data.reference.template("agenda") is None
+
+        assert await data.recognitions.query(category=RARE_CATEGORY.lower()) == []
+        await data.recognitions.add("Upline 1", "Newcomer", RARE_CATEGORY, "May 2031", "Welcome")
+        assert await data.recognitions.query(month="may 2031", category=RARE_CATEGORY) == [{
+            "upline": "Upline 1", "downline": "Newcomer", "category": RARE_CATEGORY,
+            "month": "May 2031", "remarks": "Welcome"}]
+        assert "May 2031" in await data.recognitions.months()
+
+        before = await data.events.for_date(tomorrow)
+        await data.events.add("Weekly Zoom", tomorrow.isoformat(), "23:59", "https://zoom.us/j/1",
+                              "MC 1", "Presenter 1", ["Speaker 1", "Speaker 2"])
+        added = [(row, event) for row, event in await data.events.upcoming(2) if event["time"] == "23:59"]
+        assert [event["impact"] for _, event in added] == ["Speaker 1, Speaker 2"]
+        await data.events.update_roles(added[0][0], mc="MC 2", impacts=[])
+        events = await data.events.for_date(tomorrow)
+        assert len(events) == len(before) + 1
+        assert events[-1] == {"type": "Weekly Zoom", "date": tomorrow.isoformat(), "time": "23:59",
+                              "zoom_link": "https://zoom.us/j/1", "mc": "MC 2", "presenter": "Presenter 1",
+                              "impact": "", "status": "Scheduled", "notes": ""}
+        assert await data.events.next_event() is not None
+    asyncio.run(main())
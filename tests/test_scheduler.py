@@ -0,0 +1,179 @@
+import asyncio
+
+import pytest
+from prometheus_client import CollectorRegistry
+
+from zoom_impact_bot import metrics, scheduler
+from zoom_impact_bot.scheduler import BACKGROUND, INTERACTIVE, SheetsBusyError, SheetsScheduler, SingleFlight, TokenBucket
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+class APIError(Exception):
+    def __init__(self, code: int):
+        super().__init__(f"[{code}]")
+        self.code = code
+
+def test_token_bucket_allows_a_burst_then_refills_at_its_rate(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(scheduler, "time", clock)
+    bucket = TokenBucket(per_minute=60, burst=3)
+    assert [bucket.try_take() for _ in range(4)] == [True, True, True, False]
+    assert bucket.wait_time() == pytest.approx(1.0)
+    clock.now += 0.5
+    assert not bucket.try_take()
+    assert bucket.wait_time() == pytest.approx(0.5)
+    clock.now += 0.5
+    assert bucket.try_take()
+    # Idle time never saves up more than the burst
+    clock.now += 3600
+    assert [bucket.try_take() for _ in range(4)] == [True, True, True, False]
+
+def test_rate_limited_calls_back_off_and_retry():
+    sheets = SheetsScheduler(base_delay=0.01, max_delay=0.02)
+    attempts = []
+
+    async def flaky():
+        attempts.append(len(attempts))
+        if len(attempts) < 3:
+            raise APIError(429)
+        return "rows"
+    assert asyncio.run(sheets.call("read", flaky)) == "rows"
+    assert len(attempts) == 3
+    assert sheets.stats()["retries"] == 2
+    assert sheets.stats()["failures"] == 0
+
+def test_other_errors_are_not_retried():
+    sheets = SheetsScheduler(base_delay=0.01)
+    attempts = []
+
+    async def rejected():
+        attempts.append(1)
+        raise APIError(400)
+    with pytest.raises(APIError):
+        asyncio.run(sheets.call("write", rejected))
+    assert len(attempts) == 1
+    assert (sheets.retries, sheets.failures) == (0, 1)
+
+def test_retries_stop_at_the_deadline():
+    sheets = SheetsScheduler(base_delay=0.05, max_delay=0.05)
+
+    async def throttled():
+        raise APIError(429)
+    with pytest.raises(APIError):
+        asyncio.run(sheets.call("read", throttled, deadline=0.12))
+    assert sheets.retries >= 1
+    assert (sheets.failures, sheets.deadlines_missed) == (1, 1)
+
+def test_interactive_calls_are_served_before_background_ones():
+    # One token, then one every 50ms
+    sheets = SheetsScheduler(reads_per_minute=1200, burst=1)
+    served = []
+
+    async def call(name, level):
+        scheduler.priority.set(level)
+        await sheets.call("read", lambda: _record(served, name))
+
+    async def main():
+        await sheets.call("read", lambda: _record(served, "first"))
+        background = [asyncio.ensure_future(call(f"refresh {i}", BACKGROUND)) for i in range(2)]
+        await asyncio.sleep(0)
+        interactive = asyncio.ensure_future(call("user", INTERACTIVE))
+        await asyncio.sleep(0)
+        assert sheets.stats()["read_queue"] == 3
+        await asyncio.gather(*background, interactive)
+    asyncio.run(main())
+    assert served == ["first", "user", "refresh 0", "refresh 1"]
+    assert sheets.stats()["read_throttled"] == 3
+    assert sheets.stats()["read_waited"] > 0
+
+async def _record(served, name):
+    served.append(name)
+
+def test_reads_and_writes_have_separate_quotas():
+    sheets = SheetsScheduler(reads_per_minute=1, writes_per_minute=60, burst=1, deadline=0.05)
+
+    async def main():
+        await sheets.call("read", lambda: _record([], "read"))
+        # Reads are exhausted for a minute, writes are not
+        await sheets.call("write", lambda: _record([], "write"))
+        with pytest.raises(SheetsBusyError):
+            await sheets.call("read", lambda: _record([], "read"))
+    asyncio.run(main())
+    assert sheets.deadlines_missed == 1
+
+def test_scheduler_stats_are_exported():
+    sheets = SheetsScheduler(base_delay=0.01)
+    registry = CollectorRegistry()
+    metrics.export_scheduler(sheets, registry)
+    attempts = []
+
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) < 2:
+            raise APIError(503)
+    asyncio.run(sheets.call("write", flaky))
+    assert registry.get_sample_value("sheets_scheduler_calls_total") == 1
+    assert registry.get_sample_value("sheets_scheduler_retries_total") == 1
+    assert registry.get_sample_value("sheets_queue_depth", {"kind": "read"}) == 0
+    assert registry.get_sample_value("sheets_throttled_total", {"kind": "write"}) == 0
+    assert registry.get_sample_value("sheets_quota_wait_seconds_total", {"kind": "write"}) == 0
+
+def test_concurrent_identical_reads_share_one_call():
+    flight = SingleFlight()
+    upstream = []
+
+    async def load(tab):
+        upstream.append(tab)
+        await asyncio.sleep(0.01)
+        return [["row"]]
+
+    async def main():
+        same = [flight.do(("get_values", "Events"), load, "Events") for _ in range(5)]
+        other = flight.do(("get_values", "UserRoles"), load, "UserRoles")
+        return await asyncio.gather(*same, other)
+    results = asyncio.run(main())
+    assert upstream == ["Events", "UserRoles"]
+    assert all(result is results[0] for result in results[:5])
+    assert flight.stats() == {"calls": 6, "coalesced": 4, "in_flight": 0}
+
+def test_a_failed_read_reaches_every_waiter_and_clears_its_key():
+    flight = SingleFlight()
+    upstream = []
+
+    async def load():
+        upstream.append(1)
+        await asyncio.sleep(0.01)
+        if len(upstream) == 1:
+            raise APIError(500)
+        return "rows"
+
+    async def main():
+        waiters = [flight.do(("get_values", "Events"), load) for _ in range(3)]
+        failed = await asyncio.gather(*waiters, return_exceptions=True)
+        assert flight.stats()["in_flight"] == 0
+        # The next read starts a new call instead of reusing the failure
+        return failed, await flight.do(("get_values", "Events"), load)
+    failed, retried = asyncio.run(main())
+    assert [type(error) for error in failed] == [APIError] * 3
+    assert retried == "rows"
+    assert len(upstream) == 2
+
+def test_single_flight_stats_are_exported():
+    flight = SingleFlight()
+    registry = CollectorRegistry()
+    metrics.export_single_flight(flight, registry)
+
+    async def load():
+        await asyncio.sleep(0)
+
+    async def main():
+        await asyncio.gather(*(flight.do(("get_values", "Events"), load) for _ in range(3)))
+    asyncio.run(main())
+    assert registry.get_sample_value("sheets_reads_total") == 3
+    assert registry.get_sample_value("sheets_reads_coalesced_total") == 2
+    assert registry.get_sample_value("sheets_reads_in_flight") == 0
@@ -0,0 +1,120 @@
+import asyncio
+import os
+import sys
+from datetime import date
+
+import gspread
+import pytest
+from prometheus_client import CollectorRegistry
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+from fake_gspread import FakeClient, FakeSpreadsheet, FakeWorksheet, seed
+
+from zoom_impact_bot import metrics, sheets
+
+class RecordingWorksheet(FakeWorksheet):
+    """Remembers the valueInputOption of every write."""
+
+    options: list[tuple[str, str]] = []
+
+    def append_row(self, row, **kwargs):
+        return self.append_rows([row], **kwargs)
+
+    def append_rows(self, rows, **kwargs):
+        self.options.append(("append_rows", kwargs.get("value_input_option")))
+        return super().append_rows(rows, **kwargs)
+
+    def batch_update(self, data, **kwargs):
+        self.options.append(("batch_update", kwargs.get("value_input_option")))
+        return super().batch_update(data, **kwargs)
+
+@pytest.fixture
+def book(monkeypatch):
+    book = FakeSpreadsheet(seed(10, date(2030, 1, 15)))
+    book._worksheets = [RecordingWorksheet(book, ws.title, ws.rows) for ws in book._worksheets]
+    RecordingWorksheet.options = []
+    monkeypatch.setattr(sheets, "registry", sheets.WorksheetRegistry(lambda: FakeClient(book), "bench"))
+    return book
+
+FORMULA = '=IMPORTXML("https://example.com", "//a")'
+
+def test_gspread_appends_keep_a_leading_equals_as_text(book):
+    row = [FORMULA, "Bo", "Mentor", "May 2030", '=HYPERLINK("x")']
+    asyncio.run(sheets.GspreadTransport().append_rows("Recognitions", [row]))
+    sheets.add_recognition(*row)
+    assert RecordingWorksheet.options == [("append_rows", "RAW"), ("append_rows", "RAW")]
+    assert book.worksheet("Recognitions").rows[-2:] == [row, row]
+
+def test_gspread_role_patch_is_raw(book):
+    sheets.update_event_roles(3, mc=FORMULA)
+    assert RecordingWorksheet.options == [("batch_update", "RAW")]
+    assert book.worksheet("Events").rows[2][4] == FORMULA
+
+def test_read_timeouts_reach_the_busy_handler(monkeypatch):
+    async def timed_out():
+        raise asyncio.TimeoutError()
+
+    monkeypatch.setattr(sheets, "categories_tab", sheets.ValuesTab(timed_out, 60))
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(sheets.aget_categories())
+    assert isinstance(asyncio.TimeoutError(), sheets.SHEETS_ERRORS)
+
+class Response:
+    def __init__(self, code: int, message: str):
+        self.error = {"code": code, "message": message, "status": ""}
+        self.text = message
+
+    def json(self):
+        return {"error": self.error}
+
+class DeletedWorksheet(FakeWorksheet):
+    """A handle to a tab that has since been deleted, as the API answers it."""
+
+    def get_values(self, rng=None, major_dimension="ROWS"):
+        raise gspread.exceptions.APIError(Response(400, f"Unable to parse range: '{self.title}'!A1"))
+
+def _replace_tab(book, title, rows):
+    old = book.worksheet(title)
+    book._worksheets[book._worksheets.index(old)] = FakeWorksheet(book, title, rows)
+    old.__class__ = DeletedWorksheet
+
+def test_recreated_tab_drops_its_stale_handle_and_resolves_again(book):
+    registry = sheets.registry
+    assert sheets._with_ws("Templates", lambda ws: ws.get_values())[1][0] == "slides"
+    _replace_tab(book, "Templates", [["key", "url"], ["agenda", "https://example.com/agenda"]])
+
+    assert sheets._with_ws("Templates", lambda ws: ws.get_values())[1][0] == "agenda"
+    assert (registry.hits, registry.misses, registry.refreshes) == (1, 2, 2)
+    assert sheets._with_ws("Templates", lambda ws: ws.get_values())[1][0] == "agenda"
+    assert registry.refreshes == 2
+
+def test_renamed_tab_is_found_under_its_new_name_only(book):
+    registry = sheets.registry
+    registry.get("EventTypes")
+    book.worksheet("EventTypes").title = "Event Types"
+    # The old handle still points at the tab under its new name
+    assert registry.get("Event Types").title == "Event Types"
+    assert registry.refreshes == 2
+    registry.invalidate("EventTypes")
+    with pytest.raises(gspread.exceptions.WorksheetNotFound):
+        registry.get("EventTypes")
+    assert registry.stats()["tabs"] == sorted(ws.title for ws in book._worksheets)
+
+def test_deleted_tab_raises_worksheet_not_found(book):
+    old = sheets.registry.get("Templates")
+    book._worksheets.remove(old)
+    old.__class__ = DeletedWorksheet
+    with pytest.raises(gspread.exceptions.WorksheetNotFound):
+        sheets._with_ws("Templates", lambda ws: ws.get_values())
+    assert "Templates" not in sheets.registry.stats()["tabs"]
+
+def test_registry_stats_are_exported(book):
+    registry = CollectorRegistry()
+    metrics.export_registry(sheets.registry, registry)
+    for _ in range(3):
+        sheets.registry.get("Events")
+    sheets.registry.get("UserRoles")
+    assert registry.get_sample_value("sheets_handle_hits_total") == 3
+    assert registry.get_sample_value("sheets_handle_misses_total") == 1
+    assert registry.get_sample_value("sheets_handle_refreshes_total") == 1
@@ -0,0 +1,124 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from zoom_impact_bot.scheduler import SheetsScheduler
+from zoom_impact_bot.sheets_api import AsyncSheetsClient, SheetsAPIError
+
+class FakeSheetsAPI:
+    """Answers the values endpoints and records every request it gets."""
+
+    def __init__(self):
+        self.requests = []
+        self.responses = []
+        self.tokens = 0
+
+    async def token(self):
+        self.tokens += 1
+        return f"token-{self.tokens}", 3600
+
+    async def handle(self, request: web.Request) -> web.Response:
+        body = await request.json() if request.can_read_body else None
+        self.requests.append((request.method, request.raw_path, request.query, request.headers, body))
+        if self.responses:
+            status, payload = self.responses.pop(0)
+        else:
+            status, payload = 200, {"values": [["a", "b"], ["c"]]}
+        return web.json_response(payload, status=status)
+
+def run(api: FakeSheetsAPI, scenario):
+    async def main():
+        app = web.Application()
+        app.router.add_route("*", "/{tail:.*}", api.handle)
+        async with TestServer(app) as server:
+            client = AsyncSheetsClient("sheet id", api.token, base_url=str(server.make_url("/v4/spreadsheets")))
+            try:
+                return await scenario(client)
+            finally:
+                await client.close()
+    return asyncio.run(main())
+
+def test_get_values_quotes_and_encodes_the_range():
+    api = FakeSheetsAPI()
+    values = run(api, lambda client: client.get_values("Recognition-Categories", "A:A", "COLUMNS"))
+    assert values == [["a", "b"], ["c"]]
+    method, path, query, headers, _ = api.requests[0]
+    assert method == "GET"
+    assert path.startswith("/v4/spreadsheets/sheet%20id/values/%27Recognition-Categories%27%21A%3AA?")
+    assert query["majorDimension"] == "COLUMNS"
+    assert headers["Authorization"] == "Bearer token-1"
+
+def test_tab_names_with_quotes_and_spaces_are_escaped():
+    api = FakeSheetsAPI()
+    run(api, lambda client: client.get_values("Bob's Tab"))
+    assert api.requests[0][1].startswith("/v4/spreadsheets/sheet%20id/values/%27Bob%27%27s%20Tab%27?")
+
+def test_missing_values_are_an_empty_list():
+    api = FakeSheetsAPI()
+    api.responses.append((200, {"range": "Events!A1:Z1000"}))
+    assert run(api, lambda client: client.get_values("Events")) == []
+
+def test_batch_get_keeps_request_order():
+    api = FakeSheetsAPI()
+    api.responses.append((200, {"valueRanges": [{"values": [["1"]]}, {}, {"values": [["3"]]}]}))
+    found = run(api, lambda client: client.batch_get("Events", ["A2:A", "B2:B", "C2:C"]))
+    assert found == [[["1"]], [], [["3"]]]
+    _, path, query, _, _ = api.requests[0]
+    assert path.startswith("/v4/spreadsheets/sheet%20id/values:batchGet?")
+    assert query.getall("ranges") == ["'Events'!A2:A", "'Events'!B2:B", "'Events'!C2:C"]
+
+def test_append_rows_sends_raw_values():
+    api = FakeSheetsAPI()
+    api.responses.append((200, {"updates": {"updatedRange": "'Events'!A7:I7"}}))
+    response = run(api, lambda client: client.append_rows("Events", [["Weekly", "2030-01-01", "20:30"]]))
+    assert response["updates"]["updatedRange"] == "'Events'!A7:I7"
+    method, path, query, _, body = api.requests[0]
+    assert method == "POST"
+    assert path.startswith("/v4/spreadsheets/sheet%20id/values/%27Events%27:append?")
+    assert query["valueInputOption"] == "RAW"
+    assert body == {"values": [["Weekly", "2030-01-01", "20:30"]]}
+
+def test_leading_equals_is_appended_as_text():
+    api = FakeSheetsAPI()
+    api.responses.append((200, {"updates": {"updatedRange": "'Recognitions'!A9:E9"}}))
+    row = ['=IMPORTXML("https://example.com", "//a")', "Bo", "Mentor", "May", '=HYPERLINK("x")']
+    run(api, lambda client: client.append_rows("Recognitions", [row]))
+    _, _, query, _, body = api.requests[0]
+    # RAW stores the text as typed; USER_ENTERED would evaluate it as a formula
+    assert query["valueInputOption"] == "RAW"
+    assert body == {"values": [row]}
+
+def test_batch_update_prefixes_each_range_with_the_tab():
+    api = FakeSheetsAPI()
+    api.responses.append((200, {"totalUpdatedCells": 2}))
+    run(api, lambda client: client.batch_update("Events", [{"range": "F5", "values": [["MC"]]},
+                                                           {"range": "H5:I5", "values": [["x", "y"]]}]))
+    method, path, _, _, body = api.requests[0]
+    assert (method, path) == ("POST", "/v4/spreadsheets/sheet%20id/values:batchUpdate")
+    assert body == {"valueInputOption": "RAW", "data": [
+        {"range": "'Events'!F5", "values": [["MC"]]}, {"range": "'Events'!H5:I5", "values": [["x", "y"]]}]}
+
+def test_rate_limit_raises_with_status_and_message():
+    api = FakeSheetsAPI()
+    api.responses.append((429, {"error": {"code": 429, "message": "Quota exceeded"}}))
+    with pytest.raises(SheetsAPIError) as raised:
+        run(api, lambda client: client.get_values("Events"))
+    assert raised.value.code == 429
+    assert raised.value.message == "Quota exceeded"
+
+def test_scheduler_retries_rate_limited_calls():
+    api = FakeSheetsAPI()
+    api.responses.append((429, {"error": {"code": 429, "message": "Quota exceeded"}}))
+    scheduler = SheetsScheduler(base_delay=0.01, max_delay=0.01)
+    values = run(api, lambda client: scheduler.call("read", client.get_values, "Events"))
+    assert values == [["a", "b"], ["c"]]
+    assert len(api.requests) == 2
+    assert scheduler.retries == 1
+
+def test_expired_token_is_refreshed_once():
+    api = FakeSheetsAPI()
+    api.responses.append((401, {"error": {"code": 401, "message": "Invalid Credentials"}}))
+    run(api, lambda client: client.get_values("Events"))
+    assert [headers["Authorization"] for _, _, _, headers, _ in api.requests] == ["Bearer token-1", "Bearer token-2"]
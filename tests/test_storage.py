@@ -0,0 +1,121 @@
+import asyncio
+import sys
+import types
+
+import pytest
+from aiogram.fsm.storage.base import StorageKey
+
+from zoom_impact_bot import storage
+from zoom_impact_bot.storage import TTLMemoryStorage, create_storage
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    # Only the storage module's clock; asyncio keeps the real one
+    monkeypatch.setattr(storage, "time", clock)
+    return clock
+
+def _key(user_id: int) -> StorageKey:
+    return StorageKey(bot_id=1, chat_id=user_id, user_id=user_id)
+
+def test_idle_sessions_expire(clock):
+    store = TTLMemoryStorage(ttl=60, max_sessions=10)
+
+    async def main():
+        await store.set_state(_key(1), "Wizard:step")
+        await store.set_data(_key(1), {"type": "Weekly"})
+        clock.now += 59
+        assert await store.get_state(_key(1)) == "Wizard:step"
+        # Reading it counts as activity
+        clock.now += 59
+        assert await store.get_data(_key(1)) == {"type": "Weekly"}
+        clock.now += 61
+        assert await store.get_state(_key(1)) is None
+        assert await store.get_data(_key(1)) == {}
+    asyncio.run(main())
+    assert store.stats() == {"sessions": 0, "expired": 1, "evicted": 0}
+
+def test_expired_sessions_are_dropped_as_new_ones_arrive(clock):
+    store = TTLMemoryStorage(ttl=60, max_sessions=10)
+
+    async def main():
+        for user_id in range(3):
+            await store.set_state(_key(user_id), "Wizard:step")
+        clock.now += 61
+        await store.set_state(_key(99), "Wizard:step")
+    asyncio.run(main())
+    assert store.stats() == {"sessions": 1, "expired": 3, "evicted": 0}
+
+def test_least_recently_used_session_is_evicted_at_the_limit(clock):
+    store = TTLMemoryStorage(ttl=60, max_sessions=3)
+
+    async def main():
+        for user_id in range(3):
+            await store.set_state(_key(user_id), "Wizard:step")
+            clock.now += 1
+        await store.get_state(_key(0))
+        await store.set_state(_key(3), "Wizard:step")
+        return [await store.get_state(_key(user_id)) for user_id in range(4)]
+    states = asyncio.run(main())
+    assert states == ["Wizard:step", None, "Wizard:step", "Wizard:step"]
+    assert store.stats() == {"sessions": 3, "expired": 0, "evicted": 1}
+
+def test_max_sessions_defaults_to_the_environment_setting():
+    assert TTLMemoryStorage().max_sessions == storage.WIZARD_MAX_SESSIONS
+
+def test_finished_wizard_frees_its_slot(clock):
+    store = TTLMemoryStorage(ttl=60, max_sessions=10)
+
+    async def main():
+        await store.set_state(_key(1), "Wizard:step")
+        await store.set_data(_key(1), {"mc": "Asha"})
+        await store.set_state(_key(1), None)
+        await store.set_data(_key(1), {})
+    asyncio.run(main())
+    assert store.stats()["sessions"] == 0
+
+def test_data_is_copied_in_and_out(clock):
+    store = TTLMemoryStorage(ttl=60, max_sessions=10)
+
+    async def main():
+        data = {"selected_impacts": ["A"]}
+        await store.set_data(_key(1), data)
+        data["extra"] = True
+        found = await store.get_data(_key(1))
+        found["other"] = True
+        return await store.get_data(_key(1))
+    assert asyncio.run(main()) == {"selected_impacts": ["A"]}
+
+def test_create_storage_uses_memory_without_redis_url(monkeypatch):
+    monkeypatch.setattr(storage, "REDIS_URL", "")
+    assert isinstance(create_storage(), TTLMemoryStorage)
+
+def test_create_storage_uses_redis_when_redis_url_is_set(monkeypatch):
+    created = []
+
+    class FakeRedisStorage:
+        @classmethod
+        def from_url(cls, url, **kwargs):
+            created.append((url, kwargs))
+            return cls()
+
+    # The redis extra is optional, so stand in for aiogram's Redis storage module
+    monkeypatch.setitem(sys.modules, "aiogram.fsm.storage.redis",
+                        types.SimpleNamespace(RedisStorage=FakeRedisStorage))
+    monkeypatch.setattr(storage, "REDIS_URL", "redis://cache:6379/0")
+    monkeypatch.setattr(storage, "WIZARD_TTL", 900.0)
+    assert isinstance(create_storage(), FakeRedisStorage)
+    assert created == [("redis://cache:6379/0", {"state_ttl": 900, "data_ttl": 900})]
+
+def test_create_storage_explains_missing_redis_package(monkeypatch):
+    monkeypatch.setitem(sys.modules, "aiogram.fsm.storage.redis", None)
+    monkeypatch.setattr(storage, "REDIS_URL", "redis://cache:6379/0")
+    with pytest.raises(SystemExit, match="pip install redis"):
+        create_storage()
@@ -0,0 +1,146 @@
+import asyncio
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+from aiogram import Bot
+from aiogram.client.session.base import BaseSession
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.methods import AnswerCallbackQuery, SendMessage
+from aiogram.types import Update
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+from fake_gspread import ADMIN_ID, EVENT_TYPES, seed
+
+from zoom_impact_bot import repos, sheets
+from zoom_impact_bot.commands import announce
+from zoom_impact_bot.commands.event_management import (ASSIGN_MC_TO, IMPACT_EVENT, MC_EVENT, PICK_EVENT_TYPE,
+                                                       PICK_MC, PICK_PRESENTER, SAVE_EVENT_FINAL,
+                                                       SAVE_IMPACT_ASSIGNMENT, TOGGLE_ASSIGN_IMPACT, TOGGLE_IMPACT)
+from zoom_impact_bot.commands.utils import ASSIGN_IMPACT, ASSIGN_MC, SAVE_EVENT, SESSION_EXPIRED
+from zoom_impact_bot.run import build_dispatcher
+from zoom_impact_bot.storage import TTLMemoryStorage
+
+TODAY = datetime.now(sheets.TZ).date()
+
+class RecordingSession(BaseSession):
+    """Keeps every Bot API request instead of sending it."""
+
+    def __init__(self):
+        super().__init__()
+        self.requests = []
+
+    async def make_request(self, bot, method, timeout=None):
+        self.requests.append(method)
+        return True
+
+    async def stream_content(self, url, headers=None, timeout=30, chunk_size=65536, raise_for_status=True):
+        yield b""
+
+    async def close(self) -> None:
+        pass
+
+class Admin:
+    """Taps buttons and sends messages as the admin, through the real dispatcher."""
+
+    def __init__(self, fsm_storage):
+        self.session = RecordingSession()
+        self.bot = Bot("123456:TEST", session=self.session)
+        self.dp = build_dispatcher(fsm_storage)
+        self.updates = 0
+
+    async def tap(self, data: str) -> None:
+        self.updates += 1
+        await self._feed({"callback_query": {
+            "id": str(self.updates), "from": {"id": ADMIN_ID, "is_bot": False, "first_name": "Admin"},
+            "chat_instance": "test", "data": data,
+            "message": {"message_id": 1, "date": 0, "chat": {"id": ADMIN_ID, "type": "private"}, "text": "menu"}}})
+
+    async def send(self, text: str) -> None:
+        self.updates += 1
+        await self._feed({"message": {
+            "message_id": self.updates, "date": 0, "chat": {"id": ADMIN_ID, "type": "private"},
+            "from": {"id": ADMIN_ID, "is_bot": False, "first_name": "Admin"}, "text": text}})
+
+    async def _feed(self, update: dict) -> None:
+        await self.dp.feed_update(self.bot, Update.model_validate({"update_id": self.updates, **update}))
+
+    async def state(self) -> tuple:
+        key = StorageKey(bot_id=self.bot.id, chat_id=ADMIN_ID, user_id=ADMIN_ID)
+        return await self.dp.storage.get_state(key), await self.dp.storage.get_data(key)
+
+    def alerts(self) -> list[str]:
+        return [m.text for m in self.session.requests if isinstance(m, AnswerCallbackQuery) and m.show_alert]
+
+    def replies(self) -> list[str]:
+        return [m.text for m in self.session.requests if isinstance(m, SendMessage)]
+
+def _memory_storage():
+    return TTLMemoryStorage()
+
+def _redis_storage():
+    fakeredis = pytest.importorskip("fakeredis")
+    redis = pytest.importorskip("aiogram.fsm.storage.redis")
+    return redis.RedisStorage(fakeredis.aioredis.FakeRedis())
+
+@pytest.fixture(params=[_memory_storage, _redis_storage], ids=["memory", "redis"])
+def admin(request, monkeypatch) -> Admin:
+    data = repos.memory_repos(seed(40, TODAY))
+    for name, repo in zip(("events", "recognitions", "roles", "reference"), data):
+        monkeypatch.setattr(repos, name, repo)
+    return Admin(request.param())
+
+def test_save_event_wizard_runs_to_the_end(admin):
+    day = (TODAY + timedelta(days=3)).isoformat()
+
+    async def main():
+        await admin.tap(SAVE_EVENT.pack())
+        await admin.tap(PICK_EVENT_TYPE.pack(EVENT_TYPES[0]))
+        for text in (day, "20:30", "https://zoom.us/j/1"):
+            await admin.send(text)
+        await admin.tap(PICK_MC.pack("MC 1"))
+        await admin.tap(PICK_PRESENTER.pack("Presenter 2"))
+        await admin.tap(TOGGLE_IMPACT.pack("Speaker 3"))
+        await admin.tap(SAVE_EVENT_FINAL.pack())
+        assert await admin.state() == (None, {})
+        return await repos.events.for_date(TODAY + timedelta(days=3))
+    saved = [event for event in asyncio.run(main()) if event["time"] == "20:30" and event["mc"] == "MC 1"]
+    assert [event["impact"] for event in saved] == ["Speaker 3"]
+    assert admin.alerts() == []
+    assert "✅ <b>Event saved successfully!</b>" in admin.replies()[-1]
+
+def test_stale_button_from_an_abandoned_flow_is_refused(admin):
+    async def main():
+        (first, _), (second, _) = (await repos.events.upcoming(14))[:2]
+        # Impact assignment left half done on one event, then Assign MC opened on another
+        await admin.tap(ASSIGN_IMPACT.pack())
+        await admin.tap(IMPACT_EVENT.pack(first))
+        await admin.tap(TOGGLE_ASSIGN_IMPACT.pack("Speaker 1"))
+        await admin.tap(ASSIGN_MC.pack())
+        await admin.tap(MC_EVENT.pack(second))
+        before = dict(await repos.events.upcoming(14))
+        await admin.tap(SAVE_IMPACT_ASSIGNMENT.pack())
+        assert admin.alerts() == [SESSION_EXPIRED]
+        assert dict(await repos.events.upcoming(14)) == before
+
+        # The flow that owns the session still finishes
+        await admin.tap(ASSIGN_MC_TO.pack("MC 3"))
+        return dict(await repos.events.upcoming(14)), first, second
+    events, first, second = asyncio.run(main())
+    assert events[second]["mc"] == "MC 3"
+    assert events[first]["impact"] != "Speaker 1"
+
+def test_announce_send_refuses_another_flows_data(admin):
+    async def main():
+        await admin.tap(SAVE_EVENT.pack())
+        await admin.tap(PICK_EVENT_TYPE.pack(EVENT_TYPES[0]))
+        await admin.tap(announce.ANNOUNCE_SEND.pack())
+        assert not announce._broadcasts
+        return await admin.state()
+    state, data = asyncio.run(main())
+    assert admin.alerts() == [SESSION_EXPIRED]
+    # The Save Event wizard is left as it was
+    assert data == {"wizard": "save_event", "type": EVENT_TYPES[0]}
+    assert state == "SaveEventStates:waiting_for_date"
@@ -0,0 +1,128 @@
+import asyncio
+
+import pytest
+
+from zoom_impact_bot.scheduler import SheetsBusyError
+from zoom_impact_bot.write_queue import AppendQueue
+
+class APIError(Exception):
+    def __init__(self, code: int):
+        super().__init__(f"[{code}]")
+        self.code = code
+
+class Tab:
+    """Appends rows like values.append does, failing with the queued errors first."""
+
+    def __init__(self, rows: int = 1):
+        self.rows = [["header"]] * rows
+        self.calls: list[list[list[str]]] = []
+        self.errors: list[Exception] = []
+
+    async def append(self, tab: str, rows: list[list[str]]) -> dict:
+        self.calls.append(rows)
+        await asyncio.sleep(0)
+        if self.errors:
+            raise self.errors.pop(0)
+        first = len(self.rows) + 1
+        self.rows.extend(rows)
+        return {"updates": {"updatedRange": f"'{tab}'!A{first}:E{len(self.rows)}"}}
+
+def test_rows_within_the_delay_go_out_in_one_batch_in_order():
+    tab = Tab()
+    queue = AppendQueue(tab.append, delay=0.02, max_rows=50)
+
+    async def main():
+        return await asyncio.gather(*(queue.append("Recognitions", [f"row {i}"]) for i in range(5)))
+    assert asyncio.run(main()) == [2, 3, 4, 5, 6]
+    assert tab.calls == [[[f"row {i}"] for i in range(5)]]
+    assert queue.stats() == {"pending": 0, "in_flight": 0, "batches": 1, "rows": 5, "errors": 0, "requeued": 0}
+
+def test_a_full_batch_is_sent_without_waiting_for_the_delay():
+    tab = Tab()
+    queue = AppendQueue(tab.append, delay=60, max_rows=3)
+
+    async def main():
+        return await asyncio.wait_for(
+            asyncio.gather(*(queue.append("Events", [str(i)]) for i in range(6))), timeout=1)
+    assert asyncio.run(main()) == [2, 3, 4, 5, 6, 7]
+    assert [len(rows) for rows in tab.calls] == [3, 3]
+
+def test_the_delay_flushes_a_partial_batch():
+    tab = Tab()
+    queue = AppendQueue(tab.append, delay=0.02, max_rows=50)
+
+    async def main():
+        first = asyncio.ensure_future(queue.append("Events", ["a"]))
+        await asyncio.sleep(0.01)
+        assert tab.calls == []
+        await asyncio.sleep(0.03)
+        assert tab.calls == [[["a"]]]
+        return await first
+    assert asyncio.run(main()) == 2
+
+def test_tabs_are_batched_separately():
+    tab = Tab()
+    queue = AppendQueue(tab.append, delay=0.01)
+
+    async def main():
+        await asyncio.gather(queue.append("Events", ["e"]), queue.append("Recognitions", ["r"]),
+                             queue.append("Events", ["f"]))
+    asyncio.run(main())
+    assert sorted(tab.calls) == [[["e"], ["f"]], [["r"]]]
+
+def test_refused_batch_is_requeued_ahead_of_newer_rows_and_written_once():
+    tab = Tab()
+    tab.errors = [APIError(429)]
+    queue = AppendQueue(tab.append, delay=0.01)
+
+    async def main():
+        first = [asyncio.ensure_future(queue.append("Recognitions", [name])) for name in ("a", "b")]
+        await asyncio.sleep(0.015)
+        later = asyncio.ensure_future(queue.append("Recognitions", ["c"]))
+        return await asyncio.gather(*first, later)
+    assert asyncio.run(main()) == [2, 3, 4]
+    assert tab.calls == [[["a"], ["b"]], [["a"], ["b"], ["c"]]]
+    assert tab.rows[1:] == [["a"], ["b"], ["c"]]
+    assert queue.stats()["requeued"] == 2
+
+def test_quota_timeouts_are_retried_then_fail_every_caller():
+    tab = Tab()
+    tab.errors = [SheetsBusyError("quota")] * 3
+    queue = AppendQueue(tab.append, delay=0.01, retries=2)
+
+    async def main():
+        return await asyncio.gather(queue.append("Events", ["a"]), queue.append("Events", ["b"]),
+                                    return_exceptions=True)
+    results = asyncio.run(main())
+    assert [type(result) for result in results] == [SheetsBusyError, SheetsBusyError]
+    assert len(tab.calls) == 3
+    assert tab.rows == [["header"]]
+
+def test_errors_that_may_have_written_are_not_retried():
+    tab = Tab()
+    tab.errors = [APIError(503)]
+    queue = AppendQueue(tab.append, delay=0.01)
+
+    async def main():
+        with pytest.raises(APIError):
+            await queue.append("Events", ["a"])
+        # The failed row is not carried into the next batch
+        return await queue.append("Events", ["b"])
+    assert asyncio.run(main()) == 2
+    assert tab.calls == [[["a"]], [["b"]]]
+    assert queue.stats()["errors"] == 1
+
+def test_flush_on_shutdown_sends_everything_queued():
+    tab = Tab()
+    tab.errors = [APIError(429)]
+    queue = AppendQueue(tab.append, delay=60, max_rows=50)
+
+    async def main():
+        waiters = [asyncio.ensure_future(queue.append(name, [name])) for name in ("Events", "Events", "Recognitions")]
+        await asyncio.sleep(0)
+        await asyncio.wait_for(queue.flush(), timeout=1)
+        assert all(waiter.done() for waiter in waiters)
+        return queue.stats()
+    stats = asyncio.run(main())
+    assert sorted(row[0] for row in tab.rows[1:]) == ["Events", "Events", "Recognitions"]
+    assert (stats["pending"], stats["in_flight"], stats["rows"]) == (0, 0, 3)
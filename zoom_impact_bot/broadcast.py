@@ -0,0 +1,162 @@
+"""Fan-out of one message to many Telegram chats within the Bot API limits.
+
+Telegram lets a bot send about 30 messages a second in total and about
+one a second to the same chat. Recipients are queued and sent by a few
+workers that share a token bucket for the global rate and keep the
+per-chat gap. A RetryAfter (flood wait) pauses every worker for the time
+Telegram asks for, after which the recipient is retried. The outcome for
+each recipient is kept in the report returned when the queue is empty.
+"""
+import asyncio
+import os
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from html import escape
+from typing import Awaitable, Callable, Iterable
+
+from aiogram.exceptions import (TelegramBadRequest, TelegramForbiddenError, TelegramNetworkError,
+                                TelegramRetryAfter, TelegramServerError)
+
+from zoom_impact_bot.scheduler import TokenBucket
+
+# Messages per second across all chats (Telegram allows about 30)
+BROADCAST_RATE = float(os.getenv("BROADCAST_RATE", "25"))
+# Seconds between two messages to the same chat
+BROADCAST_CHAT_INTERVAL = float(os.getenv("BROADCAST_CHAT_INTERVAL", "1"))
+# Sends in flight at once
+BROADCAST_CONCURRENCY = int(os.getenv("BROADCAST_CONCURRENCY", "8"))
+# Tries per recipient before a network error or flood wait counts as a failure
+BROADCAST_ATTEMPTS = int(os.getenv("BROADCAST_ATTEMPTS", "3"))
+
+SENT = "sent"
+BLOCKED = "blocked"
+FAILED = "failed"
+
+# Sends the message to one chat
+Send = Callable[[int], Awaitable[object]]
+
+@dataclass
+class Delivery:
+    chat_id: int
+    status: str = "pending"
+    attempts: int = 0
+    error: str = ""
+
+@dataclass
+class BroadcastReport:
+    deliveries: dict[int, Delivery]
+    started: float = field(default_factory=time.monotonic)
+    finished: float | None = None
+    flood_waits: int = 0
+
+    @property
+    def seconds(self) -> float:
+        return (self.finished or time.monotonic()) - self.started
+
+    def counts(self) -> Counter:
+        return Counter(delivery.status for delivery in self.deliveries.values())
+
+    def throughput(self) -> float:
+        """Messages delivered per second."""
+        return self.counts()[SENT] / self.seconds if self.seconds else 0.0
+
+    def summary(self, failures_shown: int = 10) -> str:
+        """HTML report for the admin who started the broadcast."""
+        counts = self.counts()
+        lines = [f"📣 <b>Announcement finished</b>\n",
+                 f"✅ <b>Delivered:</b> {counts[SENT]}/{len(self.deliveries)}",
+                 f"🚫 <b>Blocked the bot:</b> {counts[BLOCKED]}",
+                 f"❌ <b>Failed:</b> {counts[FAILED]}",
+                 f"⏱ <b>Took:</b> {self.seconds:.1f}s ({self.throughput():.1f} msg/s)"]
+        if self.flood_waits:
+            lines.append(f"⏳ <b>Flood waits:</b> {self.flood_waits}")
+        failed = [d for d in self.deliveries.values() if d.status == FAILED]
+        for delivery in failed[:failures_shown]:
+            lines.append(f"   <code>{delivery.chat_id}</code>: {escape(delivery.error)}")
+        if len(failed) > failures_shown:
+            lines.append(f"   …and {len(failed) - failures_shown} more")
+        return "\n".join(lines)
+
+class Broadcaster:
+    """Sends to many chats at once without tripping Telegram's flood limits.
+
+    One instance should serve the whole bot, so that broadcasts running
+    side by side share the global rate and the per-chat gaps.
+    """
+
+    def __init__(self, rate: float = BROADCAST_RATE, chat_interval: float = BROADCAST_CHAT_INTERVAL,
+                 concurrency: int = BROADCAST_CONCURRENCY, attempts: int = BROADCAST_ATTEMPTS):
+        self.bucket = TokenBucket(rate * 60, max(1, int(rate)))
+        self.chat_interval = chat_interval
+        self.concurrency = concurrency
+        self.attempts = attempts
+        self._paused_until = 0.0
+        self._last_sent: dict[int, float] = {}
+        # Most recent broadcasts, newest last
+        self.reports: deque[BroadcastReport] = deque(maxlen=10)
+
+    async def run(self, chat_ids: Iterable[int], send: Send) -> BroadcastReport:
+        """Send to every chat (duplicates once each) and return the outcome per chat."""
+        report = BroadcastReport({chat_id: Delivery(chat_id) for chat_id in chat_ids})
+        self.reports.append(report)
+        queue: asyncio.Queue[Delivery] = asyncio.Queue()
+        for delivery in report.deliveries.values():
+            queue.put_nowait(delivery)
+
+        async def worker() -> None:
+            while not queue.empty():
+                await self._deliver(queue.get_nowait(), send, report)
+
+        await asyncio.gather(*(worker() for _ in range(min(self.concurrency, queue.qsize()))))
+        report.finished = time.monotonic()
+        self._forget_idle_chats()
+        return report
+
+    async def _deliver(self, delivery: Delivery, send: Send, report: BroadcastReport) -> None:
+        while delivery.attempts < self.attempts:
+            await self._acquire(delivery.chat_id)
+            delivery.attempts += 1
+            try:
+                await send(delivery.chat_id)
+            except TelegramRetryAfter as e:
+                # Flood control applies to the whole bot, so every worker waits
+                report.flood_waits += 1
+                self._paused_until = max(self._paused_until, time.monotonic() + e.retry_after)
+                delivery.error = f"flood wait {e.retry_after}s"
+            except TelegramForbiddenError as e:
+                delivery.status, delivery.error = BLOCKED, e.message
+                return
+            except TelegramBadRequest as e:
+                # Chat not found, user deactivated, ...: retrying will not help
+                delivery.status, delivery.error = FAILED, e.message
+                return
+            except (TelegramNetworkError, TelegramServerError) as e:
+                delivery.error = str(e)
+                await asyncio.sleep(delivery.attempts)
+            except Exception as e:
+                delivery.status, delivery.error = FAILED, str(e) or type(e).__name__
+                return
+            else:
+                delivery.status, delivery.error = SENT, ""
+                return
+        delivery.status = FAILED
+
+    async def _acquire(self, chat_id: int) -> None:
+        """Wait out a flood pause, the chat's gap and the global rate, then claim a send."""
+        while True:
+            now = time.monotonic()
+            wait = max(self._paused_until, self._last_sent.get(chat_id, 0.0) + self.chat_interval) - now
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+            if self.bucket.try_take():
+                break
+            await asyncio.sleep(self.bucket.wait_time())
+        self._last_sent[chat_id] = time.monotonic()
+
+    def _forget_idle_chats(self) -> None:
+        cutoff = time.monotonic() - self.chat_interval
+        self._last_sent = {chat_id: at for chat_id, at in self._last_sent.items() if at > cutoff}
+
+broadcaster = Broadcaster()
@@ -0,0 +1,190 @@
+"""Compact callback_data for inline buttons, dispatched with one dict lookup.
+
+Telegram limits callback_data to 64 bytes, so names, categories and
+months cannot be embedded as they are. A button's data is its action's
+short code followed by its arguments, separated by dots. Integers are
+written in base 36. A name picked from a list is sent as a short hash of
+the name, "am.1x3k9q", and is looked up again in the action's current
+list when the button is pressed. The data depends on nothing held in
+memory, so buttons keep working after a restart and on every replica.
+
+Every callback query goes to one handler, which finds the action by its
+code in a dict instead of trying a chain of prefix filters. Buttons
+that can no longer be decoded, or whose name has left the list, answer
+that they have expired.
+"""
+import hashlib
+import inspect
+from functools import lru_cache
+from typing import Awaitable, Callable, NamedTuple, Sequence
+
+from aiogram import Dispatcher
+from aiogram.fsm.state import State
+from aiogram.types import CallbackQuery
+
+# Telegram's limit on callback_data, in bytes
+MAX_BYTES = 64
+EXPIRED = "This button has expired. Open /menu again."
+
+_DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+def _base36(number: int) -> str:
+    if number < 0:
+        return "-" + _base36(-number)
+    text = ""
+    while True:
+        number, digit = divmod(number, 36)
+        text = _DIGITS[digit] + text
+        if not number:
+            return text
+
+# Length of a choice's hash, in base-36 digits
+DIGEST_DIGITS = 6
+
+@lru_cache(maxsize=4096)
+def digest(value: str) -> str:
+    """Short hash of a choice, the same in every process."""
+    number = int.from_bytes(hashlib.sha1(value.encode()).digest()[:8], "big") % 36 ** DIGEST_DIGITS
+    return _base36(number).rjust(DIGEST_DIGITS, "0")
+
+class Choice:
+    """An argument picked from a list, such as the MCs in UserRoles.
+
+    source returns the list as it is now; a pressed button is matched
+    against it by hash.
+    """
+
+    def __init__(self, source: Callable[[], Awaitable[Sequence[str]]]):
+        self.source = source
+
+    async def resolve(self, hashed: str) -> str | None:
+        return next((choice for choice in await self.source() if digest(choice) == hashed), None)
+
+class Action:
+    """A kind of button: a unique short code and its arguments, each int or a Choice."""
+
+    _codes: dict[str, "Action"] = {}
+
+    def __init__(self, code: str, *args: type):
+        if not code or "." in code or code in Action._codes:
+            raise ValueError(f"Callback action code {code!r} is empty, contains '.', or is already taken")
+        unsupported = [arg for arg in args if arg is not int and not isinstance(arg, Choice)]
+        if unsupported:
+            raise TypeError(f"Callback action {code!r}: only int and Choice arguments are supported")
+        self.code = code
+        self.args = args
+        Action._codes[code] = self
+
+    def pack(self, *values) -> str:
+        if len(values) != len(self.args):
+            raise TypeError(f"Callback action {self.code!r} takes {len(self.args)} arguments, got {len(values)}")
+        parts = [self.code]
+        for kind, value in zip(self.args, values):
+            parts.append(digest(value) if isinstance(kind, Choice) else _base36(int(value)))
+        data = ".".join(parts)
+        if len(data.encode()) > MAX_BYTES:
+            raise ValueError(f"callback_data for {self.code!r} is longer than {MAX_BYTES} bytes")
+        return data
+
+    def unpack(self, payload: str) -> tuple | None:
+        """Arguments packed after the code, or None when they cannot be decoded.
+
+        Choices stay hashed; resolve looks them up.
+        """
+        parts = payload.split(".") if payload else []
+        if len(parts) != len(self.args):
+            return None
+        values = []
+        for kind, part in zip(self.args, parts):
+            if isinstance(kind, Choice):
+                if len(part) != DIGEST_DIGITS:
+                    return None
+                values.append(part)
+                continue
+            try:
+                values.append(int(part, 36))
+            except ValueError:
+                return None
+        return tuple(values)
+
+    async def resolve(self, values: tuple) -> tuple | None:
+        """Unpacked arguments with each choice's hash replaced by its name, or None once it is gone."""
+        resolved = []
+        for kind, value in zip(self.args, values):
+            if isinstance(kind, Choice):
+                value = await kind.resolve(value)
+                if value is None:
+                    return None
+            resolved.append(value)
+        return tuple(resolved)
+
+    def __repr__(self) -> str:
+        return f"Action({self.code!r})"
+
+class Route(NamedTuple):
+    action: Action
+    callback: Callable[..., Awaitable]
+    state: State | None
+    params: frozenset[str]
+    varkw: bool
+
+class CallbackRouter:
+    """Routes every callback query of one dispatcher by its action code."""
+
+    def __init__(self):
+        self._routes: dict[str, Route] = {}
+
+    def on(self, action: Action, state: State | None = None):
+        """Handle an action, optionally only while the user's FSM is in the given state.
+
+        The handler is called with the callback query, the decoded
+        arguments in order, and whichever of aiogram's keyword arguments
+        (state, bot, ...) its signature names.
+        """
+        def decorator(callback):
+            if action.code in self._routes:
+                raise ValueError(f"Callback action {action.code!r} already has a handler")
+            spec = inspect.getfullargspec(callback)
+            self._routes[action.code] = Route(action, callback, state,
+                                              frozenset(spec.args + spec.kwonlyargs), spec.varkw is not None)
+            return callback
+        return decorator
+
+    def route(self, data: str | None) -> tuple[Route, tuple] | None:
+        code, _, payload = (data or "").partition(".")
+        route = self._routes.get(code)
+        if route is None:
+            return None
+        args = route.action.unpack(payload)
+        return (route, args) if args is not None else None
+
+    def route_name(self, cb: CallbackQuery) -> str:
+        """Name of the function handling a callback query, for metrics and tracing."""
+        found = self.route(cb.data)
+        return found[0].callback.__name__ if found else "unknown_callback"
+
+    async def dispatch(self, cb: CallbackQuery, **data):
+        found = self.route(cb.data)
+        if found is None:
+            await cb.answer(EXPIRED, show_alert=True)
+            return None
+        route, args = found
+        if route.state is not None:
+            context = data.get("state")
+            if context is None or await context.get_state() != route.state.state:
+                await cb.answer(EXPIRED, show_alert=True)
+                return None
+        args = await route.action.resolve(args)
+        if args is None:
+            await cb.answer(EXPIRED, show_alert=True)
+            return None
+        kwargs = data if route.varkw else {key: value for key, value in data.items() if key in route.params}
+        return await route.callback(cb, *args, **kwargs)
+
+def router(dp: Dispatcher) -> CallbackRouter:
+    """The dispatcher's callback router, registered as its only callback query handler on first use."""
+    found = dp.workflow_data.get("callback_router")
+    if found is None:
+        found = dp.workflow_data["callback_router"] = CallbackRouter()
+        dp.callback_query.register(found.dispatch)
+    return found
@@ -0,0 +1,151 @@
+import asyncio
+from datetime import timedelta
+from aiogram import Bot, Dispatcher, types
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.state import State, StatesGroup
+from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+from zoom_impact_bot import callbacks, repos
+from zoom_impact_bot.broadcast import broadcaster
+from zoom_impact_bot.commands.events import next_event_card
+from zoom_impact_bot.callbacks import Action
+from zoom_impact_bot.commands.utils import ANNOUNCE, SESSION_EXPIRED, Wizard, roles_for
+from zoom_impact_bot.reminders import describe
+
+class AnnounceStates(StatesGroup):
+    waiting_for_text = State()
+
+ANNOUNCE_NEXT = Action("announce_next")
+ANNOUNCE_WRITE = Action("announce_write")
+ANNOUNCE_SEND = Action("announce_send")
+ANNOUNCE_CANCEL = Action("announce_cancel")
+
+WIZARD = Wizard("announce")
+
+# Keep a reference so running broadcasts are not garbage collected mid-flight
+_broadcasts: set[asyncio.Task] = set()
+
+def _confirm_keyboard() -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text="📣 Send", callback_data=ANNOUNCE_SEND.pack()),
+         InlineKeyboardButton(text="❌ Cancel", callback_data=ANNOUNCE_CANCEL.pack())]
+    ])
+
+async def _broadcast(bot: Bot, admin_chat_id: int, chat_ids: list[int], data: dict) -> None:
+    """Send the announcement to every recipient, then report back to the admin."""
+    if "text" in data:
+        async def send(chat_id: int):
+            return await bot.send_message(chat_id, data["text"], parse_mode="HTML")
+    else:
+        # Copying keeps the admin's formatting, photos and files as they were sent
+        async def send(chat_id: int):
+            return await bot.copy_message(chat_id, data["from_chat_id"], data["message_id"])
+
+    try:
+        report = await broadcaster.run(chat_ids, send)
+        print(f"Announcement from {admin_chat_id}: {dict(report.counts())} in {report.seconds:.1f}s")
+        await bot.send_message(admin_chat_id, report.summary(), parse_mode="HTML")
+    except Exception as e:
+        print(f"Error broadcasting announcement: {e}")
+        await bot.send_message(admin_chat_id, f"❌ <b>Announcement failed:</b> {str(e)}", parse_mode="HTML")
+
+def reminder_sender(bot: Bot):
+    """Send reminders as the event card to everyone in UserRoles, through the broadcaster."""
+    async def notify(event: dict, lead: timedelta) -> None:
+        text = f"⏰ <b>Starts in {describe(lead)}</b>\n\n{next_event_card(event)}"
+
+        async def send(chat_id: int):
+            return await bot.send_message(chat_id, text, parse_mode="HTML")
+
+        report = await broadcaster.run(await repos.roles.users(), send)
+        print(f"{describe(lead)} reminder for {event.get('type')} on {event.get('date')}: "
+              f"{dict(report.counts())} in {report.seconds:.1f}s")
+    return notify
+
+def register(dp: Dispatcher):
+    router = callbacks.router(dp)
+
+    @router.on(ANNOUNCE)
+    async def start_announce(cb: types.CallbackQuery, state: FSMContext):
+        """Ask the admin what to announce."""
+        if "Admin" not in await roles_for(cb.from_user.id):
+            await cb.answer("Only admins can send announcements.", show_alert=True)
+            return
+
+        await WIZARD.start(state)
+        await cb.message.answer("📣 <b>Announce</b>\n\n"
+                                "What do you want to send to everyone in UserRoles?",
+                                reply_markup=InlineKeyboardMarkup(inline_keyboard=[
+                                    [InlineKeyboardButton(text="📅 Next Event", callback_data=ANNOUNCE_NEXT.pack())],
+                                    [InlineKeyboardButton(text="✏️ Write a Message", callback_data=ANNOUNCE_WRITE.pack())],
+                                    [InlineKeyboardButton(text="❌ Cancel", callback_data=ANNOUNCE_CANCEL.pack())]
+                                ]), parse_mode="HTML")
+        await cb.answer()
+
+    @router.on(ANNOUNCE_NEXT)
+    async def announce_next_event(cb: types.CallbackQuery, state: FSMContext):
+        """Preview the next event card for sending."""
+        event = await repos.events.next_event()
+        if not event:
+            await cb.message.answer("⚠️ <b>No upcoming events scheduled.</b>", parse_mode="HTML")
+            await cb.answer()
+            return
+
+        text = next_event_card(event)
+        await WIZARD.start(state, text=text)
+        recipients = await repos.roles.users()
+        await cb.message.answer(f"{text}\n\n<i>Send this to {len(recipients)} users?</i>",
+                                reply_markup=_confirm_keyboard(), parse_mode="HTML")
+        await cb.answer()
+
+    @router.on(ANNOUNCE_WRITE)
+    async def announce_write(cb: types.CallbackQuery, state: FSMContext):
+        """Ask for the announcement message."""
+        await WIZARD.start(state)
+        await state.set_state(AnnounceStates.waiting_for_text)
+        await cb.message.answer("✏️ Send the announcement as your next message. "
+                                "Formatting, photos and files are sent as they are.")
+        await cb.answer()
+
+    @dp.message(AnnounceStates.waiting_for_text)
+    async def announce_message(m: types.Message, state: FSMContext):
+        """Keep the admin's message and ask for confirmation."""
+        await WIZARD.start(state, from_chat_id=m.chat.id, message_id=m.message_id)
+        recipients = await repos.roles.users()
+        await m.answer(f"📣 Send this message to {len(recipients)} users?",
+                       reply_markup=_confirm_keyboard(), reply_to_message_id=m.message_id)
+
+    @router.on(ANNOUNCE_SEND)
+    async def announce_send(cb: types.CallbackQuery, state: FSMContext, bot: Bot):
+        """Start the broadcast in the background and report when it is done."""
+        if "Admin" not in await roles_for(cb.from_user.id):
+            await cb.answer("Only admins can send announcements.", show_alert=True)
+            return
+
+        data = await WIZARD.data(cb, state)
+        if data is None:
+            return
+        if "text" not in data and "message_id" not in data:
+            # A Send button from an earlier announcement, after Announce was opened again
+            await cb.answer(SESSION_EXPIRED, show_alert=True)
+            return
+        await state.clear()
+
+        recipients = await repos.roles.users()
+        if not recipients:
+            await cb.message.answer("❌ <b>No recipients found!</b>\n\nAdd user IDs to the 'UserRoles' sheet first.",
+                                    parse_mode="HTML")
+            await cb.answer()
+            return
+
+        task = asyncio.create_task(_broadcast(bot, cb.message.chat.id, recipients, data))
+        _broadcasts.add(task)
+        task.add_done_callback(_broadcasts.discard)
+        await cb.message.answer(f"📣 Sending to {len(recipients)} users… You will get a report when it is done.")
+        await cb.answer()
+
+    @router.on(ANNOUNCE_CANCEL)
+    async def announce_cancel(cb: types.CallbackQuery, state: FSMContext):
+        """Cancel the announcement."""
+        await state.clear()
+        await cb.message.answer("❌ <b>Announcement cancelled.</b>", parse_mode="HTML")
+        await cb.answer()
@@ -1,8 +1,12 @@
-from aiogram import Dispatcher, types, F
+from aiogram import Dispatcher, types
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-from zoom_impact_bot import sheets
+from zoom_impact_bot import callbacks, repos
+from zoom_impact_bot.callbacks import Action, Choice
+from zoom_impact_bot.keyboards import picker, toggles
+from zoom_impact_bot.rows import Choices
+from zoom_impact_bot.commands.utils import ASSIGN_IMPACT, ASSIGN_MC, ASSIGN_PRESENTER, SAVE_EVENT, Wizard
 from datetime import datetime, date
 from zoneinfo import ZoneInfo
 import re
@@ -26,31 +30,66 @@ class AssignmentStates(StatesGroup):
     waiting_for_presenter_assignment = State()
     waiting_for_impact_assignment = State()
 
-# In-memory storage for wizard state
-wizard_data = {}
-assignment_data = {}
+# Lists the pickers offer, read again when a button is pressed
+async def _event_types() -> Choices:
+    return await repos.reference.event_types()
+
+async def _mcs() -> Choices:
+    return (await repos.roles.assignable())[0]
+
+async def _presenters() -> Choices:
+    return (await repos.roles.assignable())[1]
+
+async def _impacts() -> Choices:
+    return (await repos.roles.assignable())[2]
+
+# Buttons of the Save Event wizard
+PICK_EVENT_TYPE = Action("et", Choice(_event_types))
+PICK_MC = Action("mc", Choice(_mcs))
+PICK_PRESENTER = Action("pr", Choice(_presenters))
+TOGGLE_IMPACT = Action("ti", Choice(_impacts))
+SAVE_EVENT_FINAL = Action("save_event_final")
+CANCEL_SAVE_EVENT = Action("cancel_save_event")
+
+# Buttons of the assignment flows; events are referred to by their row
+MC_EVENT = Action("ame", int)
+ASSIGN_MC_TO = Action("am", Choice(_mcs))
+PRESENTER_EVENT = Action("ape", int)
+ASSIGN_PRESENTER_TO = Action("ap", Choice(_presenters))
+IMPACT_EVENT = Action("aie", int)
+TOGGLE_ASSIGN_IMPACT = Action("tai", Choice(_impacts))
+SAVE_IMPACT_ASSIGNMENT = Action("save_impact_assignment")
+CANCEL_ASSIGNMENT = Action("cancel_assignment")
+
+# Rows below the pickers
+SAVE_EVENT_CANCEL = ((("❌ Cancel", CANCEL_SAVE_EVENT.pack()),),)
+SAVE_EVENT_DONE = ((("💾 Save Event", SAVE_EVENT_FINAL.pack()),),) + SAVE_EVENT_CANCEL
+ASSIGNMENT_CANCEL = ((("❌ Cancel", CANCEL_ASSIGNMENT.pack()),),)
+ASSIGNMENT_DONE = ((("💾 Save Assignment", SAVE_IMPACT_ASSIGNMENT.pack()),),) + ASSIGNMENT_CANCEL
+
+SAVE_EVENT_WIZARD = Wizard("save_event")
+ASSIGN_MC_WIZARD = Wizard("assign_mc")
+ASSIGN_PRESENTER_WIZARD = Wizard("assign_presenter")
+ASSIGN_IMPACT_WIZARD = Wizard("assign_impact")
 
 def register(dp: Dispatcher):
+    router = callbacks.router(dp)
+
     # Save Event wizard handlers
-    @dp.callback_query(F.data == "saveevent")
+    @router.on(SAVE_EVENT)
     async def start_save_event(cb: types.CallbackQuery, state: FSMContext):
         """Start the Save Event wizard."""
         try:
-            event_types = sheets.get_event_types()
+            event_types = await repos.reference.event_types()
             if not event_types:
                 await cb.message.answer("❌ <b>No event types found!</b>\n\nPlease add event types to the 'EventTypes' sheet in column A first.", parse_mode="HTML")
                 await cb.answer()
                 return
             
-            # Create inline keyboard for event types
-            buttons = []
-            for event_type in event_types:
-                buttons.append([InlineKeyboardButton(text=event_type, callback_data=f"event_type_{event_type}")])
-            
-            buttons.append([InlineKeyboardButton(text="❌ Cancel", callback_data="cancel_save_event")])
-            
+            await SAVE_EVENT_WIZARD.start(state)
             await cb.message.answer("📝 <b>Save Event</b>\n\n<b>Step 1/7:</b> Select event type:", 
-                                  reply_markup=InlineKeyboardMarkup(inline_keyboard=buttons), 
+                                  reply_markup=picker("event_types", PICK_EVENT_TYPE, event_types,
+                                                      footer=SAVE_EVENT_CANCEL), 
                                   parse_mode="HTML")
             await state.set_state(SaveEventStates.waiting_for_type)
             await cb.answer()
@@ -62,11 +101,12 @@ def register(dp: Dispatcher):
             await cb.message.answer(f"❌ <b>Error starting Save Event:</b> {str(e)}", parse_mode="HTML")
             await cb.answer()
 
-    @dp.callback_query(F.data.startswith("event_type_"))
-    async def select_event_type(cb: types.CallbackQuery, state: FSMContext):
+    @router.on(PICK_EVENT_TYPE)
+    async def select_event_type(cb: types.CallbackQuery, event_type: str, state: FSMContext):
         """Handle event type selection."""
-        event_type = cb.data.replace("event_type_", "")
-        wizard_data[cb.from_user.id] = {"type": event_type}
+        if await SAVE_EVENT_WIZARD.data(cb, state) is None:
+            return
+        await state.update_data(type=event_type)
         
         await cb.message.answer("📅 <b>Step 2/7:</b> Enter event date (YYYY-MM-DD):\n\nExample: 2024-01-15", parse_mode="HTML")
         await state.set_state(SaveEventStates.waiting_for_date)
@@ -78,7 +118,7 @@ def register(dp: Dispatcher):
         try:
             # Validate date format
             date_obj = datetime.strptime(m.text.strip(), "%Y-%m-%d").date()
-            wizard_data[m.from_user.id]["date"] = m.text.strip()
+            await state.update_data(date=m.text.strip())
             
             await m.answer("🕐 <b>Step 3/7:</b> Enter event time (HH:MM):\n\nExample: 20:30", parse_mode="HTML")
             await state.set_state(SaveEventStates.waiting_for_time)
@@ -92,7 +132,7 @@ def register(dp: Dispatcher):
         try:
             # Validate time format
             time_obj = datetime.strptime(m.text.strip(), "%H:%M").time()
-            wizard_data[m.from_user.id]["time"] = m.text.strip()
+            await state.update_data(time=m.text.strip())
             
             await m.answer("🔗 <b>Step 4/7:</b> Enter Zoom link (must start with http):\n\nExample: https://zoom.us/j/123456789", parse_mode="HTML")
             await state.set_state(SaveEventStates.waiting_for_zoom)
@@ -108,51 +148,41 @@ def register(dp: Dispatcher):
             await m.answer("❌ <b>Invalid Zoom link!</b>\n\nLink must start with 'http'.\nExample: https://zoom.us/j/123456789", parse_mode="HTML")
             return
         
-        wizard_data[m.from_user.id]["zoom_link"] = zoom_link
+        await state.update_data(zoom_link=zoom_link)
         
         # Get MCs for selection
         try:
-            mcs, _, _ = sheets.get_user_roles()
+            mcs, _, _ = await repos.roles.assignable()
             if not mcs:
                 await m.answer("❌ <b>No MCs found!</b>\n\nPlease add MCs to the 'UserRoles' sheet in column B first.", parse_mode="HTML")
                 return
             
-            buttons = []
-            for mc in mcs:
-                buttons.append([InlineKeyboardButton(text=mc, callback_data=f"mc_{mc}")])
-            
-            buttons.append([InlineKeyboardButton(text="❌ Cancel", callback_data="cancel_save_event")])
-            
             await m.answer("🎙 <b>Step 5/7:</b> Select MC:", 
-                          reply_markup=InlineKeyboardMarkup(inline_keyboard=buttons), 
+                          reply_markup=picker("mcs", PICK_MC, mcs, footer=SAVE_EVENT_CANCEL), 
                           parse_mode="HTML")
             await state.set_state(SaveEventStates.waiting_for_mc)
             
         except Exception as e:
             await m.answer(f"❌ <b>Error getting MCs:</b> {str(e)}", parse_mode="HTML")
 
-    @dp.callback_query(F.data.startswith("mc_"))
-    async def select_mc(cb: types.CallbackQuery, state: FSMContext):
+    @router.on(PICK_MC)
+    async def select_mc(cb: types.CallbackQuery, mc: str, state: FSMContext):
         """Handle MC selection."""
-        mc = cb.data.replace("mc_", "")
-        wizard_data[cb.from_user.id]["mc"] = mc
+        if await SAVE_EVENT_WIZARD.data(cb, state) is None:
+            return
+        await state.update_data(mc=mc)
         
         # Get Presenters for selection
         try:
-            _, presenters, _ = sheets.get_user_roles()
+            _, presenters, _ = await repos.roles.assignable()
             if not presenters:
                 await cb.message.answer("❌ <b>No Presenters found!</b>\n\nPlease add Presenters to the 'UserRoles' sheet in column C first.", parse_mode="HTML")
                 await cb.answer()
                 return
             
-            buttons = []
-            for presenter in presenters:
-                buttons.append([InlineKeyboardButton(text=presenter, callback_data=f"presenter_{presenter}")])
-            
-            buttons.append([InlineKeyboardButton(text="❌ Cancel", callback_data="cancel_save_event")])
-            
             await cb.message.answer("🧑‍🏫 <b>Step 6/7:</b> Select Presenter:", 
-                                  reply_markup=InlineKeyboardMarkup(inline_keyboard=buttons), 
+                                  reply_markup=picker("presenters", PICK_PRESENTER, presenters,
+                                                      footer=SAVE_EVENT_CANCEL), 
                                   parse_mode="HTML")
             await state.set_state(SaveEventStates.waiting_for_presenter)
             await cb.answer()
@@ -161,32 +191,27 @@ def register(dp: Dispatcher):
             await cb.message.answer(f"❌ <b>Error getting Presenters:</b> {str(e)}", parse_mode="HTML")
             await cb.answer()
 
-    @dp.callback_query(F.data.startswith("presenter_"))
-    async def select_presenter(cb: types.CallbackQuery, state: FSMContext):
+    @router.on(PICK_PRESENTER)
+    async def select_presenter(cb: types.CallbackQuery, presenter: str, state: FSMContext):
         """Handle Presenter selection."""
-        presenter = cb.data.replace("presenter_", "")
-        wizard_data[cb.from_user.id]["presenter"] = presenter
+        if await SAVE_EVENT_WIZARD.data(cb, state) is None:
+            return
+        await state.update_data(presenter=presenter)
         
         # Get Impact Speakers for multi-select
         try:
-            _, _, impacts = sheets.get_user_roles()
+            _, _, impacts = await repos.roles.assignable()
             if not impacts:
                 await cb.message.answer("❌ <b>No Impact Speakers found!</b>\n\nPlease add Impact Speakers to the 'UserRoles' sheet in column D first.", parse_mode="HTML")
                 await cb.answer()
                 return
             
             # Initialize selected impacts
-            wizard_data[cb.from_user.id]["selected_impacts"] = []
-            
-            buttons = []
-            for impact in impacts:
-                buttons.append([InlineKeyboardButton(text=f"☐ {impact}", callback_data=f"toggle_impact_{impact}")])
-            
-            buttons.append([InlineKeyboardButton(text="💾 Save Event", callback_data="save_event_final")])
-            buttons.append([InlineKeyboardButton(text="❌ Cancel", callback_data="cancel_save_event")])
+            await state.update_data(selected_impacts=[])
             
             await cb.message.answer("✨ <b>Step 7/7:</b> Select Impact Speaker(s) (multi-select):\n\nClick to toggle selection, then click 'Save Event'", 
-                                  reply_markup=InlineKeyboardMarkup(inline_keyboard=buttons), 
+                                  reply_markup=toggles("impacts", TOGGLE_IMPACT, impacts, [],
+                                                       footer=SAVE_EVENT_DONE), 
                                   parse_mode="HTML")
             await state.set_state(SaveEventStates.waiting_for_impacts)
             await cb.answer()
@@ -195,75 +220,54 @@ def register(dp: Dispatcher):
             await cb.message.answer(f"❌ <b>Error getting Impact Speakers:</b> {str(e)}", parse_mode="HTML")
             await cb.answer()
 
-    @dp.callback_query(F.data.startswith("toggle_impact_"))
-    async def toggle_impact(cb: types.CallbackQuery, state: FSMContext):
+    @router.on(TOGGLE_IMPACT)
+    async def toggle_impact(cb: types.CallbackQuery, impact: str, state: FSMContext):
         """Toggle impact speaker selection."""
-        impact = cb.data.replace("toggle_impact_", "")
-        user_id = cb.from_user.id
-        
-        if user_id not in wizard_data:
-            await cb.answer("❌ Session expired. Please start over.")
+        data = await SAVE_EVENT_WIZARD.data(cb, state)
+        if data is None:
             return
         
-        if "selected_impacts" not in wizard_data[user_id]:
-            wizard_data[user_id]["selected_impacts"] = []
-        
-        selected_impacts = wizard_data[user_id]["selected_impacts"]
+        selected_impacts = list(data.get("selected_impacts", []))
         
         if impact in selected_impacts:
             selected_impacts.remove(impact)
         else:
             selected_impacts.append(impact)
+        await state.update_data(selected_impacts=selected_impacts)
         
         # Update the keyboard
         try:
-            _, _, impacts = sheets.get_user_roles()
-            buttons = []
-            for imp in impacts:
-                prefix = "☑" if imp in selected_impacts else "☐"
-                buttons.append([InlineKeyboardButton(text=f"{prefix} {imp}", callback_data=f"toggle_impact_{imp}")])
-            
-            buttons.append([InlineKeyboardButton(text="💾 Save Event", callback_data="save_event_final")])
-            buttons.append([InlineKeyboardButton(text="❌ Cancel", callback_data="cancel_save_event")])
-            
-            await cb.message.edit_reply_markup(reply_markup=InlineKeyboardMarkup(inline_keyboard=buttons))
+            _, _, impacts = await repos.roles.assignable()
+            await cb.message.edit_reply_markup(reply_markup=toggles("impacts", TOGGLE_IMPACT, impacts, selected_impacts,
+                                                                    footer=SAVE_EVENT_DONE))
             await cb.answer()
             
         except Exception as e:
             await cb.answer(f"❌ Error updating selection: {str(e)}")
 
-    @dp.callback_query(F.data == "save_event_final")
+    @router.on(SAVE_EVENT_FINAL)
     async def save_event_final(cb: types.CallbackQuery, state: FSMContext):
         """Save the event to the sheet."""
-        user_id = cb.from_user.id
-        
-        if user_id not in wizard_data:
-            await cb.answer("❌ Session expired. Please start over.")
+        data = await SAVE_EVENT_WIZARD.data(cb, state, "type", "date", "time", "zoom_link", "mc", "presenter")
+        if data is None:
             return
         
-        data = wizard_data[user_id]
-        
         try:
             # Append row to Events sheet
-            ws = sheets.get_ws("Events")
-            impact_str = ", ".join(data.get("selected_impacts", []))
+            selected_impacts = data.get("selected_impacts", [])
+            impact_str = ", ".join(selected_impacts)
             
-            row_data = [
+            await repos.events.add(
                 data["type"],
                 data["date"],
                 data["time"],
                 data["zoom_link"],
                 data["mc"],
                 data["presenter"],
-                impact_str,
-                "Scheduled",  # status
-                ""  # notes
-            ]
-            
-            ws.append_row(row_data)
+                selected_impacts
+            )
             
             # Clean up
-            del wizard_data[user_id]
             await state.clear()
             
             await cb.message.answer("✅ <b>Event saved successfully!</b>\n\n"
@@ -279,23 +283,19 @@ def register(dp: Dispatcher):
             await cb.message.answer(f"❌ <b>Error saving event:</b> {str(e)}", parse_mode="HTML")
             await cb.answer()
 
-    @dp.callback_query(F.data == "cancel_save_event")
+    @router.on(CANCEL_SAVE_EVENT)
     async def cancel_save_event(cb: types.CallbackQuery, state: FSMContext):
         """Cancel the Save Event wizard."""
-        user_id = cb.from_user.id
-        if user_id in wizard_data:
-            del wizard_data[user_id]
-        
         await state.clear()
         await cb.message.answer("❌ Save Event cancelled.", parse_mode="HTML")
         await cb.answer()
 
     # Assignment handlers
-    @dp.callback_query(F.data == "assignmc")
+    @router.on(ASSIGN_MC)
     async def start_assign_mc(cb: types.CallbackQuery, state: FSMContext):
         """Start MC assignment flow."""
         try:
-            events = sheets.list_upcoming_events(14)  # Next 14 days
+            events = await repos.events.upcoming(14)  # Next 14 days
             if not events:
                 await cb.message.answer("⚠️ <b>No upcoming events found!</b>\n\nNo events scheduled in the next 14 days.", parse_mode="HTML")
                 await cb.answer()
@@ -304,42 +304,37 @@ def register(dp: Dispatcher):
             buttons = []
             for row_idx, event in events:
                 event_text = f"{event['date']} {event['time']} — {event['type']}"
-                buttons.append([InlineKeyboardButton(text=event_text, callback_data=f"assign_mc_event_{row_idx}")])
+                buttons.append([InlineKeyboardButton(text=event_text, callback_data=MC_EVENT.pack(row_idx))])
             
-            buttons.append([InlineKeyboardButton(text="❌ Cancel", callback_data="cancel_assignment")])
+            buttons.append([InlineKeyboardButton(text="❌ Cancel", callback_data=CANCEL_ASSIGNMENT.pack())])
             
             await cb.message.answer("🎙 <b>Assign MC</b>\n\nSelect an event to assign MC:", 
                                   reply_markup=InlineKeyboardMarkup(inline_keyboard=buttons), 
                                   parse_mode="HTML")
+            await ASSIGN_MC_WIZARD.start(state)
             await state.set_state(AssignmentStates.waiting_for_event_selection)
-            assignment_data[cb.from_user.id] = {"type": "mc"}
             await cb.answer()
             
         except Exception as e:
             await cb.message.answer(f"❌ <b>Error:</b> {str(e)}", parse_mode="HTML")
             await cb.answer()
 
-    @dp.callback_query(F.data.startswith("assign_mc_event_"))
-    async def select_event_for_mc_assignment(cb: types.CallbackQuery, state: FSMContext):
+    @router.on(MC_EVENT)
+    async def select_event_for_mc_assignment(cb: types.CallbackQuery, row_idx: int, state: FSMContext):
         """Handle event selection for MC assignment."""
-        row_idx = int(cb.data.replace("assign_mc_event_", ""))
-        assignment_data[cb.from_user.id]["event_row"] = row_idx
+        if await ASSIGN_MC_WIZARD.data(cb, state) is None:
+            return
+        await state.update_data(event_row=row_idx)
         
         try:
-            mcs, _, _ = sheets.get_user_roles()
+            mcs, _, _ = await repos.roles.assignable()
             if not mcs:
                 await cb.message.answer("❌ <b>No MCs found!</b>\n\nPlease add MCs to the 'UserRoles' sheet in column B first.", parse_mode="HTML")
                 await cb.answer()
                 return
             
-            buttons = []
-            for mc in mcs:
-                buttons.append([InlineKeyboardButton(text=mc, callback_data=f"assign_mc_{mc}")])
-            
-            buttons.append([InlineKeyboardButton(text="❌ Cancel", callback_data="cancel_assignment")])
-            
             await cb.message.answer("🎙 <b>Select MC:</b>", 
-                                  reply_markup=InlineKeyboardMarkup(inline_keyboard=buttons), 
+                                  reply_markup=picker("assign_mcs", ASSIGN_MC_TO, mcs, footer=ASSIGNMENT_CANCEL), 
                                   parse_mode="HTML")
             await state.set_state(AssignmentStates.waiting_for_mc_assignment)
             await cb.answer()
@@ -348,22 +343,18 @@ def register(dp: Dispatcher):
             await cb.message.answer(f"❌ <b>Error getting MCs:</b> {str(e)}", parse_mode="HTML")
             await cb.answer()
 
-    @dp.callback_query(F.data.startswith("assign_mc_"))
-    async def assign_mc_final(cb: types.CallbackQuery, state: FSMContext):
+    @router.on(ASSIGN_MC_TO)
+    async def assign_mc_final(cb: types.CallbackQuery, mc: str, state: FSMContext):
         """Finalize MC assignment."""
-        mc = cb.data.replace("assign_mc_", "")
-        user_id = cb.from_user.id
-        
-        if user_id not in assignment_data:
-            await cb.answer("❌ Session expired. Please start over.")
+        data = await ASSIGN_MC_WIZARD.data(cb, state, "event_row")
+        if data is None:
             return
         
         try:
-            row_idx = assignment_data[user_id]["event_row"]
-            sheets.update_event_roles(row_idx, mc=mc)
+            row_idx = data["event_row"]
+            await repos.events.update_roles(row_idx, mc=mc)
             
             # Clean up
-            del assignment_data[user_id]
             await state.clear()
             
             await cb.message.answer(f"✅ <b>MC assigned successfully!</b>\n\n<b>MC:</b> {mc}", parse_mode="HTML")
@@ -376,11 +367,11 @@ def register(dp: Dispatcher):
     # Similar handlers for Presenter and Impact assignments would follow the same pattern
     # For brevity, I'll implement the key ones and mention the pattern
 
-    @dp.callback_query(F.data == "assignpresenter")
+    @router.on(ASSIGN_PRESENTER)
     async def start_assign_presenter(cb: types.CallbackQuery, state: FSMContext):
         """Start Presenter assignment flow."""
         try:
-            events = sheets.list_upcoming_events(14)
+            events = await repos.events.upcoming(14)
             if not events:
                 await cb.message.answer("⚠️ <b>No upcoming events found!</b>\n\nNo events scheduled in the next 14 days.", parse_mode="HTML")
                 await cb.answer()
@@ -389,26 +380,26 @@ def register(dp: Dispatcher):
             buttons = []
             for row_idx, event in events:
                 event_text = f"{event['date']} {event['time']} — {event['type']}"
-                buttons.append([InlineKeyboardButton(text=event_text, callback_data=f"assign_presenter_event_{row_idx}")])
+                buttons.append([InlineKeyboardButton(text=event_text, callback_data=PRESENTER_EVENT.pack(row_idx))])
             
-            buttons.append([InlineKeyboardButton(text="❌ Cancel", callback_data="cancel_assignment")])
+            buttons.append([InlineKeyboardButton(text="❌ Cancel", callback_data=CANCEL_ASSIGNMENT.pack())])
             
             await cb.message.answer("🧑‍🏫 <b>Assign Presenter</b>\n\nSelect an event to assign Presenter:", 
                                   reply_markup=InlineKeyboardMarkup(inline_keyboard=buttons), 
                                   parse_mode="HTML")
+            await ASSIGN_PRESENTER_WIZARD.start(state)
             await state.set_state(AssignmentStates.waiting_for_event_selection)
-            assignment_data[cb.from_user.id] = {"type": "presenter"}
             await cb.answer()
             
         except Exception as e:
             await cb.message.answer(f"❌ <b>Error:</b> {str(e)}", parse_mode="HTML")
             await cb.answer()
 
-    @dp.callback_query(F.data == "assignimpact")
+    @router.on(ASSIGN_IMPACT)
     async def start_assign_impact(cb: types.CallbackQuery, state: FSMContext):
         """Start Impact assignment flow."""
         try:
-            events = sheets.list_upcoming_events(14)
+            events = await repos.events.upcoming(14)
             if not events:
                 await cb.message.answer("⚠️ <b>No upcoming events found!</b>\n\nNo events scheduled in the next 14 days.", parse_mode="HTML")
                 await cb.answer()
@@ -417,15 +408,15 @@ def register(dp: Dispatcher):
             buttons = []
             for row_idx, event in events:
                 event_text = f"{event['date']} {event['time']} — {event['type']}"
-                buttons.append([InlineKeyboardButton(text=event_text, callback_data=f"assign_impact_event_{row_idx}")])
+                buttons.append([InlineKeyboardButton(text=event_text, callback_data=IMPACT_EVENT.pack(row_idx))])
             
-            buttons.append([InlineKeyboardButton(text="❌ Cancel", callback_data="cancel_assignment")])
+            buttons.append([InlineKeyboardButton(text="❌ Cancel", callback_data=CANCEL_ASSIGNMENT.pack())])
             
             await cb.message.answer("✨ <b>Assign Impact Speaker(s)</b>\n\nSelect an event to assign Impact Speaker(s):", 
                                   reply_markup=InlineKeyboardMarkup(inline_keyboard=buttons), 
                                   parse_mode="HTML")
+            await ASSIGN_IMPACT_WIZARD.start(state)
             await state.set_state(AssignmentStates.waiting_for_event_selection)
-            assignment_data[cb.from_user.id] = {"type": "impact"}
             await cb.answer()
             
         except Exception as e:
@@ -433,27 +424,23 @@ def register(dp: Dispatcher):
             await cb.answer()
 
     # Presenter assignment handlers
-    @dp.callback_query(F.data.startswith("assign_presenter_event_"))
-    async def select_event_for_presenter_assignment(cb: types.CallbackQuery, state: FSMContext):
+    @router.on(PRESENTER_EVENT)
+    async def select_event_for_presenter_assignment(cb: types.CallbackQuery, row_idx: int, state: FSMContext):
         """Handle event selection for Presenter assignment."""
-        row_idx = int(cb.data.replace("assign_presenter_event_", ""))
-        assignment_data[cb.from_user.id]["event_row"] = row_idx
+        if await ASSIGN_PRESENTER_WIZARD.data(cb, state) is None:
+            return
+        await state.update_data(event_row=row_idx)
         
         try:
-            _, presenters, _ = sheets.get_user_roles()
+            _, presenters, _ = await repos.roles.assignable()
             if not presenters:
                 await cb.message.answer("❌ <b>No Presenters found!</b>\n\nPlease add Presenters to the 'UserRoles' sheet in column C first.", parse_mode="HTML")
                 await cb.answer()
                 return
             
-            buttons = []
-            for presenter in presenters:
-                buttons.append([InlineKeyboardButton(text=presenter, callback_data=f"assign_presenter_{presenter}")])
-            
-            buttons.append([InlineKeyboardButton(text="❌ Cancel", callback_data="cancel_assignment")])
-            
             await cb.message.answer("🧑‍🏫 <b>Select Presenter:</b>", 
-                                  reply_markup=InlineKeyboardMarkup(inline_keyboard=buttons), 
+                                  reply_markup=picker("assign_presenters", ASSIGN_PRESENTER_TO, presenters,
+                                                      footer=ASSIGNMENT_CANCEL), 
                                   parse_mode="HTML")
             await state.set_state(AssignmentStates.waiting_for_presenter_assignment)
             await cb.answer()
@@ -462,22 +449,18 @@ def register(dp: Dispatcher):
             await cb.message.answer(f"❌ <b>Error getting Presenters:</b> {str(e)}", parse_mode="HTML")
             await cb.answer()
 
-    @dp.callback_query(F.data.startswith("assign_presenter_"))
-    async def assign_presenter_final(cb: types.CallbackQuery, state: FSMContext):
+    @router.on(ASSIGN_PRESENTER_TO)
+    async def assign_presenter_final(cb: types.CallbackQuery, presenter: str, state: FSMContext):
         """Finalize Presenter assignment."""
-        presenter = cb.data.replace("assign_presenter_", "")
-        user_id = cb.from_user.id
-        
-        if user_id not in assignment_data:
-            await cb.answer("❌ Session expired. Please start over.")
+        data = await ASSIGN_PRESENTER_WIZARD.data(cb, state, "event_row")
+        if data is None:
             return
         
         try:
-            row_idx = assignment_data[user_id]["event_row"]
-            sheets.update_event_roles(row_idx, presenter=presenter)
+            row_idx = data["event_row"]
+            await repos.events.update_roles(row_idx, presenter=presenter)
             
             # Clean up
-            del assignment_data[user_id]
             await state.clear()
             
             await cb.message.answer(f"✅ <b>Presenter assigned successfully!</b>\n\n<b>Presenter:</b> {presenter}", parse_mode="HTML")
@@ -488,29 +471,23 @@ def register(dp: Dispatcher):
             await cb.answer()
 
     # Impact assignment handlers
-    @dp.callback_query(F.data.startswith("assign_impact_event_"))
-    async def select_event_for_impact_assignment(cb: types.CallbackQuery, state: FSMContext):
+    @router.on(IMPACT_EVENT)
+    async def select_event_for_impact_assignment(cb: types.CallbackQuery, row_idx: int, state: FSMContext):
         """Handle event selection for Impact assignment."""
-        row_idx = int(cb.data.replace("assign_impact_event_", ""))
-        assignment_data[cb.from_user.id]["event_row"] = row_idx
-        assignment_data[cb.from_user.id]["selected_impacts"] = []
+        if await ASSIGN_IMPACT_WIZARD.data(cb, state) is None:
+            return
+        await state.update_data(event_row=row_idx, selected_impacts=[])
         
         try:
-            _, _, impacts = sheets.get_user_roles()
+            _, _, impacts = await repos.roles.assignable()
             if not impacts:
                 await cb.message.answer("❌ <b>No Impact Speakers found!</b>\n\nPlease add Impact Speakers to the 'UserRoles' sheet in column D first.", parse_mode="HTML")
                 await cb.answer()
                 return
             
-            buttons = []
-            for impact in impacts:
-                buttons.append([InlineKeyboardButton(text=f"☐ {impact}", callback_data=f"toggle_assign_impact_{impact}")])
-            
-            buttons.append([InlineKeyboardButton(text="💾 Save Assignment", callback_data="save_impact_assignment")])
-            buttons.append([InlineKeyboardButton(text="❌ Cancel", callback_data="cancel_assignment")])
-            
             await cb.message.answer("✨ <b>Select Impact Speaker(s) (multi-select):</b>\n\nClick to toggle selection, then click 'Save Assignment'", 
-                                  reply_markup=InlineKeyboardMarkup(inline_keyboard=buttons), 
+                                  reply_markup=toggles("assign_impacts", TOGGLE_ASSIGN_IMPACT, impacts, [],
+                                                       footer=ASSIGNMENT_DONE), 
                                   parse_mode="HTML")
             await state.set_state(AssignmentStates.waiting_for_impact_assignment)
             await cb.answer()
@@ -519,60 +496,45 @@ def register(dp: Dispatcher):
             await cb.message.answer(f"❌ <b>Error getting Impact Speakers:</b> {str(e)}", parse_mode="HTML")
             await cb.answer()
 
-    @dp.callback_query(F.data.startswith("toggle_assign_impact_"))
-    async def toggle_assign_impact(cb: types.CallbackQuery, state: FSMContext):
+    @router.on(TOGGLE_ASSIGN_IMPACT)
+    async def toggle_assign_impact(cb: types.CallbackQuery, impact: str, state: FSMContext):
         """Toggle impact speaker selection for assignment."""
-        impact = cb.data.replace("toggle_assign_impact_", "")
-        user_id = cb.from_user.id
-        
-        if user_id not in assignment_data:
-            await cb.answer("❌ Session expired. Please start over.")
+        data = await ASSIGN_IMPACT_WIZARD.data(cb, state, "event_row")
+        if data is None:
             return
         
-        if "selected_impacts" not in assignment_data[user_id]:
-            assignment_data[user_id]["selected_impacts"] = []
-        
-        selected_impacts = assignment_data[user_id]["selected_impacts"]
+        selected_impacts = list(data.get("selected_impacts", []))
         
         if impact in selected_impacts:
             selected_impacts.remove(impact)
         else:
             selected_impacts.append(impact)
+        await state.update_data(selected_impacts=selected_impacts)
         
         # Update the keyboard
         try:
-            _, _, impacts = sheets.get_user_roles()
-            buttons = []
-            for imp in impacts:
-                prefix = "☑" if imp in selected_impacts else "☐"
-                buttons.append([InlineKeyboardButton(text=f"{prefix} {imp}", callback_data=f"toggle_assign_impact_{imp}")])
-            
-            buttons.append([InlineKeyboardButton(text="💾 Save Assignment", callback_data="save_impact_assignment")])
-            buttons.append([InlineKeyboardButton(text="❌ Cancel", callback_data="cancel_assignment")])
-            
-            await cb.message.edit_reply_markup(reply_markup=InlineKeyboardMarkup(inline_keyboard=buttons))
+            _, _, impacts = await repos.roles.assignable()
+            await cb.message.edit_reply_markup(reply_markup=toggles("assign_impacts", TOGGLE_ASSIGN_IMPACT, impacts,
+                                                                    selected_impacts, footer=ASSIGNMENT_DONE))
             await cb.answer()
             
         except Exception as e:
             await cb.answer(f"❌ Error updating selection: {str(e)}")
 
-    @dp.callback_query(F.data == "save_impact_assignment")
+    @router.on(SAVE_IMPACT_ASSIGNMENT)
     async def save_impact_assignment_final(cb: types.CallbackQuery, state: FSMContext):
         """Finalize Impact assignment."""
-        user_id = cb.from_user.id
-        
-        if user_id not in assignment_data:
-            await cb.answer("❌ Session expired. Please start over.")
+        data = await ASSIGN_IMPACT_WIZARD.data(cb, state, "event_row")
+        if data is None:
             return
         
         try:
-            row_idx = assignment_data[user_id]["event_row"]
-            selected_impacts = assignment_data[user_id].get("selected_impacts", [])
+            row_idx = data["event_row"]
+            selected_impacts = data.get("selected_impacts", [])
             
-            sheets.update_event_roles(row_idx, impacts=selected_impacts)
+            await repos.events.update_roles(row_idx, impacts=selected_impacts)
             
             # Clean up
-            del assignment_data[user_id]
             await state.clear()
             
             impact_str = ", ".join(selected_impacts) if selected_impacts else "None"
@@ -583,13 +545,9 @@ def register(dp: Dispatcher):
             await cb.message.answer(f"❌ <b>Error assigning Impact Speaker(s):</b> {str(e)}", parse_mode="HTML")
             await cb.answer()
 
-    @dp.callback_query(F.data == "cancel_assignment")
+    @router.on(CANCEL_ASSIGNMENT)
     async def cancel_assignment(cb: types.CallbackQuery, state: FSMContext):
         """Cancel assignment flow."""
-        user_id = cb.from_user.id
-        if user_id in assignment_data:
-            del assignment_data[user_id]
-        
         await state.clear()
         await cb.message.answer("❌ Assignment cancelled.", parse_mode="HTML")
         await cb.answer()
@@ -1,42 +1,48 @@
-from aiogram import Dispatcher, types, F
-from zoom_impact_bot import sheets
+from aiogram import Dispatcher, types
+from zoom_impact_bot import callbacks, repos
+from zoom_impact_bot.commands.utils import CALENDAR, NEXT, TODAY, WEEK
 from datetime import date
 from zoneinfo import ZoneInfo
 
 TZ = ZoneInfo("Asia/Kolkata")
 
+def next_event_card(event: dict) -> str:
+    """HTML card for an event, as shown by Next Event and sent by Announce."""
+    typ = event.get("type", "Event")
+    event_date = event.get("date", "")
+    event_time = event.get("time", "")
+    zoom = event.get("zoom_link", "<no link>")
+    mc = event.get("mc", "TBD")
+    presenter = event.get("presenter", "TBD")
+    impact = event.get("impact", "TBD")
+    
+    return (f"📅 <b>Next Event</b>\n"
+            f"<b>Type:</b> {typ}\n"
+            f"<b>When:</b> {event_date} {event_time} (IST)\n"
+            f"<b>Zoom:</b> {zoom}\n\n"
+            f"🎙 <b>MC:</b> {mc}\n"
+            f"🧑‍🏫 <b>Presenter:</b> {presenter}\n"
+            f"✨ <b>Impact:</b> {impact}")
+
 def register(dp: Dispatcher):
-    @dp.callback_query(F.data == "next")
+    router = callbacks.router(dp)
+
+    @router.on(NEXT)
     async def next_event(cb: types.CallbackQuery):
         """Show the nearest upcoming event."""
-        event = sheets.get_next_event()
+        event = await repos.events.next_event()
         if not event:
             await cb.message.answer("⚠️ <b>No upcoming events scheduled.</b>", parse_mode="HTML")
         else:
-            typ = event.get("type", "Event")
-            event_date = event.get("date", "")
-            event_time = event.get("time", "")
-            zoom = event.get("zoom_link", "<no link>")
-            mc = event.get("mc", "TBD")
-            presenter = event.get("presenter", "TBD")
-            impact = event.get("impact", "TBD")
-            
-            text = (f"📅 <b>Next Event</b>\n"
-                    f"<b>Type:</b> {typ}\n"
-                    f"<b>When:</b> {event_date} {event_time} (IST)\n"
-                    f"<b>Zoom:</b> {zoom}\n\n"
-                    f"🎙 <b>MC:</b> {mc}\n"
-                    f"🧑‍🏫 <b>Presenter:</b> {presenter}\n"
-                    f"✨ <b>Impact:</b> {impact}")
-            await cb.message.answer(text, parse_mode="HTML")
+            await cb.message.answer(next_event_card(event), parse_mode="HTML")
         await cb.answer()
 
-    @dp.callback_query(F.data == "today")
+    @router.on(TODAY)
     async def today_events(cb: types.CallbackQuery):
         """Show all events for today."""
         try:
             today = date.today()
-            events = sheets.list_events_for_date(today)
+            events = await repos.events.for_date(today)
             
             if not events:
                 await cb.message.answer("No events today.", parse_mode="HTML")
@@ -60,11 +66,11 @@ def register(dp: Dispatcher):
         
         await cb.answer()
 
-    @dp.callback_query(F.data == "week")
+    @router.on(WEEK)
     async def week_view(cb: types.CallbackQuery):
         """Show events for the next 7 days."""
         try:
-            events = sheets.list_upcoming_events(7)
+            events = await repos.events.upcoming(7)
             
             if not events:
                 await cb.message.answer("⚠️ <b>No events in the next 7 days.</b>", parse_mode="HTML")
@@ -100,7 +106,7 @@ def register(dp: Dispatcher):
         
         await cb.answer()
 
-    @dp.callback_query(F.data == "calendar")
+    @router.on(CALENDAR)
     async def calendar(cb: types.CallbackQuery):
         await cb.message.answer("📅 <b>Calendar view coming soon.</b>", parse_mode="HTML")
         await cb.answer()
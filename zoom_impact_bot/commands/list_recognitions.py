@@ -1,31 +1,62 @@
-from aiogram import Dispatcher, types, F
+import time
+from collections import OrderedDict
+from html import escape
+from typing import NamedTuple
+from aiogram import Dispatcher, types
+from aiogram.exceptions import TelegramBadRequest
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-from zoom_impact_bot import sheets
+from zoom_impact_bot import callbacks, repos
+from zoom_impact_bot.callbacks import Action, Choice
+from zoom_impact_bot.commands.utils import LIST_RECS
+from zoom_impact_bot.keyboards import picker
+from zoom_impact_bot.rows import Choices
 
 class ListRecognitionStates(StatesGroup):
     waiting_for_month = State()
     waiting_for_category = State()
 
+async def _months() -> Choices:
+    return await repos.recognitions.months()
+
+async def _categories() -> Choices:
+    return await repos.reference.categories()
+
+FILTER_MONTH = Action("filter_month")
+FILTER_CATEGORY = Action("filter_category")
+SHOW_ALL = Action("show_all_recs")
+CANCEL_LIST = Action("cancel_list_recs")
+SHOW_MONTH = Action("lm", Choice(_months))
+SHOW_CATEGORY = Action("lc", Choice(_categories))
+# A page of a list: its filter, if any, and the page number. The list is
+# rendered again when it is not cached, so page buttons survive a restart.
+FLIP_ALL = Action("rpa", int)
+FLIP_MONTH = Action("rpm", Choice(_months), int)
+FLIP_CATEGORY = Action("rpc", Choice(_categories), int)
+
+CANCEL_ROW = ((("❌ Cancel", CANCEL_LIST.pack()),),)
+
 def register(dp: Dispatcher):
-    @dp.callback_query(F.data == "list_recs")
+    router = callbacks.router(dp)
+
+    @router.on(LIST_RECS)
     async def start_list_recognitions(cb: types.CallbackQuery, state: FSMContext):
         """Start the list recognitions flow."""
         await cb.message.answer("📋 <b>List Recognitions</b>\n\n"
                               "Choose how you want to filter the recognitions:",
                               reply_markup=InlineKeyboardMarkup(inline_keyboard=[
-                                  [InlineKeyboardButton(text="📅 Filter by Month", callback_data="filter_month")],
-                                  [InlineKeyboardButton(text="🏆 Filter by Category", callback_data="filter_category")],
-                                  [InlineKeyboardButton(text="📋 Show All", callback_data="show_all_recs")],
-                                  [InlineKeyboardButton(text="❌ Cancel", callback_data="cancel_list_recs")]
+                                  [InlineKeyboardButton(text="📅 Filter by Month", callback_data=FILTER_MONTH.pack())],
+                                  [InlineKeyboardButton(text="🏆 Filter by Category", callback_data=FILTER_CATEGORY.pack())],
+                                  [InlineKeyboardButton(text="📋 Show All", callback_data=SHOW_ALL.pack())],
+                                  [InlineKeyboardButton(text="❌ Cancel", callback_data=CANCEL_LIST.pack())]
                               ]), parse_mode="HTML")
         await cb.answer()
 
-    @dp.callback_query(F.data == "filter_month")
+    @router.on(FILTER_MONTH)
     async def filter_by_month(cb: types.CallbackQuery, state: FSMContext):
         """Show month selection for filtering."""
-        months = sheets.get_available_months()
+        months = await repos.recognitions.months()
         
         if not months:
             await cb.message.answer("❌ <b>No recognitions found!</b>\n\n"
@@ -33,29 +64,15 @@ def register(dp: Dispatcher):
             await cb.answer()
             return
         
-        # Create month selection keyboard
-        keyboard = []
-        for i in range(0, len(months), 2):
-            row = []
-            for j in range(2):
-                if i + j < len(months):
-                    month = months[i + j]
-                    row.append(InlineKeyboardButton(
-                        text=month,
-                        callback_data=f"month_{month}"
-                    ))
-            keyboard.append(row)
-        
-        keyboard.append([InlineKeyboardButton(text="❌ Cancel", callback_data="cancel_list_recs")])
-        
         await cb.message.answer("📅 <b>Select Month:</b>",
-                              reply_markup=InlineKeyboardMarkup(inline_keyboard=keyboard), parse_mode="HTML")
+                              reply_markup=picker("filter_months", SHOW_MONTH, months, per_row=2, footer=CANCEL_ROW),
+                              parse_mode="HTML")
         await cb.answer()
 
-    @dp.callback_query(F.data == "filter_category")
+    @router.on(FILTER_CATEGORY)
     async def filter_by_category(cb: types.CallbackQuery, state: FSMContext):
         """Show category selection for filtering."""
-        categories = sheets.get_categories()
+        categories = await repos.reference.categories()
         
         if not categories:
             await cb.message.answer("❌ <b>No categories found!</b>\n\n"
@@ -63,93 +80,228 @@ def register(dp: Dispatcher):
             await cb.answer()
             return
         
-        # Create category selection keyboard maintaining the exact order from the sheet
-        keyboard = []
-        for i in range(0, len(categories), 2):
-            row = []
-            for j in range(2):
-                if i + j < len(categories):
-                    category = categories[i + j]
-                    row.append(InlineKeyboardButton(
-                        text=category,
-                        callback_data=f"cat_filter_{category}"
-                    ))
-            keyboard.append(row)
-        
-        keyboard.append([InlineKeyboardButton(text="❌ Cancel", callback_data="cancel_list_recs")])
-        
+        # Categories in the exact order they appear in the sheet
         await cb.message.answer("🏆 <b>Select Category:</b>",
-                              reply_markup=InlineKeyboardMarkup(inline_keyboard=keyboard), parse_mode="HTML")
+                              reply_markup=picker("filter_categories", SHOW_CATEGORY, categories, per_row=2,
+                                                  footer=CANCEL_ROW),
+                              parse_mode="HTML")
         await cb.answer()
 
-    @dp.callback_query(F.data == "show_all_recs")
+    @router.on(SHOW_ALL)
     async def show_all_recognitions(cb: types.CallbackQuery):
         """Show all recognitions without filtering."""
-        recognitions = sheets.get_recognitions()
+        recognitions = await repos.recognitions.query()
         
         if not recognitions:
             await cb.message.answer("❌ <b>No recognitions found!</b>\n\n"
                                   "There are no recognitions in the system yet.", parse_mode="HTML")
         else:
-            await display_recognitions(cb.message, recognitions, "All Recognitions")
+            await display_recognitions(cb.message, recognitions)
         
         await cb.answer()
 
-    @dp.callback_query(F.data.startswith("month_"))
-    async def show_month_recognitions(cb: types.CallbackQuery):
+    @router.on(SHOW_MONTH)
+    async def show_month_recognitions(cb: types.CallbackQuery, month: str):
         """Show recognitions for a specific month."""
-        month = cb.data.replace("month_", "")
-        recognitions = sheets.get_recognitions(month=month)
+        recognitions = await repos.recognitions.query(month=month)
         
         if not recognitions:
             await cb.message.answer(f"❌ <b>No recognitions found for {month}!</b>", parse_mode="HTML")
         else:
-            await display_recognitions(cb.message, recognitions, f"Recognitions for {month}")
+            await display_recognitions(cb.message, recognitions, month=month)
         
         await cb.answer()
 
-    @dp.callback_query(F.data.startswith("cat_filter_"))
-    async def show_category_recognitions(cb: types.CallbackQuery):
+    @router.on(SHOW_CATEGORY)
+    async def show_category_recognitions(cb: types.CallbackQuery, category: str):
         """Show recognitions for a specific category."""
-        category = cb.data.replace("cat_filter_", "")
-        recognitions = sheets.get_recognitions(category=category)
+        recognitions = await repos.recognitions.query(category=category)
         
         if not recognitions:
             await cb.message.answer(f"❌ <b>No recognitions found for {category}!</b>", parse_mode="HTML")
         else:
-            await display_recognitions(cb.message, recognitions, f"Recognitions for {category}")
+            await display_recognitions(cb.message, recognitions, category=category)
         
         await cb.answer()
 
-    @dp.callback_query(F.data == "cancel_list_recs")
+    @router.on(FLIP_ALL)
+    async def flip_all_recognitions(cb: types.CallbackQuery, page: int):
+        """Show another page of all recognitions."""
+        await flip_page(cb, page)
+
+    @router.on(FLIP_MONTH)
+    async def flip_month_recognitions(cb: types.CallbackQuery, month: str, page: int):
+        """Show another page of a month's recognitions."""
+        await flip_page(cb, page, month=month)
+
+    @router.on(FLIP_CATEGORY)
+    async def flip_category_recognitions(cb: types.CallbackQuery, category: str, page: int):
+        """Show another page of a category's recognitions."""
+        await flip_page(cb, page, category=category)
+
+    @router.on(CANCEL_LIST)
     async def cancel_list_recognitions(cb: types.CallbackQuery, state: FSMContext):
         """Cancel the list recognitions flow."""
         await cb.message.answer("❌ <b>List Recognitions cancelled.</b>", parse_mode="HTML")
         await state.clear()
         await cb.answer()
 
-async def display_recognitions(message: types.Message, recognitions: list, title: str):
-    """Display recognitions in a formatted message."""
+async def display_recognitions(message: types.Message, recognitions: list,
+                               month: str | None = None, category: str | None = None):
+    """Send the first page of recognitions; the ◀/▶ buttons flip through the rest in place.
+
+    month or category is the filter the recognitions were queried with.
+    """
     if not recognitions:
         await message.answer("❌ <b>No recognitions found!</b>", parse_mode="HTML")
         return
     
-    # Split into chunks if too many recognitions
-    chunk_size = 10  # Telegram message limit
-    chunks = [recognitions[i:i + chunk_size] for i in range(0, len(recognitions), chunk_size)]
+    pages = recognition_pages(recognitions, month, category)
+    await message.answer(pages[0], reply_markup=page_keyboard(pages, 0, month, category), parse_mode="HTML")
+
+async def flip_page(cb: types.CallbackQuery, page: int, month: str | None = None, category: str | None = None):
+    """Show another page of a recognition list by editing its message.
+
+    The filter is queried again, so a list that has left the cache is rendered again.
+    """
+    recognitions = await repos.recognitions.query(month=month, category=category)
+    pages = recognition_pages(recognitions, month, category) if recognitions else []
+    if not 0 <= page < len(pages):
+        await cb.answer("This list has changed. Open List Recognitions again.", show_alert=True)
+        return
     
-    for i, chunk in enumerate(chunks):
-        text = f"📋 <b>{title}</b>\n\n"
-        
-        for j, rec in enumerate(chunk):
-            text += f"<b>{i * chunk_size + j + 1}.</b> {rec['upline']} → {rec['downline']}\n"
-            text += f"   🏆 <b>Category:</b> {rec['category']}\n"
-            text += f"   📅 <b>Month:</b> {rec['month']}\n"
-            if rec['remarks']:
-                text += f"   💬 <b>Remarks:</b> {rec['remarks']}\n"
-            text += "\n"
-        
-        if len(chunks) > 1:
-            text += f"<i>Page {i + 1} of {len(chunks)}</i>"
-        
-        await message.answer(text, parse_mode="HTML")
+    try:
+        await cb.message.edit_text(pages[page], reply_markup=page_keyboard(pages, page, month, category),
+                                   parse_mode="HTML")
+    except TelegramBadRequest as e:
+        # A double tap asks for the page that is already shown
+        if "message is not modified" not in str(e):
+            raise
+    await cb.answer()
+
+def recognition_pages(recognitions: list, month: str | None = None, category: str | None = None) -> list[str]:
+    """The rendered pages of a filter's recognitions, from the cache while they are unchanged."""
+    if month is not None:
+        key, title = f"month:{month.lower()}", f"Recognitions for {month}"
+    elif category is not None:
+        key, title = f"category:{category.lower()}", f"Recognitions for {category}"
+    else:
+        key, title = "all", "All Recognitions"
+    result = result_pages.get(key, len(recognitions))
+    if result is None:
+        result = result_pages.put(key, render_pages(recognitions, title), len(recognitions))
+    return result.pages
+
+# Telegram's limit on message text, counted in UTF-16 code units
+MESSAGE_LIMIT = 4096
+# Longer fields are cut so that every record fits on a page, in UTF-16 code units of the escaped text
+REMARKS_LIMIT = 1000
+FIELD_LIMIT = 200
+# Rendered result sets kept for page flips, and for how many seconds
+PAGES_CACHED = 64
+PAGES_TTL = 300
+
+def _length(text: str) -> int:
+    return len(text.encode("utf-16-le")) // 2
+
+def _cut(text: str, limit: int) -> str:
+    """text escaped for HTML, cut with an ellipsis to at most limit UTF-16 code units."""
+    escaped = escape(text)
+    if _length(escaped) <= limit:
+        return escaped
+    pieces, used = [], _length("…")
+    for char in text:
+        piece = escape(char)
+        used += _length(piece)
+        if used > limit:
+            break
+        pieces.append(piece)
+    return "".join(pieces) + "…"
+
+def _record_text(number: int, rec: dict) -> str:
+    lines = [f"<b>{number}.</b> {_cut(rec['upline'], FIELD_LIMIT)} → {_cut(rec['downline'], FIELD_LIMIT)}",
+             f"   🏆 <b>Category:</b> {_cut(rec['category'], FIELD_LIMIT)}",
+             f"   📅 <b>Month:</b> {_cut(rec['month'], FIELD_LIMIT)}"]
+    if rec['remarks']:
+        lines.append(f"   💬 <b>Remarks:</b> {_cut(rec['remarks'], REMARKS_LIMIT)}")
+    return "\n".join(lines) + "\n\n"
+
+def render_pages(recognitions: list, title: str, limit: int = MESSAGE_LIMIT) -> list[str]:
+    """Pack numbered recognitions into as few messages as fit within the limit.
+
+    Every field is cut to its limit, so each record fits on a page of its own.
+    """
+    header = f"📋 <b>{_cut(title, FIELD_LIMIT)}</b>\n\n"
+    # Leave room for the page footer, whatever the page count
+    budget = limit - _length(header) - _length(f"<i>Page {len(recognitions)} of {len(recognitions)}</i>")
+    pages: list[list[str]] = [[]]
+    used = 0
+    for number, rec in enumerate(recognitions, start=1):
+        block = _record_text(number, rec)
+        size = _length(block)
+        if pages[-1] and used + size > budget:
+            pages.append([])
+            used = 0
+        pages[-1].append(block)
+        used += size
+    if len(pages) == 1:
+        return [header + "".join(pages[0])]
+    return [header + "".join(blocks) + f"<i>Page {i} of {len(pages)}</i>"
+            for i, blocks in enumerate(pages, start=1)]
+
+class ResultPages(NamedTuple):
+    pages: list[str]
+    count: int
+    at: float
+
+class PageCache:
+    """Rendered recognition lists by filter, least recently used dropped first.
+
+    A list is rendered again once it is older than the TTL or the filter
+    matches a different number of records. Nothing else depends on an
+    entry: page buttons name the filter, not the cached list.
+    """
+
+    def __init__(self, size: int = PAGES_CACHED, ttl: float = PAGES_TTL):
+        self.size = size
+        self.ttl = ttl
+        self._by_key: OrderedDict[str, ResultPages] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str, count: int) -> ResultPages | None:
+        result = self._by_key.get(key)
+        if result is None or result.count != count or time.monotonic() - result.at > self.ttl:
+            self.misses += 1
+            return None
+        self._by_key.move_to_end(key)
+        self.hits += 1
+        return result
+
+    def put(self, key: str, pages: list[str], count: int) -> ResultPages:
+        self._by_key.pop(key, None)
+        result = self._by_key[key] = ResultPages(pages, count, time.monotonic())
+        while len(self._by_key) > self.size:
+            self._by_key.popitem(last=False)
+        return result
+
+    def stats(self) -> dict:
+        return {"lists": len(self._by_key), "hits": self.hits, "misses": self.misses}
+
+result_pages = PageCache()
+
+def _flip(page: int, month: str | None, category: str | None) -> str:
+    if month is not None:
+        return FLIP_MONTH.pack(month, page)
+    if category is not None:
+        return FLIP_CATEGORY.pack(category, page)
+    return FLIP_ALL.pack(page)
+
+def page_keyboard(pages: list[str], page: int, month: str | None = None,
+                  category: str | None = None) -> InlineKeyboardMarkup | None:
+    buttons = []
+    if page > 0:
+        buttons.append(InlineKeyboardButton(text="◀ Prev", callback_data=_flip(page - 1, month, category)))
+    if page < len(pages) - 1:
+        buttons.append(InlineKeyboardButton(text="Next ▶", callback_data=_flip(page + 1, month, category)))
+    return InlineKeyboardMarkup(inline_keyboard=[buttons]) if buttons else None
@@ -1,8 +1,11 @@
 from aiogram import Dispatcher, types, F
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
-from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-from zoom_impact_bot import sheets
+from zoom_impact_bot import callbacks, repos
+from zoom_impact_bot.callbacks import Action, Choice
+from zoom_impact_bot.commands.utils import RECOGNITION, Wizard
+from zoom_impact_bot.keyboards import picker
+from zoom_impact_bot.rows import Choices
 
 # State machine for recognition entry
 class RecognitionStates(StatesGroup):
@@ -12,10 +15,28 @@ class RecognitionStates(StatesGroup):
     waiting_for_month = State()
     waiting_for_remarks = State()
 
+MONTHS = ("Jan", "Feb", "Mar", "Apr", "May", "Jun",
+          "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+
+async def _categories() -> Choices:
+    return await repos.reference.categories()
+
+async def _months() -> tuple[str, ...]:
+    return MONTHS
+
+PICK_CATEGORY = Action("rc", Choice(_categories))
+PICK_MONTH = Action("rm", Choice(_months))
+CANCEL_RECOGNITION = Action("cancel_recognition")
+CANCEL_ROW = ((("❌ Cancel", CANCEL_RECOGNITION.pack()),),)
+
+WIZARD = Wizard("recognition")
+
 def register(dp: Dispatcher):
-    @dp.callback_query(F.data == "recognition")
+    router = callbacks.router(dp)
+
+    @router.on(RECOGNITION)
     async def recog(cb: types.CallbackQuery, state: FSMContext):
-        await state.clear()
+        await WIZARD.start(state)
         await cb.message.answer("🏆 Let's add a recognition!\n\n"
                                "📝 <b>Step 1/5</b>: Who is the upline?\n"
                                "Please type the upline name:", parse_mode="HTML")
@@ -34,7 +55,7 @@ def register(dp: Dispatcher):
         await state.update_data(downline=m.text.strip())
         
         # Get categories from spreadsheet
-        categories = sheets.get_categories()
+        categories = await repos.reference.categories()
         
         # Check if categories were found
         if not categories:
@@ -43,61 +64,24 @@ def register(dp: Dispatcher):
             await state.clear()
             return
         
-        # Create category selection keyboard maintaining the exact order from the sheet
-        keyboard = []
-        
-        # Display categories in the exact order they appear in the Google Sheet
-        # Use 2 categories per row for better display
-        for i in range(0, len(categories), 2):
-            row = []
-            for j in range(2):
-                if i + j < len(categories):
-                    category = categories[i + j]
-                    row.append(InlineKeyboardButton(
-                        text=category,
-                        callback_data=f"cat_{category}"
-                    ))
-            keyboard.append(row)
-        
-        # Add cancel button
-        keyboard.append([InlineKeyboardButton(text="❌ Cancel", callback_data="cancel_recognition")])
-        
+        # Categories in the exact order they appear in the Google Sheet, 2 per row
         await m.answer("📝 <b>Step 3/5</b>: Choose the category:",
-                      reply_markup=InlineKeyboardMarkup(inline_keyboard=keyboard), parse_mode="HTML")
+                      reply_markup=picker("categories", PICK_CATEGORY, categories, per_row=2, footer=CANCEL_ROW),
+                      parse_mode="HTML")
         await state.set_state(RecognitionStates.waiting_for_category)
 
-    @dp.callback_query(F.data.startswith("cat_"), RecognitionStates.waiting_for_category)
-    async def process_category(cb: types.CallbackQuery, state: FSMContext):
-        category = cb.data.replace("cat_", "")
+    @router.on(PICK_CATEGORY, RecognitionStates.waiting_for_category)
+    async def process_category(cb: types.CallbackQuery, category: str, state: FSMContext):
         await state.update_data(category=category)
         
-        # Create month selection keyboard
-        months = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", 
-                 "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
-        
-        keyboard = []
-        for i in range(0, len(months), 3):
-            row = []
-            for j in range(3):
-                if i + j < len(months):
-                    month = months[i + j]
-                    row.append(InlineKeyboardButton(
-                        text=month,
-                        callback_data=f"month_{month}"
-                    ))
-            keyboard.append(row)
-        
-        # Add cancel button
-        keyboard.append([InlineKeyboardButton(text="❌ Cancel", callback_data="cancel_recognition")])
-        
         await cb.message.answer("📝 <b>Step 4/5</b>: Choose the month:",
-                               reply_markup=InlineKeyboardMarkup(inline_keyboard=keyboard), parse_mode="HTML")
+                               reply_markup=picker("months", PICK_MONTH, MONTHS, per_row=3, footer=CANCEL_ROW),
+                               parse_mode="HTML")
         await state.set_state(RecognitionStates.waiting_for_month)
         await cb.answer()
 
-    @dp.callback_query(F.data.startswith("month_"), RecognitionStates.waiting_for_month)
-    async def process_month(cb: types.CallbackQuery, state: FSMContext):
-        month = cb.data.replace("month_", "")
+    @router.on(PICK_MONTH, RecognitionStates.waiting_for_month)
+    async def process_month(cb: types.CallbackQuery, month: str, state: FSMContext):
         await state.update_data(month=month)
         
         await cb.message.answer("📝 <b>Step 5/5</b>: Enter remarks/comments:\n"
@@ -112,7 +96,7 @@ def register(dp: Dispatcher):
         # Get all data and save
         data = await state.get_data()
         try:
-            sheets.add_recognition(
+            await repos.recognitions.add(
                 data['upline'],
                 data['downline'], 
                 data['category'],
@@ -132,7 +116,7 @@ def register(dp: Dispatcher):
         
         await state.clear()
 
-    @dp.callback_query(F.data == "cancel_recognition")
+    @router.on(CANCEL_RECOGNITION)
     async def cancel_recognition(cb: types.CallbackQuery, state: FSMContext):
         await state.clear()
         await cb.message.answer("❌ Recognition entry cancelled.")
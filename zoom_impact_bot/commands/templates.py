@@ -1,56 +1,29 @@
-from aiogram import Dispatcher, types, F
-from zoom_impact_bot import sheets
+from aiogram import Dispatcher, types
+from zoom_impact_bot import callbacks, repos
+from zoom_impact_bot.commands.utils import GUIDELINES, SEPARATOR, SHIFT, SLIDES
 
 def register(dp: Dispatcher):
-    @dp.callback_query(F.data == "slides")
+    router = callbacks.router(dp)
+
+    @router.on(SLIDES)
     async def slides(cb: types.CallbackQuery):
-        link = sheets.get_template("slides")
+        link = await repos.reference.template("slides")
         await cb.message.answer(f"📎 Latest slides: {link or 'not set'}")
         await cb.answer()
 
-    @dp.callback_query(F.data == "guidelines")
+    @router.on(GUIDELINES)
     async def guidelines(cb: types.CallbackQuery):
-        link = sheets.get_template("guidelines")
+        link = await repos.reference.template("guidelines")
         await cb.message.answer(f"📘 Guidelines: {link or 'not set'}")
         await cb.answer()
 
     # Admin handlers - placeholder implementations
-    @dp.callback_query(F.data == "saveevent")
-    async def save_event(cb: types.CallbackQuery):
-        await cb.message.answer("➕ Save Event feature coming soon.")
-        await cb.answer()
-
-    @dp.callback_query(F.data == "assignmc")
-    async def assign_mc(cb: types.CallbackQuery):
-        await cb.message.answer("🎙 Assign MC feature coming soon.")
-        await cb.answer()
-
-    @dp.callback_query(F.data == "assignimpact")
-    async def assign_impact(cb: types.CallbackQuery):
-        await cb.message.answer("✨ Assign Impact feature coming soon.")
-        await cb.answer()
-
-    @dp.callback_query(F.data == "announce")
-    async def announce(cb: types.CallbackQuery):
-        await cb.message.answer("📣 Announce feature coming soon.")
-        await cb.answer()
-
-    @dp.callback_query(F.data == "shift")
+    @router.on(SHIFT)
     async def shift_event(cb: types.CallbackQuery):
         await cb.message.answer("🔁 Shift Event feature coming soon.")
         await cb.answer()
 
-    @dp.callback_query(F.data == "list_recs")
-    async def list_recognitions(cb: types.CallbackQuery):
-        await cb.message.answer("📋 List Recognitions feature coming soon.")
-        await cb.answer()
-
-    @dp.callback_query(F.data == "assignpresenter")
-    async def assign_presenter(cb: types.CallbackQuery):
-        await cb.message.answer("👤 <b>Assign Presenter</b> feature coming soon.", parse_mode="HTML")
-        await cb.answer()
-
-    @dp.callback_query(F.data == "separator")
+    @router.on(SEPARATOR)
     async def separator_click(cb: types.CallbackQuery):
         # Do nothing for separator clicks
         await cb.answer()
@@ -1,39 +1,57 @@
+from aiogram import types
+from aiogram.fsm.context import FSMContext
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-from zoom_impact_bot import sheets
+from zoom_impact_bot import repos
+from zoom_impact_bot.callbacks import Action
+from zoom_impact_bot.keyboards import keyboards
 
-def get_role_ids(role_column: int):
-    """Get list of user IDs from a specific column in the UserRoles sheet."""
-    try:
-        ws = sheets.get_ws("UserRoles")
-        # Get all values from the specified column
-        role_ids = ws.col_values(role_column)
-        print(f"Raw {role_column} IDs from sheet: {role_ids}")
-        # Convert to integers and filter out empty values, skip header row
-        role_ids = [int(role_id.strip()) for role_id in role_ids[1:] if role_id.strip().isdigit()]
-        print(f"Processed {role_column} IDs: {role_ids}")
-        return set(role_ids)
-    except Exception as e:
-        print(f"Error getting role IDs from column {role_column} in UserRoles sheet: {e}")
-        return set()
+# Main menu buttons; their codes are the callback_data menus have always been sent with
+NEXT = Action("next")
+TODAY = Action("today")
+WEEK = Action("week")
+SLIDES = Action("slides")
+GUIDELINES = Action("guidelines")
+RECOGNITION = Action("recognition")
+CALENDAR = Action("calendar")
+SEPARATOR = Action("separator")
+SAVE_EVENT = Action("saveevent")
+ASSIGN_MC = Action("assignmc")
+ASSIGN_PRESENTER = Action("assignpresenter")
+ASSIGN_IMPACT = Action("assignimpact")
+ANNOUNCE = Action("announce")
+SHIFT = Action("shift")
+LIST_RECS = Action("list_recs")
 
-def roles_for(user_id: int) -> list[str]:
+SESSION_EXPIRED = "❌ Session expired. Please start over."
+
+class Wizard:
+    """One multi-step flow's share of the user's FSM data.
+
+    Every flow keeps its answers in the same per-user data dict, so start()
+    replaces whatever another or an abandoned flow left there and tags the
+    data with the flow's name. data() hands a step its flow's answers, or
+    tells the user the session expired when a stale button from another
+    flow, or from before a restart, finds data that is not its own.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+
+    async def start(self, state: FSMContext, **data) -> None:
+        await state.set_state(None)
+        await state.set_data({"wizard": self.name, **data})
+
+    async def data(self, cb: types.CallbackQuery, state: FSMContext, *required: str) -> dict | None:
+        data = await state.get_data()
+        if data.get("wizard") != self.name or any(key not in data for key in required):
+            await cb.answer(SESSION_EXPIRED, show_alert=True)
+            return None
+        return data
+
+async def roles_for(user_id: int) -> list[str]:
     """Get all roles for a user based on their ID."""
-    roles = []
-    
-    # Check each role column
-    admin_ids = get_role_ids(1)  # Column A: Admins
-    mc_ids = get_role_ids(2)     # Column B: MCs
-    presenter_ids = get_role_ids(3)  # Column C: Presenters
-    impact_speaker_ids = get_role_ids(4)  # Column D: Impact Speakers
-    
-    if user_id in admin_ids:
-        roles.append("Admin")
-    if user_id in mc_ids:
-        roles.append("MC")
-    if user_id in presenter_ids:
-        roles.append("Presenter")
-    if user_id in impact_speaker_ids:
-        roles.append("Impact Speaker")
+    # Columns A: Admins, B: MCs, C: Presenters, D: Impact Speakers
+    roles = list(await repos.roles.roles(user_id))
     
     # If no specific roles, they're a member
     if not roles:
@@ -42,29 +60,33 @@ def roles_for(user_id: int) -> list[str]:
     return roles
 
 def role_menu(roles: list[str]) -> InlineKeyboardMarkup:
+    """The main menu for a set of roles, built once per distinct set."""
+    return keyboards.get("menu", frozenset(roles), lambda: _build_role_menu(roles))
+
+def _build_role_menu(roles: list[str]) -> InlineKeyboardMarkup:
     rows = []
     
     # General Actions Section
-    rows.append([InlineKeyboardButton(text="📅 Next Event", callback_data="next"),
-                 InlineKeyboardButton(text="📆 Today", callback_data="today")])
-    rows.append([InlineKeyboardButton(text="🗓 Week View", callback_data="week"),
-                 InlineKeyboardButton(text="📎 Slides", callback_data="slides")])
-    rows.append([InlineKeyboardButton(text="📘 Guidelines", callback_data="guidelines"),
-                 InlineKeyboardButton(text="🏆 Recognition", callback_data="recognition")])
-    rows.append([InlineKeyboardButton(text="🗓 Calendar", callback_data="calendar")])
+    rows.append([InlineKeyboardButton(text="📅 Next Event", callback_data=NEXT.pack()),
+                 InlineKeyboardButton(text="📆 Today", callback_data=TODAY.pack())])
+    rows.append([InlineKeyboardButton(text="🗓 Week View", callback_data=WEEK.pack()),
+                 InlineKeyboardButton(text="📎 Slides", callback_data=SLIDES.pack())])
+    rows.append([InlineKeyboardButton(text="📘 Guidelines", callback_data=GUIDELINES.pack()),
+                 InlineKeyboardButton(text="🏆 Recognition", callback_data=RECOGNITION.pack())])
+    rows.append([InlineKeyboardButton(text="🗓 Calendar", callback_data=CALENDAR.pack())])
     
     # Add separator if admin
     if "Admin" in roles:
         # Visual separator row
-        rows.append([InlineKeyboardButton(text="━━━━━━━━━━━━━━━━━━━━", callback_data="separator")])
+        rows.append([InlineKeyboardButton(text="━━━━━━━━━━━━━━━━━━━━", callback_data=SEPARATOR.pack())])
         
         # Admin Actions Section (with admin icons)
-        rows.append([InlineKeyboardButton(text="👑 ➕ Save Event", callback_data="saveevent"),
-                     InlineKeyboardButton(text="👑 🎙 Assign MC", callback_data="assignmc")])
-        rows.append([InlineKeyboardButton(text="👑 👤 Assign Presenter", callback_data="assignpresenter"),
-                     InlineKeyboardButton(text="👑 ✨ Assign Impact", callback_data="assignimpact")])
-        rows.append([InlineKeyboardButton(text="👑 📣 Announce", callback_data="announce"),
-                     InlineKeyboardButton(text="👑 🔁 Shift Event", callback_data="shift")])
-        rows.append([InlineKeyboardButton(text="👑 📋 List Recognitions", callback_data="list_recs")])
+        rows.append([InlineKeyboardButton(text="👑 ➕ Save Event", callback_data=SAVE_EVENT.pack()),
+                     InlineKeyboardButton(text="👑 🎙 Assign MC", callback_data=ASSIGN_MC.pack())])
+        rows.append([InlineKeyboardButton(text="👑 👤 Assign Presenter", callback_data=ASSIGN_PRESENTER.pack()),
+                     InlineKeyboardButton(text="👑 ✨ Assign Impact", callback_data=ASSIGN_IMPACT.pack())])
+        rows.append([InlineKeyboardButton(text="👑 📣 Announce", callback_data=ANNOUNCE.pack()),
+                     InlineKeyboardButton(text="👑 🔁 Shift Event", callback_data=SHIFT.pack())])
+        rows.append([InlineKeyboardButton(text="👑 📋 List Recognitions", callback_data=LIST_RECS.pack())])
     
     return InlineKeyboardMarkup(inline_keyboard=rows)
@@ -0,0 +1,441 @@
+"""In-memory indexes over spreadsheet tabs.
+
+Each index is filled from a tab's raw values by an async loader, so this
+module does not care whether they come from gspread or the Sheets API.
+"""
+import abc
+import asyncio
+import itertools
+import time
+from bisect import bisect_left
+from datetime import date, datetime, time as dtime, timedelta
+from typing import Awaitable, Callable, NamedTuple
+from zoneinfo import ZoneInfo
+
+from zoom_impact_bot import scheduler
+
+TZ = ZoneInfo("Asia/Kolkata")
+# Data versions, unique across every index and mirror in the process, so a version
+# names one state of one source
+versions = itertools.count(1)
+
+Loader = Callable[[], Awaitable[list[list[str]]]]
+# Fetches a tab's rows from the given 1-based sheet row down
+TailLoader = Callable[[int], Awaitable[list[list[str]]]]
+
+def _trim(row) -> list[str]:
+    """A row as the Sheets API returns it, without trailing empty cells."""
+    row = list(row)
+    while row and row[-1] == "":
+        row.pop()
+    return row
+
+class CachedTab(abc.ABC):
+    """Base for indexes kept in memory with a TTL and stale-while-revalidate refresh.
+
+    The first get() waits for the load, and concurrent callers share it.
+    After the TTL the stale index keeps being served while one background
+    task reloads it. invalidate() makes the next get() wait for a fresh load.
+
+    With a tail_loader, a reload of an append-only tab fetches only the rows
+    from the last known row (the watermark) down. The watermark row is
+    fetched again and compared with the cached one; if it changed, rows
+    above it were edited or removed and the whole tab is reloaded. Edits
+    that leave the watermark row alone are picked up by a full reload after
+    every full_every tail syncs.
+
+    Rows the bot appends are added in place when they directly follow the
+    watermark. When another writer's rows landed in between, the next get()
+    waits for a tail sync from the old watermark, which brings in both.
+    """
+
+    def __init__(self, loader: Loader | None = None, ttl: float = 0,
+                 tail_loader: TailLoader | None = None, full_every: int = 0):
+        self.loader = loader
+        self.ttl = ttl
+        self.tail_loader = tail_loader
+        self.full_every = full_every
+        self.loaded = False
+        self.rows = 0
+        # Changes with every load or added row
+        self.version = 0
+        self._last_row: list[str] = []
+        self._tail_syncs = 0
+        self._behind = False
+        self._loaded_at = 0.0
+        self._task: asyncio.Task | None = None
+        self.loads = 0
+        self.tail_loads = 0
+        self.resyncs = 0
+        self.errors = 0
+
+    async def get(self):
+        """Return the index, loading it first if needed."""
+        if not self.loaded or self._behind:
+            await self.refresh()
+        elif time.monotonic() - self._loaded_at > self.ttl:
+            self._refresh_in_background()
+        return self
+
+    async def refresh(self) -> None:
+        """Reload now, joining a load that is already running."""
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._load())
+        await asyncio.shield(self._task)
+
+    def invalidate(self) -> None:
+        """Make the next get() reload before answering."""
+        self.loaded = False
+
+    def load(self, values: list[list[str]]) -> None:
+        """Rebuild the index from a tab's values."""
+        self._apply(values)
+        self.version = next(versions)
+        self.rows = len(values)
+        self._last_row = _trim(values[-1]) if values else []
+        self._tail_syncs = 0
+        self._behind = False
+        self.loaded = True
+        self._loaded_at = time.monotonic()
+
+    def add(self, row_index: int, row: list[str]) -> None:
+        """Apply one row written by the bot, or fetched by a tail sync, without reloading."""
+        if row_index > self.rows + 1:
+            # Rows from another writer sit between the watermark and this one; fetch them all first
+            self._behind = True
+            return
+        self._add(row_index, row)
+        self.version = next(versions)
+        if row_index >= self.rows:
+            self.rows = row_index
+            self._last_row = _trim(row)
+
+    def stats(self) -> dict:
+        return {
+            "loaded": self.loaded,
+            "age": time.monotonic() - self._loaded_at if self.loaded else None,
+            "rows": self.rows,
+            "loads": self.loads,
+            "tail_loads": self.tail_loads,
+            "resyncs": self.resyncs,
+            "errors": self.errors,
+        }
+
+    @abc.abstractmethod
+    def _apply(self, values: list[list[str]]) -> None:
+        """Rebuild the index from all of a tab's values."""
+
+    @abc.abstractmethod
+    def _add(self, row_index: int, row: list[str]) -> None:
+        """Put one sheet row into the index, replacing what was at row_index."""
+
+    def _refresh_in_background(self) -> None:
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._load(background=True))
+
+    async def _sync_tail(self) -> bool:
+        """Fetch only the rows from the watermark down; False when a full reload is needed."""
+        if not (self.loaded and self.tail_loader and self.rows > 1):
+            return False
+        if self.full_every and self._tail_syncs >= self.full_every:
+            return False
+        # The bot may append while the tail is in flight, so keep the watermark it was asked for
+        first, expected = self.rows, self._last_row
+        values = await self.tail_loader(first)
+        if _trim(values[0] if values else []) != expected:
+            # The watermark row moved or changed, so rows above it did too
+            self.resyncs += 1
+            return False
+        for row_index, row in enumerate(values[1:], start=first + 1):
+            self.add(row_index, row)
+        self._behind = False
+        self._tail_syncs += 1
+        self.tail_loads += 1
+        self._loaded_at = time.monotonic()
+        return True
+
+    async def _load(self, background: bool = False) -> None:
+        if background:
+            # Let interactive Sheets calls go first; this only affects the task's own context
+            scheduler.priority.set(scheduler.BACKGROUND)
+        try:
+            if not await self._sync_tail():
+                self.load(await self.loader())
+                self.loads += 1
+        except Exception as e:
+            self.errors += 1
+            if not self.loaded:
+                raise
+            # Keep serving the stale index until the next TTL expiry
+            print(f"Error refreshing {type(self).__name__}: {e}")
+            self._behind = False
+            self._loaded_at = time.monotonic()
+        finally:
+            self._task = None
+
+class RoleIndex(CachedTab):
+    """Telegram user ID -> roles, from the column-major UserRoles A:D range."""
+
+    COLUMNS = ("Admin", "MC", "Presenter", "Impact Speaker")
+
+    def __init__(self, loader: Loader | None = None, ttl: float = 0):
+        super().__init__(loader, ttl)
+        self._index: dict[int, tuple[str, ...]] = {}
+        self.columns: list[list[str]] = []
+        self.hits = 0
+
+    async def roles(self, user_id: int) -> tuple[str, ...]:
+        """Roles for a user in column order, empty when the user has none.
+
+        Raises the loader's error when the tab has never loaded, rather than
+        treating everyone as a member while the sheet is unreachable.
+        """
+        await self.get()
+        self.hits += 1
+        return self._index.get(user_id, ())
+
+    def user_ids(self) -> list[int]:
+        """Every user ID with at least one role."""
+        return sorted(self._index)
+
+    def stats(self) -> dict:
+        return {**super().stats(), "users": len(self._index), "hits": self.hits}
+
+    def _apply(self, columns: list[list[str]]) -> None:
+        self.columns = columns
+        index: dict[int, list[str]] = {}
+        for role, column in zip(self.COLUMNS, columns):
+            # Skip header row
+            for cell in column[1:]:
+                cell = cell.strip()
+                if not cell.isdecimal():
+                    continue
+                roles = index.setdefault(int(cell), [])
+                if role not in roles:
+                    roles.append(role)
+        self._index = {user_id: tuple(roles) for user_id, roles in index.items()}
+
+    def _add(self, row_index: int, row: list[str]) -> None:
+        # The index is loaded column-major, so write the row across the columns and rebuild
+        columns = [list(column) for column in self.columns]
+        columns += [[] for _ in range(len(self.COLUMNS) - len(columns))]
+        for column, cell in zip(columns, list(row) + [""] * (len(self.COLUMNS) - len(row))):
+            column += [""] * (row_index - len(column))
+            column[row_index - 1] = cell
+        self._apply(columns)
+
+class ValuesTab(CachedTab):
+    """A small reference tab (templates, categories, event types) kept as its raw rows."""
+
+    def __init__(self, loader: Loader | None = None, ttl: float = 0):
+        super().__init__(loader, ttl)
+        self.values: list[list[str]] = []
+
+    def column(self, index: int) -> list[str]:
+        """One column's cells, top to bottom, with "" where a row is shorter."""
+        return [row[index] if len(row) > index else "" for row in self.values]
+
+    def _apply(self, values: list[list[str]]) -> None:
+        self.values = values
+
+    def _add(self, row_index: int, row: list[str]) -> None:
+        values = list(self.values)
+        values += [[] for _ in range(row_index - len(values))]
+        values[row_index - 1] = list(row)
+        self.values = values
+
+EVENT_COLUMNS = 9
+
+class EventRecord(NamedTuple):
+    """One parsed Events row. Rows with an unreadable time start at midnight and are not timed."""
+    start: datetime
+    row_index: int
+    row: tuple[str, ...]
+    timed: bool
+
+def parse_event_row(row_index: int, row: tuple[str, ...], tz=TZ) -> EventRecord | None:
+    """Parse an Events row, or None when its date is missing or invalid."""
+    try:
+        day = datetime.strptime(row[1].strip(), "%Y-%m-%d").date()
+    except ValueError:
+        return None
+    try:
+        at = datetime.strptime(row[2].strip(), "%H:%M").time()
+        timed = True
+    except ValueError:
+        at, timed = dtime.min, False
+    return EventRecord(datetime.combine(day, at, tzinfo=tz), row_index, row, timed)
+
+class EventsIndex(CachedTab):
+    """Events rows parsed once and kept sorted by start time.
+
+    Queries bisect on the start times, so they cost O(log n) plus the size
+    of the answer. A reload only re-parses rows whose cells changed.
+    """
+
+    def __init__(self, loader: Loader | None = None, ttl: float = 0, tz=TZ, **sync):
+        super().__init__(loader, ttl, **sync)
+        self.tz = tz
+        self._records: list[EventRecord] = []
+        self._starts: list[datetime] = []
+        self._by_row: dict[int, EventRecord | None] = {}
+        self._rows: dict[int, tuple[str, ...]] = {}
+        self.parsed = 0
+
+    def next(self, now: datetime) -> EventRecord | None:
+        """First timed event starting at or after now."""
+        for record in self._records[bisect_left(self._starts, now):]:
+            if record.timed:
+                return record
+        return None
+
+    def between(self, first: date, last: date) -> list[EventRecord]:
+        """Events dated first..last inclusive, in start order."""
+        lo = bisect_left(self._starts, datetime.combine(first, dtime.min, tzinfo=self.tz))
+        hi = bisect_left(self._starts, datetime.combine(last + timedelta(days=1), dtime.min, tzinfo=self.tz))
+        return self._records[lo:hi]
+
+    def on(self, day: date) -> list[EventRecord]:
+        """Events dated on one day, in start order."""
+        return self.between(day, day)
+
+    def _add(self, row_index: int, row: list[str]) -> None:
+        cells = self._normalise(row)
+        self._drop(row_index)
+        self._rows[row_index] = cells
+        record = parse_event_row(row_index, cells, self.tz)
+        self._by_row[row_index] = record
+        self.parsed += 1
+        if record is not None:
+            i = bisect_left(self._records, record)
+            self._records.insert(i, record)
+            self._starts.insert(i, record.start)
+
+    def patch(self, row_index: int, cells: dict[int, str]) -> None:
+        """Overwrite some columns (0-based) of a row already in the index."""
+        row = list(self._rows.get(row_index, ()))
+        for column, value in cells.items():
+            row += [""] * (column + 1 - len(row))
+            row[column] = value
+        self.add(row_index, row)
+
+    def row(self, row_index: int) -> tuple[str, ...] | None:
+        return self._rows.get(row_index)
+
+    def stats(self) -> dict:
+        return {**super().stats(), "events": len(self._records), "parsed": self.parsed}
+
+    def _normalise(self, row) -> tuple[str, ...]:
+        return tuple(row[:EVENT_COLUMNS]) + ("",) * (EVENT_COLUMNS - len(row))
+
+    def _drop(self, row_index: int) -> None:
+        record = self._by_row.pop(row_index, None)
+        self._rows.pop(row_index, None)
+        if record is not None:
+            i = bisect_left(self._records, record)
+            del self._records[i]
+            del self._starts[i]
+
+    def _apply(self, values: list[list[str]]) -> None:
+        rows: dict[int, tuple[str, ...]] = {}
+        by_row: dict[int, EventRecord | None] = {}
+        # Skip header row; data starts at sheet row 2
+        for row_index, raw in enumerate(values[1:], start=2):
+            cells = self._normalise(raw)
+            rows[row_index] = cells
+            if self._rows.get(row_index) == cells:
+                by_row[row_index] = self._by_row.get(row_index)
+            else:
+                by_row[row_index] = parse_event_row(row_index, cells, self.tz)
+                self.parsed += 1
+        if rows == self._rows:
+            return
+        self._rows, self._by_row = rows, by_row
+        self._records = sorted(record for record in by_row.values() if record is not None)
+        self._starts = [record.start for record in self._records]
+
+def append_start_row(response: dict) -> int | None:
+    """First sheet row written by a values.append call, from its updatedRange."""
+    updated = (response or {}).get("updates", {}).get("updatedRange", "")
+    digits = "".join(ch for ch in updated.rpartition("!")[2].split(":")[0] if ch.isdigit())
+    return int(digits) if digits else None
+
+RECOGNITION_COLUMNS = 5
+
+class RecognitionRecord(NamedTuple):
+    row_index: int
+    upline: str
+    downline: str
+    category: str
+    month: str
+    remarks: str
+
+def _key(value: str) -> str:
+    return value.strip().lower()
+
+class RecognitionsStore(CachedTab):
+    """Recognitions rows with posting lists per normalised month and category.
+
+    Filtering intersects the posting lists instead of rescanning the tab,
+    and rows written by the bot or found by a tail sync are appended in place.
+    """
+
+    def __init__(self, loader: Loader | None = None, ttl: float = 0, **sync):
+        super().__init__(loader, ttl, **sync)
+        self._clear()
+
+    def query(self, month: str | None = None, category: str | None = None) -> list[RecognitionRecord]:
+        """Records matching the given month and/or category (case-insensitive), in sheet order."""
+        postings = []
+        if month:
+            postings.append(self._by_month.get(_key(month), []))
+        if category:
+            postings.append(self._by_category.get(_key(category), []))
+        if not postings:
+            return list(self._records)
+        postings.sort(key=len)
+        positions = postings[0]
+        for other in postings[1:]:
+            other = set(other)
+            positions = [p for p in positions if p in other]
+        return [self._records[p] for p in positions]
+
+    def months(self) -> list[str]:
+        """Distinct months, spelled as first seen, in sorted order."""
+        return sorted(self._month_labels.values())
+
+    def _add(self, row_index: int, row: list[str]) -> None:
+        # A tail sync can return a row the bot already added
+        if row_index in self._row_indexes:
+            return
+        self._row_indexes.add(row_index)
+        cells = list(row[:RECOGNITION_COLUMNS]) + [""] * (RECOGNITION_COLUMNS - len(row))
+        # Skip blank rows
+        if not any(cell.strip() for cell in cells):
+            return
+        upline, downline, category, month, remarks = cells
+        record = RecognitionRecord(row_index, upline, downline, category.strip(), month.strip(), remarks)
+        position = len(self._records)
+        self._records.append(record)
+        self._by_category.setdefault(_key(record.category), []).append(position)
+        month_key = _key(record.month)
+        self._by_month.setdefault(month_key, []).append(position)
+        if record.month:
+            self._month_labels.setdefault(month_key, record.month)
+
+    def stats(self) -> dict:
+        return {**super().stats(), "records": len(self._records),
+                "months": len(self._by_month), "categories": len(self._by_category)}
+
+    def _clear(self) -> None:
+        self._records: list[RecognitionRecord] = []
+        self._by_month: dict[str, list[int]] = {}
+        self._by_category: dict[str, list[int]] = {}
+        self._month_labels: dict[str, str] = {}
+        self._row_indexes: set[int] = set()
+
+    def _apply(self, values: list[list[str]]) -> None:
+        self._clear()
+        # Skip header row; data starts at sheet row 2
+        for row_index, row in enumerate(values[1:], start=2):
+            self._add(row_index, row)
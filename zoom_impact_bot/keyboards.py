@@ -0,0 +1,102 @@
+"""Inline keyboards built once and reused while their source data is unchanged.
+
+A keyboard is cached under its kind and the version of what it is built
+from: the user's roles for the menu, or the version of the UserRoles,
+EventTypes or Recognition-Categories data the picker's Choices were
+parsed from. Every backend moves that version when the tab changes, so an
+edited tab yields a new key on the next request and the old keyboard ages
+out of the cache. Plain sequences of choices, such as a fixed month list,
+are their own version.
+
+Each request gets its own copy of the markup's rows around shared, frozen
+buttons, so a handler changing its keyboard cannot change anyone else's.
+"""
+import os
+from collections import OrderedDict
+from typing import Callable, Hashable, Iterable
+
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+
+from zoom_impact_bot.callbacks import Action
+from zoom_impact_bot.rows import Choices
+
+# Keyboards kept, least recently used dropped first
+KEYBOARDS_CACHED = int(os.getenv("KEYBOARDS_CACHED", "256"))
+
+# Buttons below the choices, as rows of (text, callback_data)
+Footer = tuple[tuple[tuple[str, str], ...], ...]
+
+class FrozenButton(InlineKeyboardButton, frozen=True):
+    """A button of a cached keyboard; assigning to its fields raises."""
+
+def _copy(markup: InlineKeyboardMarkup) -> InlineKeyboardMarkup:
+    return markup.model_copy(update={"inline_keyboard": [list(row) for row in markup.inline_keyboard]})
+
+def _freeze(markup: InlineKeyboardMarkup) -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [FrozenButton(**button.model_dump(exclude_none=True)) for button in row] for row in markup.inline_keyboard])
+
+def _version(choices: tuple[str, ...]) -> Hashable:
+    """What a picker over these choices is cached under."""
+    if isinstance(choices, Choices) and choices.version is not None:
+        return choices.version
+    return choices
+
+class KeyboardCache:
+    def __init__(self, size: int = KEYBOARDS_CACHED):
+        self.size = size
+        self._markups: OrderedDict[tuple, InlineKeyboardMarkup] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, kind: str, version: Hashable, build: Callable[[], InlineKeyboardMarkup]) -> InlineKeyboardMarkup:
+        """A copy of the keyboard of this kind for this version of its data, built on first use."""
+        key = (kind, version)
+        markup = self._markups.get(key)
+        if markup is not None:
+            self._markups.move_to_end(key)
+            self.hits += 1
+            return _copy(markup)
+        self.misses += 1
+        markup = self._markups[key] = _freeze(build())
+        while len(self._markups) > self.size:
+            self._markups.popitem(last=False)
+        return _copy(markup)
+
+    def clear(self) -> None:
+        self._markups.clear()
+
+    def stats(self) -> dict:
+        return {"keyboards": len(self._markups), "hits": self.hits, "misses": self.misses}
+
+keyboards = KeyboardCache()
+
+def _markup(buttons: list[InlineKeyboardButton], per_row: int, footer: Footer) -> InlineKeyboardMarkup:
+    rows = [buttons[i:i + per_row] for i in range(0, len(buttons), per_row)]
+    rows.extend([InlineKeyboardButton(text=text, callback_data=data) for text, data in row] for row in footer)
+    return InlineKeyboardMarkup(inline_keyboard=rows)
+
+def picker(kind: str, action: Action, choices: Iterable[str], per_row: int = 1,
+           footer: Footer = ()) -> InlineKeyboardMarkup:
+    """One button per choice, in order, each sending action with its choice.
+
+    A kind names one call site, so per_row and footer are not part of the key.
+    """
+    choices = choices if isinstance(choices, tuple) else tuple(choices)
+
+    def build() -> InlineKeyboardMarkup:
+        buttons = [InlineKeyboardButton(text=choice, callback_data=action.pack(choice)) for choice in choices]
+        return _markup(buttons, per_row, footer)
+    return keyboards.get(kind, _version(choices), build)
+
+def toggles(kind: str, action: Action, choices: Iterable[str], selected: Iterable[str],
+            footer: Footer = ()) -> InlineKeyboardMarkup:
+    """A multi-select picker, one choice per row, ☑ on the selected choices."""
+    choices = choices if isinstance(choices, tuple) else tuple(choices)
+    selected = frozenset(selected).intersection(choices)
+
+    def build() -> InlineKeyboardMarkup:
+        buttons = [InlineKeyboardButton(text=f"{'☑' if choice in selected else '☐'} {choice}",
+                                        callback_data=action.pack(choice)) for choice in choices]
+        return _markup(buttons, 1, footer)
+    return keyboards.get(kind, (_version(choices), selected), build)
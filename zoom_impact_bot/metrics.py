@@ -0,0 +1,178 @@
+"""Prometheus metrics for handlers and Google Sheets calls.
+
+Handler latency is recorded per handler function, so every callback_data
+value or command handled by the same function shares one series. Sheets
+calls are recorded per tab and operation, once per HTTP attempt, so
+retries and throttling show up as separate samples.
+"""
+import os
+import time
+from typing import Callable
+
+from aiohttp import web
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+from zoom_impact_bot.tracing import handler_name
+
+# Port for /metrics (unset: not served); never the public webhook port
+METRICS_PORT = os.getenv("METRICS_PORT", "")
+# Interface /metrics listens on; only this host can scrape it unless widened
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+
+HANDLER_SECONDS = Histogram(
+    "bot_handler_seconds", "Time spent in a handler, Sheets calls included",
+    ["event", "handler"], buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 16, 32))
+HANDLER_ERRORS = Counter(
+    "bot_handler_errors_total", "Handlers that raised", ["event", "handler", "error"])
+SHEETS_SECONDS = Histogram(
+    "sheets_call_seconds", "Latency of one Google Sheets API request",
+    ["tab", "op"], buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8))
+SHEETS_ROWS = Counter(
+    "sheets_rows_total", "Rows read or written by Google Sheets calls", ["tab", "op"])
+SHEETS_BYTES = Counter(
+    "sheets_bytes_total", "UTF-8 bytes of cell values read or written by Google Sheets calls", ["tab", "op"])
+SHEETS_ERRORS = Counter(
+    "sheets_errors_total", "Failed Google Sheets calls", ["tab", "op", "code"])
+
+# A metric read from a stats() dict: (name, help, key), or (name, help, {label value: key})
+# for one series per value of the collector's label
+Series = tuple[str, str, str | dict[str, str]]
+
+class StatsCollector:
+    """Publishes numbers from a component's stats() each time /metrics is scraped."""
+
+    def __init__(self, stats: Callable[[], dict], counters: tuple[Series, ...] = (),
+                 gauges: tuple[Series, ...] = (), label: str = ""):
+        self.stats = stats
+        self.counters = counters
+        self.gauges = gauges
+        self.label = label
+
+    def collect(self):
+        stats = self.stats()
+        for family, specs in ((CounterMetricFamily, self.counters), (GaugeMetricFamily, self.gauges)):
+            for name, documentation, key in specs:
+                if isinstance(key, dict):
+                    metric = family(name, documentation, labels=[self.label])
+                    for value, series_key in key.items():
+                        metric.add_metric([value], stats[series_key])
+                else:
+                    metric = family(name, documentation, value=stats[key])
+                yield metric
+
+def export_stats(stats: Callable[[], dict], counters: tuple[Series, ...] = (), gauges: tuple[Series, ...] = (),
+                 label: str = "", registry: CollectorRegistry = REGISTRY) -> StatsCollector:
+    """Register a StatsCollector, e.g. for the Sheets scheduler's queues and retries."""
+    collector = StatsCollector(stats, counters, gauges, label)
+    registry.register(collector)
+    return collector
+
+def export_scheduler(scheduler, registry: CollectorRegistry = REGISTRY) -> StatsCollector:
+    """Queue depth, quota waits, retries and failures of a SheetsScheduler."""
+    kinds = ("read", "write")
+    return export_stats(scheduler.stats, counters=(
+        ("sheets_scheduler_calls", "Sheets calls submitted to the scheduler", "calls"),
+        ("sheets_scheduler_retries", "Sheets calls retried after a 429 or 5xx", "retries"),
+        ("sheets_scheduler_failures", "Sheets calls that failed after any retries", "failures"),
+        ("sheets_scheduler_deadlines_missed", "Sheets calls that ran out of time waiting or retrying",
+         "deadlines_missed"),
+        ("sheets_throttled", "Sheets calls that had to wait for quota",
+         {kind: f"{kind}_throttled" for kind in kinds}),
+        ("sheets_quota_wait_seconds", "Time Sheets calls spent waiting for quota",
+         {kind: f"{kind}_waited" for kind in kinds}),
+    ), gauges=(
+        ("sheets_queue_depth", "Sheets calls waiting for quota now", {kind: f"{kind}_queue" for kind in kinds}),
+    ), label="kind", registry=registry)
+
+def export_registry(worksheets, registry: CollectorRegistry = REGISTRY) -> StatsCollector:
+    """Worksheet handle lookups served from the cache and the metadata fetches behind the misses."""
+    return export_stats(worksheets.stats, counters=(
+        ("sheets_handle_hits", "Worksheet handle lookups served from the cache", "hits"),
+        ("sheets_handle_misses", "Worksheet handle lookups that reloaded the tab list", "misses"),
+        ("sheets_handle_refreshes", "Spreadsheet metadata fetches for worksheet handles", "refreshes"),
+    ), registry=registry)
+
+def export_single_flight(single_flight, registry: CollectorRegistry = REGISTRY) -> StatsCollector:
+    """Sheets reads made and reads that shared another caller's in-flight call."""
+    return export_stats(single_flight.stats, counters=(
+        ("sheets_reads", "Sheets reads asked for by callers", "calls"),
+        ("sheets_reads_coalesced", "Sheets reads answered by an identical read already in flight", "coalesced"),
+    ), gauges=(
+        ("sheets_reads_in_flight", "Distinct Sheets reads in flight now", "in_flight"),
+    ), registry=registry)
+
+def handler_metrics(event_type: str):
+    """Inner middleware timing each matched handler, e.g. dp.message.middleware(handler_metrics("message"))."""
+    async def middleware(handler, event, data):
+        name = handler_name(event, data)
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception as e:
+            HANDLER_ERRORS.labels(event_type, name, type(e).__name__).inc()
+            raise
+        finally:
+            HANDLER_SECONDS.labels(event_type, name).observe(time.perf_counter() - started)
+    return middleware
+
+def _size(rows: list[list[str]]) -> int:
+    return sum(len(str(cell).encode()) for row in rows for cell in row)
+
+class MeteredTransport:
+    """Wraps a Sheets transport and records every call's latency, rows and bytes."""
+
+    def __init__(self, transport):
+        self.transport = transport
+
+    async def get_values(self, tab: str, rng: str | None = None,
+                         major_dimension: str = "ROWS") -> list[list[str]]:
+        values = await self._timed(tab, "get_values", self.transport.get_values, tab, rng, major_dimension)
+        self._count(tab, "get_values", values)
+        return values
+
+    async def batch_get(self, tab: str, ranges: list[str],
+                        major_dimension: str = "ROWS") -> list[list[list[str]]]:
+        results = await self._timed(tab, "batch_get", self.transport.batch_get, tab, ranges, major_dimension)
+        self._count(tab, "batch_get", [row for values in results for row in values])
+        return results
+
+    async def append_rows(self, tab: str, rows: list[list[str]]) -> dict:
+        response = await self._timed(tab, "append_rows", self.transport.append_rows, tab, rows)
+        self._count(tab, "append_rows", rows)
+        return response
+
+    async def batch_update(self, tab: str, data: list[dict]) -> dict:
+        response = await self._timed(tab, "batch_update", self.transport.batch_update, tab, data)
+        self._count(tab, "batch_update", [row for item in data for row in item["values"]])
+        return response
+
+    async def close(self) -> None:
+        await self.transport.close()
+
+    async def _timed(self, tab: str, op: str, fn, *args):
+        started = time.perf_counter()
+        try:
+            return await fn(*args)
+        except Exception as e:
+            SHEETS_ERRORS.labels(tab, op, str(getattr(e, "code", None) or type(e).__name__)).inc()
+            raise
+        finally:
+            SHEETS_SECONDS.labels(tab, op).observe(time.perf_counter() - started)
+
+    def _count(self, tab: str, op: str, rows: list[list[str]]) -> None:
+        SHEETS_ROWS.labels(tab, op).inc(len(rows))
+        SHEETS_BYTES.labels(tab, op).inc(_size(rows))
+
+async def handle(request: web.Request) -> web.Response:
+    """aiohttp handler serving the metrics in the Prometheus text format."""
+    return web.Response(body=generate_latest(), headers={"Content-Type": CONTENT_TYPE_LATEST})
+
+async def start_server(port: int, host: str = METRICS_HOST) -> web.AppRunner:
+    """Serve /metrics on its own port, apart from the public webhook app."""
+    app = web.Application()
+    app.router.add_get("/metrics", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
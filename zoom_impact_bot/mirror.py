@@ -0,0 +1,406 @@
+"""On-disk SQLite mirror of the spreadsheet.
+
+Reads are answered from the mirror with indexed queries. Writes land in
+the mirror first, together with an outbox entry. A background MirrorSync
+then pushes the outbox to the sheet and pulls fresh copies of the tabs.
+The bot keeps answering from the last synced state while Google is slow
+or unreachable.
+"""
+import asyncio
+import json
+import sqlite3
+import time
+from datetime import date, datetime, time as dtime, timedelta
+from typing import Awaitable, Callable, NamedTuple
+
+from zoom_impact_bot import scheduler
+from zoom_impact_bot.indexes import (EVENT_COLUMNS, RECOGNITION_COLUMNS, TZ, _key, append_start_row,
+                                     parse_event_row, versions)
+from zoom_impact_bot.sheets_api import column_letter, row_cells
+
+TABS = ("Events", "Recognitions", "UserRoles", "Templates", "EventTypes", "Recognition-Categories")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rows (
+    tab TEXT NOT NULL,
+    row_index INTEGER NOT NULL,
+    cells TEXT NOT NULL,
+    PRIMARY KEY (tab, row_index)
+);
+CREATE TABLE IF NOT EXISTS events (
+    row_index INTEGER PRIMARY KEY,
+    type TEXT, date TEXT, time TEXT, zoom_link TEXT, mc TEXT,
+    presenter TEXT, impact TEXT, status TEXT, notes TEXT,
+    start TEXT NOT NULL,
+    timed INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_start ON events (start);
+CREATE TABLE IF NOT EXISTS recognitions (
+    row_index INTEGER PRIMARY KEY,
+    upline TEXT, downline TEXT, category TEXT, month TEXT, remarks TEXT,
+    month_key TEXT NOT NULL,
+    category_key TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS recognitions_month ON recognitions (month_key, row_index);
+CREATE INDEX IF NOT EXISTS recognitions_category ON recognitions (category_key, row_index);
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    tab TEXT NOT NULL,
+    op TEXT NOT NULL,
+    row_index INTEGER NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sending (
+    id INTEGER PRIMARY KEY,
+    base INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS synced (
+    tab TEXT PRIMARY KEY,
+    at REAL NOT NULL
+);
+"""
+
+class OutboxEntry(NamedTuple):
+    id: int
+    tab: str
+    op: str
+    row_index: int
+    payload: list | dict
+
+class SheetMirror:
+    """SQLite copy of the bot's tabs plus an outbox of writes not yet in the sheet.
+
+    Every tab is kept as raw rows. Events and Recognitions are also kept in
+    typed tables indexed by start time, month and category.
+    """
+
+    def __init__(self, path: str, tz=TZ, queue_writes: bool = True):
+        self.tz = tz
+        # Without a sheet to push to (a standalone local database) writes skip the outbox
+        self.queue_writes = queue_writes
+        self._db = sqlite3.connect(path, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+        self._versions: dict[str, int] = {}
+
+    def close(self) -> None:
+        self._db.close()
+
+    # Sheet -> mirror
+
+    def replace(self, tab: str, values: list[list[str]]) -> None:
+        """Replace a tab's mirrored rows with freshly pulled values."""
+        self._versions[tab] = next(versions)
+        with self._transaction():
+            self._db.execute("DELETE FROM rows WHERE tab = ?", (tab,))
+            if tab == "Events":
+                self._db.execute("DELETE FROM events")
+            elif tab == "Recognitions":
+                self._db.execute("DELETE FROM recognitions")
+            for row_index, row in enumerate(values, start=1):
+                self._put(tab, row_index, row)
+            self._db.execute("INSERT OR REPLACE INTO synced (tab, at) VALUES (?, ?)", (tab, time.time()))
+
+    def version(self, tab: str) -> int:
+        """Changes whenever a row of the tab is written through this mirror."""
+        return self._versions.setdefault(tab, next(versions))
+
+    def synced_at(self, tab: str) -> float | None:
+        found = self._db.execute("SELECT at FROM synced WHERE tab = ?", (tab,)).fetchone()
+        return found[0] if found else None
+
+    # Reads
+
+    def values(self, tab: str) -> list[list[str]]:
+        """A tab's rows as the Sheets API would return them, gaps filled with empty rows."""
+        values: list[list[str]] = []
+        for row_index, cells in self._db.execute(
+                "SELECT row_index, cells FROM rows WHERE tab = ? ORDER BY row_index", (tab,)):
+            values.extend([] for _ in range(row_index - 1 - len(values)))
+            values.append(json.loads(cells))
+        return values
+
+    def next_event(self, now: datetime) -> tuple[int, tuple[str, ...]] | None:
+        """First timed event starting at or after now, as (row_index, cells)."""
+        found = self._db.execute(
+            f"SELECT row_index, {self._event_columns} FROM events WHERE timed AND start >= ? "
+            "ORDER BY start, row_index LIMIT 1", (now.astimezone(self.tz).isoformat(),)).fetchone()
+        return (found[0], tuple(found[1:])) if found else None
+
+    def events_between(self, first: date, last: date) -> list[tuple[int, tuple[str, ...]]]:
+        """Events dated first..last inclusive, in start order, as (row_index, cells)."""
+        lo = datetime.combine(first, dtime.min, tzinfo=self.tz).isoformat()
+        hi = datetime.combine(last + timedelta(days=1), dtime.min, tzinfo=self.tz).isoformat()
+        return [(found[0], tuple(found[1:])) for found in self._db.execute(
+            f"SELECT row_index, {self._event_columns} FROM events WHERE start >= ? AND start < ? "
+            "ORDER BY start, row_index", (lo, hi))]
+
+    def recognitions(self, month: str | None = None, category: str | None = None) -> list[tuple[str, ...]]:
+        """(upline, downline, category, month, remarks) rows matching the filters, in sheet order."""
+        where, params = [], []
+        if month:
+            where.append("month_key = ?")
+            params.append(_key(month))
+        if category:
+            where.append("category_key = ?")
+            params.append(_key(category))
+        clause = f"WHERE {' AND '.join(where)} " if where else ""
+        return [tuple(found) for found in self._db.execute(
+            f"SELECT upline, downline, category, month, remarks FROM recognitions {clause}ORDER BY row_index",
+            params)]
+
+    def months(self) -> list[str]:
+        """Distinct recognition months, spelled as first seen, sorted."""
+        # SQLite takes the bare month column from the row holding MIN(row_index)
+        return sorted(found[0] for found in self._db.execute(
+            "SELECT month, MIN(row_index) FROM recognitions WHERE month_key != '' GROUP BY month_key"))
+
+    # Local writes
+
+    def append(self, tab: str, row: list[str]) -> int:
+        """Add a row after the last mirrored one and queue it for the sheet; returns its row number."""
+        with self._transaction():
+            found = self._db.execute("SELECT MAX(row_index) FROM rows WHERE tab = ?", (tab,)).fetchone()
+            row_index = (found[0] or 1) + 1
+            self._put(tab, row_index, row)
+            if self.queue_writes:
+                self._enqueue(tab, "append", row_index, row)
+        return row_index
+
+    def patch(self, tab: str, row_index: int, columns: dict[int, str]) -> None:
+        """Overwrite some 0-based columns of a row and queue the update for the sheet."""
+        with self._transaction():
+            found = self._db.execute(
+                "SELECT cells FROM rows WHERE tab = ? AND row_index = ?", (tab, row_index)).fetchone()
+            row = json.loads(found[0]) if found else []
+            for column, value in columns.items():
+                row += [""] * (column + 1 - len(row))
+                row[column] = value
+            self._put(tab, row_index, row)
+            if self.queue_writes:
+                self._enqueue(tab, "update", row_index, {str(column): value for column, value in columns.items()})
+
+    # Outbox
+
+    def outbox(self) -> list[OutboxEntry]:
+        return [OutboxEntry(id, tab, op, row_index, json.loads(payload)) for id, tab, op, row_index, payload in
+                self._db.execute("SELECT id, tab, op, row_index, payload FROM outbox ORDER BY id")]
+
+    def pending(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+
+    def done(self, ids: list[int]) -> None:
+        with self._transaction():
+            self._db.executemany("DELETE FROM outbox WHERE id = ?", [(id,) for id in ids])
+            self._db.executemany("DELETE FROM sending WHERE id = ?", [(id,) for id in ids])
+
+    def sending(self, ids: list[int], base: int) -> None:
+        """Note the sheet's row count before appending these entries, in case the append's outcome is lost."""
+        self._db.executemany("INSERT OR REPLACE INTO sending (id, base) VALUES (?, ?)", [(id, base) for id in ids])
+
+    def sent(self, id: int) -> int | None:
+        """Row count noted before an earlier attempt to append this entry, if there was one."""
+        found = self._db.execute("SELECT base FROM sending WHERE id = ?", (id,)).fetchone()
+        return found[0] if found else None
+
+    def renumber(self, tab: str, moves: dict[int, int]) -> None:
+        """Move rows whose append landed elsewhere in the sheet, and re-aim queued edits at them."""
+        moves = {old: new for old, new in moves.items() if old != new}
+        if not moves:
+            return
+        with self._transaction():
+            rows = {old: self._db.execute("SELECT cells FROM rows WHERE tab = ? AND row_index = ?",
+                                          (tab, old)).fetchone() for old in moves}
+            for old in moves:
+                self._delete(tab, old)
+            for old, new in moves.items():
+                if rows[old] is not None:
+                    self._put(tab, new, json.loads(rows[old][0]))
+            for entry in self.outbox():
+                if entry.tab == tab and entry.row_index in moves:
+                    self._db.execute("UPDATE outbox SET row_index = ? WHERE id = ?",
+                                     (moves[entry.row_index], entry.id))
+
+    def stats(self) -> dict:
+        return {
+            "rows": dict(self._db.execute("SELECT tab, COUNT(*) FROM rows GROUP BY tab").fetchall()),
+            "pending": self.pending(),
+            "synced": dict(self._db.execute("SELECT tab, at FROM synced").fetchall()),
+        }
+
+    # Internals
+
+    _event_columns = "type, date, time, zoom_link, mc, presenter, impact, status, notes"
+
+    def _transaction(self):
+        return _Transaction(self._db)
+
+    def _enqueue(self, tab: str, op: str, row_index: int, payload) -> None:
+        self._db.execute("INSERT INTO outbox (tab, op, row_index, payload) VALUES (?, ?, ?, ?)",
+                         (tab, op, row_index, json.dumps(payload)))
+
+    def _delete(self, tab: str, row_index: int) -> None:
+        self._versions[tab] = next(versions)
+        self._db.execute("DELETE FROM rows WHERE tab = ? AND row_index = ?", (tab, row_index))
+        if tab == "Events":
+            self._db.execute("DELETE FROM events WHERE row_index = ?", (row_index,))
+        elif tab == "Recognitions":
+            self._db.execute("DELETE FROM recognitions WHERE row_index = ?", (row_index,))
+
+    def _put(self, tab: str, row_index: int, row: list[str]) -> None:
+        self._delete(tab, row_index)
+        self._db.execute("INSERT INTO rows (tab, row_index, cells) VALUES (?, ?, ?)",
+                         (tab, row_index, json.dumps(list(row))))
+        # Header rows only live in the raw table
+        if row_index == 1:
+            return
+        if tab == "Events":
+            cells = tuple(row[:EVENT_COLUMNS]) + ("",) * (EVENT_COLUMNS - len(row))
+            record = parse_event_row(row_index, cells, self.tz)
+            if record is not None:
+                self._db.execute(
+                    f"INSERT INTO events (row_index, {self._event_columns}, start, timed) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (row_index, *cells, record.start.isoformat(), int(record.timed)))
+        elif tab == "Recognitions":
+            cells = list(row[:RECOGNITION_COLUMNS]) + [""] * (RECOGNITION_COLUMNS - len(row))
+            # Skip blank rows
+            if any(cell.strip() for cell in cells):
+                upline, downline, category, month, remarks = cells
+                self._db.execute(
+                    "INSERT INTO recognitions VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (row_index, upline, downline, category.strip(), month.strip(), remarks,
+                     _key(month), _key(category)))
+
+class _Transaction:
+    def __init__(self, db: sqlite3.Connection):
+        self._db = db
+
+    def __enter__(self):
+        self._db.execute("BEGIN")
+
+    def __exit__(self, exc_type, exc, tb):
+        self._db.execute("ROLLBACK" if exc_type else "COMMIT")
+
+class MirrorSync:
+    """Background two-way sync between a SheetMirror and the spreadsheet.
+
+    Each round pushes the outbox in order, grouping consecutive appends to
+    a tab into one request. Only once nothing is left to push does it pull
+    every tab, so local writes are never overwritten by a stale copy. A
+    failed round keeps the outbox and is retried on the next one.
+
+    An append that timed out or failed with a 5xx may still have landed.
+    The tab's row count is noted before each append, and a retry first
+    looks below it for the rows. Rows already in the sheet are not sent
+    again.
+    """
+
+    def __init__(self, mirror: SheetMirror, transport: Callable[[], Awaitable], interval: float = 60,
+                 tabs: tuple[str, ...] = TABS, on_pull: Callable[[str], None] | None = None):
+        self.mirror = mirror
+        self._transport = transport
+        self.interval = interval
+        self.tabs = tabs
+        self._on_pull = on_pull
+        self._wake = asyncio.Event()
+        self.ready = asyncio.Event()
+        self.rounds = 0
+        self.pushed = 0
+        self.errors = 0
+        if all(mirror.synced_at(tab) is not None for tab in tabs):
+            # A previous run left a complete copy; serve it until the first pull
+            self.ready.set()
+
+    def poke(self) -> None:
+        """Start the next round now instead of after the interval."""
+        self._wake.set()
+
+    async def run(self) -> None:
+        # Runs in its own task, so this only demotes the sync's own Sheets calls
+        scheduler.priority.set(scheduler.BACKGROUND)
+        while True:
+            try:
+                await self.sync_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.errors += 1
+                print(f"Mirror sync failed: {e}")
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    async def sync_once(self) -> None:
+        await self.push()
+        if self.mirror.pending():
+            return
+        transport = await self._transport()
+        pulled = await asyncio.gather(*(transport.get_values(tab) for tab in self.tabs))
+        # Writes made while the pull was in flight would be lost by replacing now
+        if self.mirror.pending():
+            return
+        for tab, values in zip(self.tabs, pulled):
+            self.mirror.replace(tab, values)
+            if self._on_pull is not None:
+                self._on_pull(tab)
+        self.rounds += 1
+        self.ready.set()
+
+    async def push(self) -> None:
+        transport = await self._transport()
+        entries = self.mirror.outbox()
+        while entries:
+            first = entries[0]
+            if first.op == "append":
+                batch = [first]
+                for entry in entries[1:]:
+                    if entry.op != "append" or entry.tab != first.tab:
+                        break
+                    batch.append(entry)
+                base = self.mirror.sent(first.id)
+                start = None
+                if base is not None:
+                    # Only the entries of the earlier attempt can have landed
+                    batch = [entry for entry in batch if self.mirror.sent(entry.id) == base]
+                    start = await self._landed(transport, first.tab, base, [entry.payload for entry in batch])
+                else:
+                    base = len(await transport.get_values(first.tab, "A:A"))
+                    self.mirror.sending([entry.id for entry in batch], base)
+                if start is None:
+                    response = await transport.append_rows(first.tab, [entry.payload for entry in batch])
+                    start = append_start_row(response)
+                if start:
+                    self.mirror.renumber(first.tab, {entry.row_index: start + offset
+                                                     for offset, entry in enumerate(batch)})
+            else:
+                batch = [first]
+                columns = {int(column): value for column, value in first.payload.items()}
+                await transport.batch_update(first.tab, row_cells(first.row_index, columns))
+            self.mirror.done([entry.id for entry in batch])
+            self.pushed += len(batch)
+            # Renumbering may have re-aimed later entries
+            entries = self.mirror.outbox()
+
+    @staticmethod
+    async def _landed(transport, tab: str, base: int, rows: list[list[str]]) -> int | None:
+        """First sheet row of rows if they are already in the sheet below row base, else None."""
+        width = max(max(len(row) for row in rows), 1)
+        below = await transport.get_values(tab, f"A{base + 1}:{column_letter(width - 1)}")
+        wanted = [_trimmed(row) for row in rows]
+        below = [_trimmed(row) for row in below]
+        for offset in range(len(below) - len(wanted) + 1):
+            if below[offset:offset + len(wanted)] == wanted:
+                return base + 1 + offset
+        return None
+
+    def stats(self) -> dict:
+        return {**self.mirror.stats(), "rounds": self.rounds, "pushed": self.pushed, "errors": self.errors}
+
+def _trimmed(row: list) -> list[str]:
+    cells = [str(cell) for cell in row]
+    while cells and not cells[-1]:
+        cells.pop()
+    return cells
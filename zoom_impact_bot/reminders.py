@@ -0,0 +1,193 @@
+"""Event reminders sent ahead of each event's start.
+
+Every lead time (say 24h, 1h and 10m) of every upcoming event becomes an
+entry in a min-heap of fire times. The scheduler sleeps until the
+earliest one, so waiting costs nothing however many events are ahead.
+A periodic sync compares the upcoming events with the ones it knows.
+Only new or edited rows get fresh entries; the entries of edited or
+removed rows are skipped when they reach the top of the heap.
+"""
+import asyncio
+import heapq
+import itertools
+import os
+import re
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, NamedTuple
+
+from zoom_impact_bot import scheduler
+from zoom_impact_bot.rows import parse_dt
+from zoom_impact_bot.sheets import TZ
+
+# Comma-separated lead times before an event's start, e.g. "24h,1h,10m" (empty, the default: no reminders).
+# The schedule lives in this process, so enable it on one replica only or every reminder is sent twice.
+REMINDERS = os.getenv("REMINDERS", "")
+# Seconds between checks of the Events tab for new or edited events
+REMINDER_SYNC_INTERVAL = float(os.getenv("REMINDER_SYNC_INTERVAL", "60"))
+# Reminders due longer ago than this (e.g. while the bot was down) are dropped, not sent late
+REMINDER_LATE_LIMIT = timedelta(minutes=5)
+
+_UNITS = {"d": "days", "h": "hours", "m": "minutes"}
+
+def parse_leads(spec: str) -> list[timedelta]:
+    """Lead times from a spec like "24h,1h,10m", longest first."""
+    leads = set()
+    for part in spec.split(","):
+        part = part.strip().lower()
+        if not part:
+            continue
+        match = re.fullmatch(r"(\d+)\s*([dhm])", part)
+        if not match:
+            raise SystemExit(f"Invalid REMINDERS entry {part!r}; use numbers with d, h or m, e.g. 24h,1h,10m.")
+        leads.add(timedelta(**{_UNITS[match[2]]: int(match[1])}))
+    return sorted(leads, reverse=True)
+
+def describe(lead: timedelta) -> str:
+    """A lead time in words, e.g. "1 hour" or "10 minutes"."""
+    minutes = int(lead.total_seconds()) // 60
+    for size, unit in ((1440, "day"), (60, "hour"), (1, "minute")):
+        if minutes % size == 0 and minutes >= size:
+            count = minutes // size
+            return f"{count} {unit}{'s' if count != 1 else ''}"
+    return f"{minutes} minutes"
+
+class Reminder(NamedTuple):
+    fire_at: datetime
+    row_index: int
+    lead: timedelta
+    version: int
+
+class _Row(NamedTuple):
+    cells: tuple
+    version: int
+    event: dict
+
+# Sends one reminder: the event and how long before its start it is
+Notify = Callable[[dict, timedelta], Awaitable[None]]
+# Upcoming events as (row_index, event dict), like EventsRepo.upcoming()
+Source = Callable[[], Awaitable[list[tuple[int, dict]]]]
+
+class ReminderScheduler:
+    def __init__(self, leads: list[timedelta], tz=TZ):
+        self.leads = leads
+        self.tz = tz
+        self._heap: list[Reminder] = []
+        self._rows: dict[int, _Row] = {}
+        self._versions = itertools.count(1)
+        self._wake = asyncio.Event()
+        self._sending: set[asyncio.Task] = set()
+        self.synced = 0
+        self.changed = 0
+        self.sent = 0
+        self.dropped = 0
+
+    @property
+    def horizon(self) -> timedelta:
+        """How far ahead events matter: the longest lead plus one sync interval."""
+        return max(self.leads, default=timedelta()) + timedelta(seconds=REMINDER_SYNC_INTERVAL)
+
+    def sync(self, events: list[tuple[int, dict]], now: datetime | None = None) -> int:
+        """Bring the heap up to date with the upcoming events; returns how many rows changed."""
+        now = now or datetime.now(self.tz)
+        top = self._heap[0] if self._heap else None
+        seen = set()
+        changed = 0
+        for row_index, event in events:
+            seen.add(row_index)
+            cells = tuple(event.values())
+            known = self._rows.get(row_index)
+            if known is not None and known.cells == cells:
+                continue
+            changed += 1
+            version = next(self._versions)
+            self._rows[row_index] = _Row(cells, version, event)
+            start = parse_dt(event.get("date", ""), event.get("time", ""))
+            if start is None:
+                continue
+            for lead in self.leads:
+                if start - lead > now:
+                    heapq.heappush(self._heap, Reminder(start - lead, row_index, lead, version))
+        for row_index in self._rows.keys() - seen:
+            del self._rows[row_index]
+            changed += 1
+        if changed:
+            self._compact()
+        self.synced += 1
+        self.changed += changed
+        # Sleeping until the old top would be wrong if an earlier reminder arrived or the top went stale
+        if (self._heap[0] if self._heap else None) != top or (top and not self._current(top)):
+            self._wake.set()
+        return changed
+
+    def due(self, now: datetime | None = None) -> list[tuple[dict, timedelta]]:
+        """Pop every reminder whose time has come, as (event, lead)."""
+        now = now or datetime.now(self.tz)
+        fired = []
+        while self._heap and self._heap[0].fire_at <= now:
+            reminder = heapq.heappop(self._heap)
+            if not self._current(reminder):
+                continue
+            if now - reminder.fire_at > REMINDER_LATE_LIMIT:
+                self.dropped += 1
+                continue
+            fired.append((self._rows[reminder.row_index].event, reminder.lead))
+        return fired
+
+    def next_fire(self) -> datetime | None:
+        while self._heap and not self._current(self._heap[0]):
+            heapq.heappop(self._heap)
+        return self._heap[0].fire_at if self._heap else None
+
+    async def run(self, source: Source, notify: Notify) -> None:
+        """Sync periodically and send reminders as they fall due, until cancelled."""
+        syncing = asyncio.create_task(self._sync_forever(source))
+        try:
+            while True:
+                fire_at = self.next_fire()
+                timeout = None if fire_at is None else max(0.0, (fire_at - datetime.now(self.tz)).total_seconds())
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                self._wake.clear()
+                for event, lead in self.due():
+                    # A slow broadcast must not hold back the next reminder
+                    task = asyncio.create_task(self._send(notify, event, lead))
+                    self._sending.add(task)
+                    task.add_done_callback(self._sending.discard)
+        finally:
+            syncing.cancel()
+
+    def stats(self) -> dict:
+        return {"rows": len(self._rows), "pending": len(self._heap), "synced": self.synced,
+                "changed": self.changed, "sent": self.sent, "dropped": self.dropped}
+
+    async def _sync_forever(self, source: Source) -> None:
+        # Runs in its own task, so only its own Sheets calls are demoted
+        scheduler.priority.set(scheduler.BACKGROUND)
+        while True:
+            try:
+                self.sync(await source())
+            except Exception as e:
+                print(f"Error syncing reminders: {e}")
+            await asyncio.sleep(REMINDER_SYNC_INTERVAL)
+
+    async def _send(self, notify: Notify, event: dict, lead: timedelta) -> None:
+        try:
+            await notify(event, lead)
+            self.sent += 1
+        except Exception as e:
+            print(f"Error sending {describe(lead)} reminder for {event.get('type')} on {event.get('date')}: {e}")
+
+    def _current(self, reminder: Reminder) -> bool:
+        row = self._rows.get(reminder.row_index)
+        return row is not None and row.version == reminder.version
+
+    def _compact(self) -> None:
+        """Drop stale entries once they make up most of the heap."""
+        live = [reminder for reminder in self._heap if self._current(reminder)]
+        if len(live) * 2 < len(self._heap):
+            heapq.heapify(live)
+            self._heap = live
+
+reminders = ReminderScheduler(parse_leads(REMINDERS))
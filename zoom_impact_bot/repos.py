@@ -0,0 +1,349 @@
+"""Data access for the command handlers, behind interchangeable backends.
+
+Handlers talk to four repositories (events, recognitions, roles and
+reference data) instead of calling sheets directly. DATA_BACKEND selects
+where they read and write:
+
+- "sheets": the spreadsheet, through the cached indexes in sheets.py
+  (and its SHEETS_MIRROR, when configured)
+- "sqlite": a local SQLite database with the mirror's schema, never synced
+- "memory": plain in-memory indexes, for benchmarks and throwaway runs
+"""
+import os
+from datetime import date, datetime, timedelta
+from typing import NamedTuple, Protocol
+
+from zoom_impact_bot import sheets
+from zoom_impact_bot.indexes import EventsIndex, RecognitionsStore, RoleIndex, ValuesTab
+from zoom_impact_bot.mirror import SheetMirror
+from zoom_impact_bot.rows import (Choices, Parsed, event_columns, event_dict, event_row, events_for_date,
+                                  filter_recognitions, mirror_events, next_event, parse_categories, parse_event_types,
+                                  parse_user_roles, records, role_fields, template_url, transpose, upcoming_events)
+from zoom_impact_bot.sheets import TZ
+
+# "sheets", "sqlite" or "memory"
+DATA_BACKEND = os.getenv("DATA_BACKEND", "sheets").strip().lower()
+# Database file of the sqlite backend; a copy of a SHEETS_MIRROR file can be used as is
+DATA_SQLITE_PATH = os.getenv("DATA_SQLITE_PATH", "zoom_impact_bot.sqlite3")
+
+class EventsRepo(Protocol):
+    async def next_event(self) -> dict | None: ...
+    async def for_date(self, target_date: date) -> list[dict]: ...
+    async def upcoming(self, limit_days: int) -> list[tuple[int, dict]]: ...
+    async def add(self, event_type: str, event_date: str, event_time: str, zoom_link: str,
+                  mc: str, presenter: str, impacts: list[str],
+                  status: str = "Scheduled", notes: str = "") -> None: ...
+    async def update_roles(self, event_row_index: int, mc: str | None = None, presenter: str | None = None,
+                           impacts: list[str] | None = None) -> None: ...
+
+class RecognitionsRepo(Protocol):
+    async def add(self, upline: str, downline: str, category: str, month: str, remarks: str) -> None: ...
+    async def query(self, month: str | None = None, category: str | None = None) -> list[dict]: ...
+    async def months(self) -> Choices: ...
+
+class RolesRepo(Protocol):
+    async def roles(self, user_id: int) -> tuple[str, ...]: ...
+    async def assignable(self) -> tuple[Choices, Choices, Choices]: ...
+    async def users(self) -> list[int]: ...
+
+class ReferenceDataRepo(Protocol):
+    async def template(self, key: str) -> str | None: ...
+    async def categories(self) -> Choices: ...
+    async def event_types(self) -> Choices: ...
+
+class Repos(NamedTuple):
+    events: EventsRepo
+    recognitions: RecognitionsRepo
+    roles: RolesRepo
+    reference: ReferenceDataRepo
+
+# Picker choices of the sqlite and memory backends, parsed once per version of their data
+_parsed = Parsed()
+
+# Sheets: the existing async facade
+
+class SheetsEvents:
+    async def next_event(self) -> dict | None:
+        return await sheets.aget_next_event()
+
+    async def for_date(self, target_date: date) -> list[dict]:
+        return await sheets.alist_events_for_date(target_date)
+
+    async def upcoming(self, limit_days: int) -> list[tuple[int, dict]]:
+        return await sheets.alist_upcoming_events(limit_days)
+
+    async def add(self, *args, **kwargs) -> None:
+        await sheets.aadd_event(*args, **kwargs)
+
+    async def update_roles(self, event_row_index: int, mc: str | None = None, presenter: str | None = None,
+                           impacts: list[str] | None = None) -> None:
+        await sheets.aupdate_event_roles(event_row_index, mc, presenter, impacts)
+
+class SheetsRecognitions:
+    async def add(self, upline, downline, category, month, remarks) -> None:
+        await sheets.aadd_recognition(upline, downline, category, month, remarks)
+
+    async def query(self, month=None, category=None) -> list[dict]:
+        return await sheets.aget_recognitions(month, category)
+
+    async def months(self) -> Choices:
+        return await sheets.aget_available_months()
+
+class SheetsRoles:
+    async def roles(self, user_id: int) -> tuple[str, ...]:
+        return await sheets.role_index.roles(user_id)
+
+    async def assignable(self) -> tuple[Choices, Choices, Choices]:
+        return await sheets.aget_user_roles()
+
+    async def users(self) -> list[int]:
+        return await _user_ids(sheets.role_index)
+
+class SheetsReference:
+    async def template(self, key: str) -> str | None:
+        return await sheets.aget_template(key)
+
+    async def categories(self) -> Choices:
+        return await sheets.aget_categories()
+
+    async def event_types(self) -> Choices:
+        return await sheets.aget_event_types()
+
+async def _user_ids(index: RoleIndex) -> list[int]:
+    try:
+        await index.get()
+    except Exception as e:
+        print(f"Error getting user IDs from UserRoles: {e}")
+        return []
+    return index.user_ids()
+
+def sheets_repos() -> Repos:
+    return Repos(SheetsEvents(), SheetsRecognitions(), SheetsRoles(), SheetsReference())
+
+# SQLite: indexed queries on a local database
+
+class SqliteEvents:
+    def __init__(self, db: SheetMirror):
+        self.db = db
+
+    async def next_event(self) -> dict | None:
+        try:
+            found = self.db.next_event(datetime.now(TZ))
+            return event_dict(list(found[1])) if found else None
+        except Exception as e:
+            print(f"Error getting next event: {e}")
+            return None
+
+    async def for_date(self, target_date: date) -> list[dict]:
+        try:
+            return [event for _, event in mirror_events(self.db.events_between(target_date, target_date))]
+        except Exception as e:
+            print(f"Error listing events for date {target_date}: {e}")
+            return []
+
+    async def upcoming(self, limit_days: int) -> list[tuple[int, dict]]:
+        try:
+            today = datetime.now(TZ).date()
+            return mirror_events(self.db.events_between(today, today + timedelta(days=limit_days)))
+        except Exception as e:
+            print(f"Error listing upcoming events: {e}")
+            return []
+
+    async def add(self, *args, **kwargs) -> None:
+        self.db.append("Events", event_row(*args, **kwargs))
+
+    async def update_roles(self, event_row_index: int, mc: str | None = None, presenter: str | None = None,
+                           impacts: list[str] | None = None) -> None:
+        columns = event_columns(role_fields(mc, presenter, impacts))
+        if columns:
+            self.db.patch("Events", event_row_index, columns)
+
+class SqliteRecognitions:
+    def __init__(self, db: SheetMirror):
+        self.db = db
+
+    async def add(self, upline, downline, category, month, remarks) -> None:
+        self.db.append("Recognitions", [upline, downline, category, month, remarks])
+
+    async def query(self, month=None, category=None) -> list[dict]:
+        try:
+            keys = ('upline', 'downline', 'category', 'month', 'remarks')
+            return [dict(zip(keys, row)) for row in self.db.recognitions(month, category)]
+        except Exception as e:
+            print(f"Error getting recognitions: {e}")
+            return []
+
+    async def months(self) -> Choices:
+        try:
+            version = self.db.version("Recognitions")
+            return _parsed.get("months", version, lambda: Choices(self.db.months(), version))
+        except Exception as e:
+            print(f"Error getting available months: {e}")
+            return []
+
+class SqliteRoles:
+    def __init__(self, db: SheetMirror):
+        self.db = db
+
+        async def load() -> list[list[str]]:
+            return transpose(db.values("UserRoles"), 4)
+
+        # Role lookups run on every update, so keep them off the database like the Sheets backend does
+        self.index = RoleIndex(load, sheets.ROLES_TTL)
+
+    async def roles(self, user_id: int) -> tuple[str, ...]:
+        return await self.index.roles(user_id)
+
+    async def assignable(self) -> tuple[Choices, Choices, Choices]:
+        try:
+            version = self.db.version("UserRoles")
+            return _parsed.get("roles", version, lambda: parse_user_roles(
+                transpose(self.db.values("UserRoles"), 4)[1:], version))
+        except Exception as e:
+            print(f"Error getting user roles from UserRoles table: {e}")
+            return [], [], []
+
+    async def users(self) -> list[int]:
+        return await _user_ids(self.index)
+
+class SqliteReference:
+    def __init__(self, db: SheetMirror):
+        self.db = db
+
+    async def template(self, key: str) -> str | None:
+        return template_url(records(self.db.values("Templates")), key)
+
+    async def categories(self) -> Choices:
+        try:
+            version = self.db.version("Recognition-Categories")
+            return _parsed.get("categories", version, lambda: parse_categories(
+                transpose(self.db.values("Recognition-Categories"), 1)[0], version))
+        except Exception as e:
+            print(f"Error getting categories from Recognition-Categories table: {e}")
+            return []
+
+    async def event_types(self) -> Choices:
+        try:
+            version = self.db.version("EventTypes")
+            return _parsed.get("event_types", version, lambda: parse_event_types(
+                transpose(self.db.values("EventTypes"), 1)[0], version))
+        except Exception as e:
+            print(f"Error getting event types from EventTypes table: {e}")
+            if "No event types found" in str(e):
+                raise
+            return []
+
+def sqlite_repos(path: str = DATA_SQLITE_PATH) -> Repos:
+    db = SheetMirror(path, TZ, queue_writes=False)
+    return Repos(SqliteEvents(db), SqliteRecognitions(db), SqliteRoles(db), SqliteReference(db))
+
+# Memory: the Sheets backend's indexes, filled once and never reloaded
+
+# Header rows of an empty in-memory sheet
+EMPTY_TABS = {
+    "Events": [["Type", "Date", "Time", "Zoom Link", "MC", "Presenter", "Impact", "Status", "Notes"]],
+    "Recognitions": [["Upline", "Downline", "Category", "Month", "Remarks"]],
+    "UserRoles": [["Admins", "MCs", "Presenters", "Impact Speakers"]],
+    "Templates": [["key", "url"]],
+    "EventTypes": [["Event Type"]],
+    "Recognition-Categories": [["Category"]],
+}
+
+class MemoryEvents:
+    def __init__(self, values: list[list[str]]):
+        self.index = EventsIndex(tz=TZ)
+        self.index.load(values)
+
+    async def next_event(self) -> dict | None:
+        return next_event(self.index)
+
+    async def for_date(self, target_date: date) -> list[dict]:
+        return events_for_date(self.index, target_date)
+
+    async def upcoming(self, limit_days: int) -> list[tuple[int, dict]]:
+        return upcoming_events(self.index, limit_days)
+
+    async def add(self, *args, **kwargs) -> None:
+        self.index.add(self.index.rows + 1, event_row(*args, **kwargs))
+
+    async def update_roles(self, event_row_index: int, mc: str | None = None, presenter: str | None = None,
+                           impacts: list[str] | None = None) -> None:
+        self.index.patch(event_row_index, event_columns(role_fields(mc, presenter, impacts)))
+
+class MemoryRecognitions:
+    def __init__(self, values: list[list[str]]):
+        self.store = RecognitionsStore()
+        self.store.load(values)
+
+    async def add(self, upline, downline, category, month, remarks) -> None:
+        self.store.add(self.store.rows + 1, [upline, downline, category, month, remarks])
+
+    async def query(self, month=None, category=None) -> list[dict]:
+        return filter_recognitions(self.store, month, category)
+
+    async def months(self) -> Choices:
+        return _parsed.get("months", self.store.version, lambda: Choices(self.store.months(), self.store.version))
+
+class MemoryRoles:
+    def __init__(self, values: list[list[str]]):
+        # Nothing to reload from, so the loaded index never expires
+        self.index = RoleIndex(ttl=float("inf"))
+        self.index.load(transpose(values, 4))
+
+    async def roles(self, user_id: int) -> tuple[str, ...]:
+        return await self.index.roles(user_id)
+
+    async def assignable(self) -> tuple[Choices, Choices, Choices]:
+        return _parsed.get("roles", self.index.version, lambda: parse_user_roles(
+            self.index.columns[1:], self.index.version))
+
+    async def users(self) -> list[int]:
+        return self.index.user_ids()
+
+class MemoryReference:
+    def __init__(self, templates: list[list[str]], categories: list[list[str]], event_types: list[list[str]]):
+        self.templates = ValuesTab()
+        self.templates.load(templates)
+        self.categories_tab = ValuesTab()
+        self.categories_tab.load(categories)
+        self.event_types_tab = ValuesTab()
+        self.event_types_tab.load(event_types)
+
+    async def template(self, key: str) -> str | None:
+        return template_url(records(self.templates.values), key)
+
+    async def categories(self) -> Choices:
+        tab = self.categories_tab
+        return _parsed.get("categories", tab.version, lambda: parse_categories(tab.column(0), tab.version))
+
+    async def event_types(self) -> Choices:
+        tab = self.event_types_tab
+        return _parsed.get("event_types", tab.version, lambda: parse_event_types(tab.column(0), tab.version))
+
+def memory_repos(tabs: dict[str, list[list[str]]] | None = None) -> Repos:
+    """Repositories over the given tab values (header row first), empty tabs where missing."""
+    tabs = {**EMPTY_TABS, **(tabs or {})}
+    return Repos(MemoryEvents(tabs["Events"]), MemoryRecognitions(tabs["Recognitions"]),
+                 MemoryRoles(tabs["UserRoles"]),
+                 MemoryReference(tabs["Templates"], tabs["Recognition-Categories"], tabs["EventTypes"]))
+
+def create(backend: str = DATA_BACKEND) -> Repos:
+    if backend == "sheets":
+        return sheets_repos()
+    if backend == "sqlite":
+        return sqlite_repos()
+    if backend == "memory":
+        return memory_repos()
+    raise SystemExit(f"Unknown DATA_BACKEND {backend!r}; use sheets, sqlite or memory.")
+
+events: EventsRepo
+recognitions: RecognitionsRepo
+roles: RolesRepo
+reference: ReferenceDataRepo
+
+def use(repos: Repos) -> None:
+    """Point the handlers at another set of repositories, e.g. memory_repos() in a benchmark."""
+    global events, recognitions, roles, reference
+    events, recognitions, roles, reference = repos
+
+use(create())
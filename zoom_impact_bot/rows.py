@@ -0,0 +1,159 @@
+"""Parsing and filtering of tab rows, shared by every data backend.
+
+These helpers only turn raw cell values into what the handlers use (and
+back), so sheets.py and the sqlite and memory repositories in repos.py
+answer the same questions the same way wherever the rows come from.
+"""
+from datetime import date, datetime, timedelta
+from typing import Callable, Hashable, Iterable, TypeVar
+
+from zoom_impact_bot.indexes import TZ, EventsIndex, RecognitionsStore, parse_event_row
+
+T = TypeVar("T")
+
+# Events columns A..I, in sheet order
+EVENT_FIELDS = ('type', 'date', 'time', 'zoom_link', 'mc', 'presenter', 'impact', 'status', 'notes')
+
+class Choices(tuple):
+    """Names offered by a picker, in order, tagged with the version of the data they came from.
+
+    Keyboards built from them are cached under that version (see keyboards.py).
+    """
+
+    version: Hashable = None
+
+    def __new__(cls, names: Iterable[str] = (), version: Hashable = None):
+        choices = super().__new__(cls, names)
+        choices.version = version
+        return choices
+
+class Parsed:
+    """The last parse of each source, so unchanged data is not parsed again on every request.
+
+    Results are shared by every caller until the source's version moves.
+    """
+
+    def __init__(self):
+        self._last: dict[str, tuple[Hashable, object]] = {}
+        self.parses = 0
+
+    def get(self, source: str, version: Hashable, parse: Callable[[], T]) -> T:
+        last = self._last.get(source)
+        if last is None or last[0] != version:
+            self.parses += 1
+            last = self._last[source] = (version, parse())
+        return last[1]
+
+def cell(row: list[str], index: int) -> str:
+    return row[index] if len(row) > index else ''
+
+def pad_columns(values: list[list[str]], count: int) -> list[list[str]]:
+    """Pad a column-major range so trailing empty columns are still present."""
+    return values + [[] for _ in range(count - len(values))]
+
+def transpose(values: list[list[str]], count: int) -> list[list[str]]:
+    """Turn stored rows into the first `count` columns, as a COLUMNS read would return them."""
+    return [[cell(row, i) for row in values] for i in range(count)]
+
+def records(values: list[list[str]]) -> list[dict]:
+    """Turn a header row plus data rows into dicts keyed by header."""
+    if not values:
+        return []
+    header = values[0]
+    return [{key: cell(row, i) for i, key in enumerate(header)} for row in values[1:]]
+
+def event_dict(row: list[str]) -> dict:
+    return {field: cell(row, i) for i, field in enumerate(EVENT_FIELDS)}
+
+def event_row(event_type: str, event_date: str, event_time: str, zoom_link: str,
+              mc: str, presenter: str, impacts: list[str],
+              status: str = "Scheduled", notes: str = "") -> list[str]:
+    return [event_type, event_date, event_time, zoom_link, mc, presenter,
+            ", ".join(impacts), status, notes]
+
+def event_columns(fields: dict) -> dict[int, str]:
+    """Map event field names to 0-based Events columns."""
+    unknown = set(fields) - set(EVENT_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown event fields: {', '.join(sorted(unknown))}")
+    return {EVENT_FIELDS.index(field): str(value) for field, value in fields.items()}
+
+def role_fields(mc: str | None, presenter: str | None, impacts: list[str] | None) -> dict:
+    fields = {}
+    if mc is not None:
+        fields['mc'] = mc
+    if presenter is not None:
+        fields['presenter'] = presenter
+    if impacts is not None:
+        fields['impact'] = ", ".join(impacts) if impacts else ""
+    return fields
+
+def parse_dt(date_str: str, time_str: str) -> datetime | None:
+    """Parse date and time strings into a timezone-aware datetime object."""
+    record = parse_event_row(0, ("", date_str, time_str), TZ)
+    return record.start if record and record.timed else None
+
+def upcoming_events(index: EventsIndex, limit_days: int) -> list[tuple[int, dict]]:
+    today = datetime.now(TZ).date()
+    return [(r.row_index, event_dict(r.row)) for r in index.between(today, today + timedelta(days=limit_days))]
+
+def next_event(index: EventsIndex) -> dict | None:
+    record = index.next(datetime.now(TZ))
+    return event_dict(record.row) if record else None
+
+def events_for_date(index: EventsIndex, target_date: date) -> list[dict]:
+    return [event_dict(r.row) for r in index.on(target_date)]
+
+def mirror_events(rows: list[tuple[int, tuple[str, ...]]]) -> list[tuple[int, dict]]:
+    """(row index, event) pairs from the (row index, cells) rows an SQLite mirror returns."""
+    return [(row_index, event_dict(list(cells))) for row_index, cells in rows]
+
+def filter_recognitions(store: RecognitionsStore, month=None, category=None) -> list[dict]:
+    return [{
+        'upline': r.upline,
+        'downline': r.downline,
+        'category': r.category,
+        'month': r.month,
+        'remarks': r.remarks
+    } for r in store.query(month, category)]
+
+def template_url(records: list[dict], key: str) -> str | None:
+    for row in records:
+        if str(row.get("key", "")).strip().lower() == key.lower():
+            return row.get("url")
+    return None
+
+def parse_categories(categories: list[str], version: Hashable = None) -> Choices:
+    # Remove empty strings and strip whitespace
+    categories = [cat.strip() for cat in categories if cat.strip()]
+
+    # Remove header if it exists (first row might be a header)
+    if categories and categories[0].lower() in ['category', 'categories', 'name']:
+        categories = categories[1:]
+
+    return Choices(categories, version)
+
+def parse_user_roles(columns: list[list[str]], version: Hashable = None) -> tuple[Choices, Choices, Choices]:
+    mcs, presenters, impacts = pad_columns(columns, 3)
+
+    # Process each list: filter empty, trim, remove duplicates
+    def process_role_list(role_list):
+        processed = [role.strip() for role in role_list if role.strip()]
+        # Remove header if present
+        if processed and processed[0].lower() in ['mc', 'mcs', 'presenter', 'presenters', 'impact', 'impacts', 'impact speaker', 'impact speakers']:
+            processed = processed[1:]
+        return Choices(dict.fromkeys(processed), version)  # Remove duplicates
+
+    return process_role_list(mcs), process_role_list(presenters), process_role_list(impacts)
+
+def parse_event_types(event_types: list[str], version: Hashable = None) -> Choices:
+    # Filter out empty values and skip header if present
+    event_types = [event_type.strip() for event_type in event_types if event_type.strip()]
+    # Remove header if it exists (first row might be a header)
+    if event_types and event_types[0].lower() in ['event type', 'event types', 'type', 'name']:
+        event_types = event_types[1:]
+
+    if not event_types:
+        raise ValueError("No event types found in EventTypes sheet. Please add event types to column A.")
+
+    return Choices(event_types, version)
@@ -1,27 +1,60 @@
 import os
 import asyncio
 import logging
+import time
+import argparse
+import secrets
+from aiohttp import web
 from aiogram import Bot, Dispatcher, types, F
-from aiogram.filters import Command
-from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.filters import Command, ExceptionTypeFilter
+from aiogram.fsm.storage.base import BaseStorage
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
 from dotenv import load_dotenv
 
-from zoom_impact_bot.commands import events, recognition, templates, utils, list_recognitions, event_management
+from zoom_impact_bot import metrics, repos, sheets, storage, tracing
+from zoom_impact_bot.reminders import reminders
+from zoom_impact_bot.commands import announce, events, recognition, templates, utils, list_recognitions, event_management
 
-def main():
-    load_dotenv()
+async def run_webhook(dp: Dispatcher, bot: Bot) -> None:
+    """Serve updates pushed by Telegram until cancelled.
 
-    bot_token = os.getenv("BOT_TOKEN")
-    if not bot_token:
-        raise SystemExit("BOT_TOKEN is not set. Put it in .env or export it before running.")
+    Requests are checked against the secret token and answered right away;
+    the update itself is processed in a background task.
+    """
+    base_url = os.getenv("WEBHOOK_URL", "")
+    if not base_url and os.getenv("RAILWAY_PUBLIC_DOMAIN"):
+        base_url = f"https://{os.getenv('RAILWAY_PUBLIC_DOMAIN')}"
+    if not base_url:
+        raise SystemExit("WEBHOOK_URL is not set. Set it to the bot's public HTTPS address to use webhook mode.")
+    path = os.getenv("WEBHOOK_PATH", "/webhook")
+    # Without a configured secret a fresh one is registered with Telegram on every start
+    secret = os.getenv("WEBHOOK_SECRET") or secrets.token_urlsafe(32)
+    port = int(os.getenv("PORT", "8080"))
 
-    bot = Bot(bot_token)
-    storage = MemoryStorage()
-    dp = Dispatcher(storage=storage)
+    app = web.Application()
+    # Railway's health check
+    app.router.add_get("/", lambda request: web.Response(text="ok"))
+    SimpleRequestHandler(dispatcher=dp, bot=bot, secret_token=secret).register(app, path=path)
+    setup_application(app, dp, bot=bot)
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, "0.0.0.0", port).start()
+        await bot.set_webhook(base_url.rstrip("/") + path, secret_token=secret,
+                              allowed_updates=dp.resolve_used_update_types())
+        logging.info("Serving webhook on port %s at %s", port, path)
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+def build_dispatcher(fsm_storage: BaseStorage | None = None) -> Dispatcher:
+    """Create the dispatcher with every handler and middleware registered."""
+    dp = Dispatcher(storage=fsm_storage or storage.create_storage())
 
     @dp.message(Command("start"))
     async def start(m: types.Message):
-        roles = utils.roles_for(m.from_user.id)
+        roles = await utils.roles_for(m.from_user.id)
         kb = utils.role_menu(roles)
         
         print(f"User {m.from_user.id} has roles: {roles}")
@@ -39,7 +72,7 @@ def main():
 
     @dp.message(Command("menu"))
     async def menu(m: types.Message):
-        roles = utils.roles_for(m.from_user.id)
+        roles = await utils.roles_for(m.from_user.id)
         kb = utils.role_menu(roles)
         
         print(f"User {m.from_user.id} has roles: {roles}")
@@ -55,17 +88,94 @@ def main():
         
         await m.answer(menu_text, reply_markup=kb, parse_mode="HTML")
 
+    @dp.error(ExceptionTypeFilter(*sheets.SHEETS_ERRORS))
+    async def sheets_unavailable(event: types.ErrorEvent):
+        """Tell the user to retry instead of showing an empty answer while Sheets is unavailable."""
+        print(f"Google Sheets unavailable for update {event.update.update_id}: {event.exception}")
+        text = "⏳ Google Sheets is busy right now. Please try again in a minute."
+        if event.update.callback_query:
+            await event.update.callback_query.answer(text, show_alert=True)
+        elif event.update.message:
+            await event.update.message.answer(text)
+        return True
+
+    dp.message.middleware(metrics.handler_metrics("message"))
+    dp.callback_query.middleware(metrics.handler_metrics("callback_query"))
+    dp.message.middleware(tracing.trace_updates("message"))
+    dp.callback_query.middleware(tracing.trace_updates("callback_query"))
+
     # Register command modules
     events.register(dp)
     recognition.register(dp)
     templates.register(dp)
     list_recognitions.register(dp)
     event_management.register(dp)
+    announce.register(dp)
+    return dp
+
+def main():
+    started = time.perf_counter()
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Zoom Impact Bot")
+    parser.add_argument("--mode", choices=("polling", "webhook"),
+                        default=os.getenv("BOT_MODE", "polling").strip().lower(),
+                        help="how updates are received (default: $BOT_MODE or polling)")
+    args = parser.parse_args()
+
+    bot_token = os.getenv("BOT_TOKEN")
+    if not bot_token:
+        raise SystemExit("BOT_TOKEN is not set. Put it in .env or export it before running.")
+
+    bot = Bot(bot_token)
+    dp = build_dispatcher()
+
+    # Keep references so background tasks are not garbage collected mid-flight
+    background: set[asyncio.Task] = set()
+
+    def start_background(coro) -> None:
+        task = asyncio.create_task(coro)
+        background.add(task)
+        task.add_done_callback(background.discard)
+
+    @dp.startup()
+    async def on_startup():
+        logging.info("Ready to receive updates %.2fs after start", time.perf_counter() - started)
+        if reminders.leads:
+            # Events starting within the longest lead time, counted in whole days from today
+            days = reminders.horizon.days + 1
+            start_background(reminders.run(lambda: repos.events.upcoming(days), announce.reminder_sender(bot)))
+        if repos.DATA_BACKEND != "sheets":
+            return
+        # Load the Sheets caches alongside polling; early handlers join these loads
+        start_background(sheets.warm_up())
 
     logging.basicConfig(level=logging.INFO)
     logging.info("Zoom Impact Bot starting… SHEET_NAME=%s", os.getenv("SHEET_NAME", "Zoom Impact Bot Data"))
 
-    asyncio.run(dp.start_polling(bot))
+    async def serve():
+        # /metrics is unauthenticated, so it gets its own port instead of the public webhook one
+        metrics_server = await metrics.start_server(int(metrics.METRICS_PORT)) if metrics.METRICS_PORT else None
+        sync = (asyncio.create_task(sheets.mirror_sync.run())
+                if sheets.mirror_sync and repos.DATA_BACKEND == "sheets" else None)
+        try:
+            if args.mode == "webhook":
+                await run_webhook(dp, bot)
+            else:
+                # getUpdates is refused while a webhook from an earlier webhook run is still set
+                await bot.delete_webhook()
+                await dp.start_polling(bot)
+        finally:
+            if metrics_server is not None:
+                await metrics_server.cleanup()
+            if sync is not None:
+                sync.cancel()
+            await sheets.aclose()
+
+    try:
+        asyncio.run(serve())
+    finally:
+        sheets.shutdown()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,228 @@
+"""Quota-aware scheduling for Google Sheets requests.
+
+Google limits each service account to a fixed number of read and write
+requests per minute. Every async Sheets call waits for a token from the
+matching bucket, interactive calls are served before background cache
+refreshes, and throttled (429) or failed (5xx) calls are retried with
+jittered exponential backoff until the request's deadline. Identical
+reads that overlap in time share one request.
+"""
+import asyncio
+import heapq
+import itertools
+import random
+import time
+from contextvars import ContextVar
+
+from zoom_impact_bot import tracing
+
+INTERACTIVE = 0
+BACKGROUND = 1
+
+# Priority of Sheets calls made from the current task
+priority: ContextVar[int] = ContextVar("sheets_priority", default=INTERACTIVE)
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+class SheetsBusyError(TimeoutError):
+    """A Sheets call could not complete within its deadline."""
+
+class TokenBucket:
+    def __init__(self, per_minute: float, burst: int):
+        self.rate = per_minute / 60
+        self.capacity = burst
+        self.tokens = float(burst)
+        self._updated = time.monotonic()
+
+    def try_take(self) -> bool:
+        self._fill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def wait_time(self) -> float:
+        """Seconds until the next token is available."""
+        self._fill()
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+    def _fill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+class _Gate:
+    """A token bucket with a priority queue of callers waiting for tokens."""
+
+    def __init__(self, bucket: TokenBucket):
+        self.bucket = bucket
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._pump: asyncio.Task | None = None
+        self.throttled = 0
+        self.waited = 0.0
+
+    @property
+    def depth(self) -> int:
+        return sum(1 for _, _, future in self._waiters if not future.done())
+
+    async def acquire(self, level: int, timeout: float) -> None:
+        if not self.depth and self.bucket.try_take():
+            return
+        self.throttled += 1
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (level, next(self._seq), future))
+        if self._pump is None:
+            self._pump = asyncio.ensure_future(self._serve())
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            raise SheetsBusyError("Timed out waiting for Google Sheets quota") from None
+        finally:
+            self.waited += time.monotonic() - started
+
+    async def _serve(self) -> None:
+        try:
+            while self._waiters:
+                # Drop callers that gave up before spending a token on them
+                if self._waiters[0][2].done():
+                    heapq.heappop(self._waiters)
+                    continue
+                if not self.bucket.try_take():
+                    await asyncio.sleep(self.bucket.wait_time())
+                    continue
+                _, _, future = heapq.heappop(self._waiters)
+                if not future.done():
+                    future.set_result(None)
+        finally:
+            self._pump = None
+
+class SheetsScheduler:
+    """Rate-limits and retries Sheets calls, reads and writes budgeted separately."""
+
+    def __init__(self, reads_per_minute: float = 60, writes_per_minute: float = 60, burst: int = 10,
+                 deadline: float = 20, base_delay: float = 1, max_delay: float = 16):
+        self._gates = {
+            "read": _Gate(TokenBucket(reads_per_minute, burst)),
+            "write": _Gate(TokenBucket(writes_per_minute, burst)),
+        }
+        self.deadline = deadline
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+        self.deadlines_missed = 0
+
+    async def call(self, kind: str, fn, *args, retry_statuses=RETRY_STATUSES,
+                   deadline: float | None = None, **kwargs):
+        """Await fn(*args, **kwargs) once a `kind` token is free, retrying transient errors."""
+        gate = self._gates[kind]
+        give_up = time.monotonic() + (deadline if deadline is not None else self.deadline)
+        level = priority.get()
+        self.calls += 1
+        for attempt in itertools.count():
+            try:
+                await gate.acquire(level, give_up - time.monotonic())
+            except SheetsBusyError:
+                self.deadlines_missed += 1
+                raise
+            try:
+                return await fn(*args, **kwargs)
+            except Exception as e:
+                if getattr(e, "code", None) not in retry_statuses:
+                    self.failures += 1
+                    raise
+                delay = min(self.max_delay, self.base_delay * 2 ** attempt) * random.uniform(0.5, 1)
+                if time.monotonic() + delay >= give_up:
+                    self.failures += 1
+                    self.deadlines_missed += 1
+                    raise
+                self.retries += 1
+                print(f"Sheets {kind} failed with {e.code}, retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "retries": self.retries,
+            "failures": self.failures,
+            "deadlines_missed": self.deadlines_missed,
+            **{f"{kind}_queue": gate.depth for kind, gate in self._gates.items()},
+            **{f"{kind}_throttled": gate.throttled for kind, gate in self._gates.items()},
+            **{f"{kind}_waited": gate.waited for kind, gate in self._gates.items()},
+        }
+
+class SingleFlight:
+    """Lets concurrent callers asking for the same key share one in-flight call.
+
+    Every caller receives the same result object, so callers must not
+    mutate it.
+    """
+
+    def __init__(self):
+        self._in_flight: dict[tuple, asyncio.Task] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: tuple, fn, *args, **kwargs):
+        self.calls += 1
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn(*args, **kwargs))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+        else:
+            self.coalesced += 1
+        # One caller giving up must not cancel the call for the others
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        return {"calls": self.calls, "coalesced": self.coalesced, "in_flight": len(self._in_flight)}
+
+    def _finished(self, key: tuple, task: asyncio.Task) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # Mark the error as seen even if every caller went away
+        if not task.cancelled():
+            task.exception()
+
+class ScheduledTransport:
+    """Wraps a Sheets transport so every call goes through a scheduler.
+
+    Calls are recorded in the current update's trace as the caller saw
+    them, queueing and retries included.
+    """
+
+    def __init__(self, transport, scheduler: SheetsScheduler, single_flight: SingleFlight | None = None):
+        self.transport = transport
+        self.scheduler = scheduler
+        self.single_flight = single_flight or SingleFlight()
+
+    async def get_values(self, tab: str, rng: str | None = None,
+                         major_dimension: str = "ROWS") -> list[list[str]]:
+        with tracing.sheets_call("get_values", f"{tab}!{rng}" if rng else tab):
+            return await self.single_flight.do(
+                ("get_values", tab, rng, major_dimension),
+                self.scheduler.call, "read", self.transport.get_values, tab, rng, major_dimension)
+
+    async def batch_get(self, tab: str, ranges: list[str],
+                        major_dimension: str = "ROWS") -> list[list[list[str]]]:
+        with tracing.sheets_call("batch_get", f"{tab}!{','.join(ranges)}"):
+            return await self.single_flight.do(
+                ("batch_get", tab, tuple(ranges), major_dimension),
+                self.scheduler.call, "read", self.transport.batch_get, tab, ranges, major_dimension)
+
+    async def append_rows(self, tab: str, rows: list[list[str]]) -> dict:
+        with tracing.sheets_call("append_rows", f"{tab} +{len(rows)} rows"):
+            # A 5xx append may still have landed, so only retry outright rejections
+            return await self.scheduler.call("write", self.transport.append_rows, tab, rows,
+                                             retry_statuses=frozenset({429}))
+
+    async def batch_update(self, tab: str, data: list[dict]) -> dict:
+        with tracing.sheets_call("batch_update", f"{tab}!{','.join(item['range'] for item in data)}"):
+            return await self.scheduler.call("write", self.transport.batch_update, tab, data)
+
+    async def close(self) -> None:
+        await self.transport.close()
@@ -1,439 +1,628 @@
 import os
 import json
+import asyncio
+import functools
+import threading
+import time
+import aiohttp
 import gspread
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+from zoom_impact_bot.sheets_api import VALUE_INPUT_OPTION, AsyncSheetsClient, SheetsAPIError, row_cells
+from zoom_impact_bot.indexes import CachedTab, EventsIndex, RecognitionsStore, RoleIndex, ValuesTab
+from zoom_impact_bot.rows import (Choices, Parsed, event_columns, event_dict, event_row, events_for_date,
+                                  filter_recognitions, mirror_events, next_event, pad_columns, parse_categories,
+                                  parse_event_types, parse_user_roles, records, role_fields, template_url, transpose,
+                                  upcoming_events)
+from zoom_impact_bot.write_queue import AppendQueue
+from zoom_impact_bot.mirror import MirrorSync, SheetMirror
+from zoom_impact_bot.scheduler import ScheduledTransport, SheetsBusyError, SheetsScheduler, SingleFlight
+from zoom_impact_bot.metrics import MeteredTransport, export_registry, export_scheduler, export_single_flight
 from oauth2client.service_account import ServiceAccountCredentials
 from datetime import datetime, timedelta, date
 from zoneinfo import ZoneInfo
 
 TZ = ZoneInfo("Asia/Kolkata")
+# Google Sheets down, throttled or refusing a call. Reads let these through instead of
+# answering "no data", so handlers can tell the user to try again.
+SHEETS_ERRORS = (SheetsBusyError, SheetsAPIError, gspread.exceptions.APIError,
+                 aiohttp.ClientError, asyncio.TimeoutError, TimeoutError, requests.RequestException)
 SHEET_NAME = os.getenv("SHEET_NAME", "Zoom Impact Bot Data")
+# Optional spreadsheet key; skips the Drive title search when set
+SHEET_ID = os.getenv("SHEET_ID", "")
+# Maximum number of blocking Sheets calls running at once for async callers
+SHEETS_CONCURRENCY = int(os.getenv("SHEETS_CONCURRENCY", "8"))
+# "gspread" (thread pool) or "aiohttp" (native asyncio Sheets v4 client)
+SHEETS_BACKEND = os.getenv("SHEETS_BACKEND", "gspread").strip().lower()
+# Overrides the Sheets v4 endpoint, e.g. to point the aiohttp backend at a local stand-in
+SHEETS_API_URL = os.getenv("SHEETS_API_URL", "")
+# Seconds a loaded UserRoles index is served before it is refreshed in the background
+ROLES_TTL = float(os.getenv("ROLES_TTL", "300"))
+# Seconds the Events index is served before it is refreshed in the background
+EVENTS_TTL = float(os.getenv("EVENTS_TTL", "60"))
+# Seconds the Recognitions store is served before it is refreshed in the background
+RECOGNITIONS_TTL = float(os.getenv("RECOGNITIONS_TTL", "300"))
+# Seconds Templates, Recognition-Categories and EventTypes are served before a background refresh
+REFERENCE_TTL = float(os.getenv("REFERENCE_TTL", "300"))
+# Refreshes of Recognitions that fetch only new rows before one full reload (0: never)
+SHEETS_FULL_SYNC_EVERY = int(os.getenv("SHEETS_FULL_SYNC_EVERY", "10"))
+# Appends to one tab within this many seconds are sent as a single request...
+SHEETS_APPEND_DELAY = float(os.getenv("SHEETS_APPEND_DELAY", "0.3"))
+# ...unless this many rows are already waiting
+SHEETS_APPEND_BATCH = int(os.getenv("SHEETS_APPEND_BATCH", "50"))
+# Per-minute request quotas of the service account, and how many calls may burst at once
+SHEETS_READS_PER_MINUTE = float(os.getenv("SHEETS_READS_PER_MINUTE", "60"))
+SHEETS_WRITES_PER_MINUTE = float(os.getenv("SHEETS_WRITES_PER_MINUTE", "60"))
+SHEETS_BURST = int(os.getenv("SHEETS_BURST", "10"))
+# Seconds a Sheets call may spend waiting for quota and retrying before it fails
+SHEETS_DEADLINE = float(os.getenv("SHEETS_DEADLINE", "20"))
+# Path of an SQLite file mirroring the bot's tabs; reads are served from it and writes go
+# through it when set (empty: read from Sheets directly)
+SHEETS_MIRROR = os.getenv("SHEETS_MIRROR", "")
+# Seconds between background syncs of the mirror with the spreadsheet
+SHEETS_MIRROR_SYNC_INTERVAL = float(os.getenv("SHEETS_MIRROR_SYNC_INTERVAL", "60"))
 SERVICE_JSON = os.getenv("GOOGLE_SERVICE_JSON", "service_account.json")
 
-# Debug information for Railway deployment
-print("Environment check:")
-print(f"SHEET_NAME: {SHEET_NAME}")
-print(f"SERVICE_JSON type: {type(SERVICE_JSON)}")
-print(f"SERVICE_JSON length: {len(SERVICE_JSON) if SERVICE_JSON else 'None'}")
-print(f"SERVICE_JSON starts with '{{': {SERVICE_JSON.startswith('{') if SERVICE_JSON else False}")
-
 scope = [
     "https://spreadsheets.google.com/feeds",
     "https://www.googleapis.com/auth/drive"
 ]
 
-# Handle both file path and JSON content for Railway deployment
-try:
-    if SERVICE_JSON.startswith('{'):
-        # JSON content provided directly (Railway deployment)
-        service_account_info = json.loads(SERVICE_JSON)
-        creds = ServiceAccountCredentials.from_json_keyfile_dict(service_account_info, scope)
-    else:
+def _load_credentials() -> ServiceAccountCredentials:
+    # Debug information for Railway deployment
+    print("Environment check:")
+    print(f"SHEET_NAME: {SHEET_NAME}")
+    print(f"SERVICE_JSON type: {type(SERVICE_JSON)}")
+    print(f"SERVICE_JSON length: {len(SERVICE_JSON) if SERVICE_JSON else 'None'}")
+    print(f"SERVICE_JSON starts with '{{': {SERVICE_JSON.startswith('{') if SERVICE_JSON else False}")
+
+    # Handle both file path and JSON content for Railway deployment
+    try:
+        if SERVICE_JSON.startswith('{'):
+            # JSON content provided directly (Railway deployment)
+            service_account_info = json.loads(SERVICE_JSON)
+            return ServiceAccountCredentials.from_json_keyfile_dict(service_account_info, scope)
         # File path provided (local development)
         # Check if file exists before trying to use it
         if os.path.exists(SERVICE_JSON):
-            creds = ServiceAccountCredentials.from_json_keyfile_name(SERVICE_JSON, scope)
-        else:
-            # If file doesn't exist, try to parse as JSON content
-            try:
-                service_account_info = json.loads(SERVICE_JSON)
-                creds = ServiceAccountCredentials.from_json_keyfile_dict(service_account_info, scope)
-            except json.JSONDecodeError:
-                raise FileNotFoundError(f"Service account file '{SERVICE_JSON}' not found and GOOGLE_SERVICE_JSON is not valid JSON")
-except Exception as e:
-    print(f"Error initializing Google Sheets credentials: {e}")
-    print(f"SERVICE_JSON value: {SERVICE_JSON[:100]}..." if len(SERVICE_JSON) > 100 else f"SERVICE_JSON value: {SERVICE_JSON}")
-    print("Please check your GOOGLE_SERVICE_JSON environment variable.")
-    raise
-
-client = gspread.authorize(creds)
+            return ServiceAccountCredentials.from_json_keyfile_name(SERVICE_JSON, scope)
+        # If file doesn't exist, try to parse as JSON content
+        try:
+            service_account_info = json.loads(SERVICE_JSON)
+            return ServiceAccountCredentials.from_json_keyfile_dict(service_account_info, scope)
+        except json.JSONDecodeError:
+            raise FileNotFoundError(f"Service account file '{SERVICE_JSON}' not found and GOOGLE_SERVICE_JSON is not valid JSON")
+    except Exception as e:
+        print(f"Error initializing Google Sheets credentials: {e}")
+        print(f"SERVICE_JSON value: {SERVICE_JSON[:100]}..." if len(SERVICE_JSON) > 100 else f"SERVICE_JSON value: {SERVICE_JSON}")
+        print("Please check your GOOGLE_SERVICE_JSON environment variable.")
+        raise
+
+# Credentials and the gspread client are built on first use, so importing
+# this module needs neither the service account nor the network
+_creds: ServiceAccountCredentials | None = None
+_client: gspread.Client | None = None
+_client_lock = threading.Lock()
+
+def get_credentials() -> ServiceAccountCredentials:
+    global _creds
+    with _client_lock:
+        if _creds is None:
+            _creds = _load_credentials()
+        return _creds
+
+def get_client() -> gspread.Client:
+    """Return the authorized gspread client, building it on first use."""
+    global _client
+    creds = get_credentials()
+    with _client_lock:
+        if _client is None:
+            started = time.perf_counter()
+            _client = gspread.authorize(creds)
+            print(f"Google Sheets client ready in {time.perf_counter() - started:.2f}s")
+        return _client
+
+class WorksheetRegistry:
+    """Keeps the opened spreadsheet and its worksheet handles between calls.
+
+    The spreadsheet is opened once (by key when known, otherwise by title,
+    after which its key is remembered). All tab handles are loaded with a
+    single metadata fetch and reloaded together on a miss, so a renamed,
+    deleted or newly added tab is picked up without reopening the sheet.
+    """
+
+    def __init__(self, client: Callable[[], gspread.Client], title: str, key: str = ""):
+        self._client = client
+        self._title = title
+        self._key = key
+        self._spreadsheet: gspread.Spreadsheet | None = None
+        self._handles: dict[str, gspread.Worksheet] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    @property
+    def key(self) -> str:
+        """Spreadsheet key, resolving it from the title on first use."""
+        return self.spreadsheet().id
+
+    def spreadsheet(self) -> gspread.Spreadsheet:
+        with self._lock:
+            return self._open()
+
+    def get(self, tab: str) -> gspread.Worksheet:
+        """Return the handle for a tab, refreshing all handles on a miss."""
+        with self._lock:
+            ws = self._handles.get(tab)
+            if ws is not None:
+                self.hits += 1
+                return ws
+            self.misses += 1
+            self._reload()
+            ws = self._handles.get(tab)
+        if ws is None:
+            raise gspread.exceptions.WorksheetNotFound(tab)
+        return ws
+
+    def invalidate(self, tab: str | None = None) -> None:
+        """Forget one tab handle, or all of them when tab is None."""
+        with self._lock:
+            if tab is None:
+                self._handles.clear()
+            else:
+                self._handles.pop(tab, None)
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "tabs": sorted(self._handles),
+        }
+
+    def _open(self) -> gspread.Spreadsheet:
+        if self._spreadsheet is None:
+            if self._key:
+                self._spreadsheet = self._client().open_by_key(self._key)
+            else:
+                self._spreadsheet = self._client().open(self._title)
+                self._key = self._spreadsheet.id
+        return self._spreadsheet
+
+    def _reload(self) -> None:
+        self.refreshes += 1
+        self._handles = {ws.title: ws for ws in self._open().worksheets()}
+
+registry = WorksheetRegistry(get_client, SHEET_NAME, SHEET_ID)
+export_registry(registry)
 
 def get_ws(tab: str):
-    return client.open(SHEET_NAME).worksheet(tab)
+    return registry.get(tab)
+
+def _is_stale_handle(e: gspread.exceptions.APIError) -> bool:
+    """True when an API error means the cached tab handle no longer matches the sheet."""
+    return e.code == 404 or (e.code == 400 and "Unable to parse range" in str(e))
 
-def _parse_dt(date_str: str, time_str: str) -> datetime | None:
-    """Parse date and time strings into a timezone-aware datetime object."""
+def _with_ws(tab: str, fn):
+    """Run fn(worksheet) for a tab, retrying once with a fresh handle if it went stale."""
     try:
-        d = datetime.strptime(date_str.strip(), "%Y-%m-%d").date()
-        t = datetime.strptime(time_str.strip(), "%H:%M").time()
-        return datetime.combine(d, t, tzinfo=TZ)
-    except Exception:
-        return None
+        return fn(registry.get(tab))
+    except gspread.exceptions.APIError as e:
+        if not _is_stale_handle(e):
+            raise
+        registry.invalidate()
+        return fn(registry.get(tab))
 
-def get_next_event():
-    """Get the nearest upcoming event from the Events sheet."""
-    ws = get_ws("Events")
-    rows = ws.get_all_records()
-    if not rows:
-        return None
-    
-    now = datetime.now(TZ)
-    upcoming = []
+def add_event(event_type: str, event_date: str, event_time: str, zoom_link: str,
+              mc: str, presenter: str, impacts: list[str],
+              status: str = "Scheduled", notes: str = "") -> None:
+    """Append a new event row to the Events sheet."""
+    try:
+        row = event_row(event_type, event_date, event_time, zoom_link, mc, presenter,
+                        impacts, status, notes)
+        _with_ws("Events", lambda ws: ws.append_row(row, value_input_option=VALUE_INPUT_OPTION))
+    except Exception as e:
+        print(f"Error in add_event: {e}")
+        raise
+
+def add_recognition(upline, downline, category, month, remarks):
+    """Add a recognition entry to the Recognitions sheet."""
+    try:
+        _with_ws("Recognitions", lambda ws: ws.append_row([upline, downline, category, month, remarks],
+                                                                 value_input_option=VALUE_INPUT_OPTION))
+    except Exception as e:
+        print(f"Error in add_recognition: {e}")
+        raise
+
+def patch_event(event_row_index: int, **fields) -> None:
+    """Write any subset of an event's fields in one request.
     
-    for r in rows:
-        dt = _parse_dt(str(r.get("date", "")).strip(), str(r.get("time", "")).strip())
-        if dt and dt >= now:
-            upcoming.append((dt, r))
+    Args:
+        event_row_index: 1-based row index (including header)
+        **fields: New values keyed by event field (type, date, time, zoom_link,
+            mc, presenter, impact, status, notes)
     
-    if not upcoming:
-        return None
+    Raises:
+        ValueError: If a field name is not an Events column
+    """
+    data = row_cells(event_row_index, event_columns(fields))
+    if data:
+        _with_ws("Events", lambda ws: ws.batch_update(data, value_input_option=VALUE_INPUT_OPTION))
+
+def update_event_roles(event_row_index: int, mc: str | None = None, presenter: str | None = None, impacts: list[str] | None = None) -> None:
+    """Update event roles for a specific row.
     
-    # Sort by datetime and return the nearest upcoming event
-    upcoming.sort(key=lambda x: x[0])
-    return upcoming[0][1]
-
-def get_template(key: str) -> str | None:
-    """Get template URL by key from Templates sheet."""
-    ws = get_ws("Templates")
-    data = ws.get_all_records()
-    for row in data:
-        if str(row.get("key", "")).strip().lower() == key.lower():
-            return row.get("url")
+    Args:
+        event_row_index: 1-based row index (including header)
+        mc: MC name to set (None to skip)
+        presenter: Presenter name to set (None to skip)
+        impacts: List of impact speaker names (None to skip)
+    """
+    try:
+        patch_event(event_row_index, **role_fields(mc, presenter, impacts))
+        print(f"Updated event roles for row {event_row_index}: MC={mc}, Presenter={presenter}, Impacts={impacts}")
+        
+    except Exception as e:
+        print(f"Error updating event roles: {e}")
+        raise
+
+# Async facade: handlers read through these. Each one serves from the
+# cached indexes (or the mirror) and shares the parsing helpers above; the
+# blocking writes above are kept for scripts run outside the event loop.
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=SHEETS_CONCURRENCY, thread_name_prefix="sheets")
+        return _executor
+
+async def run_sync(fn, *args, **kwargs):
+    """Run a blocking function on the Sheets thread pool and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), functools.partial(fn, *args, **kwargs))
+
+class GspreadTransport:
+    """Async transport running gspread calls on the bounded thread pool."""
+
+    async def get_values(self, tab: str, rng: str | None = None,
+                         major_dimension: str = "ROWS") -> list[list[str]]:
+        if rng is None and major_dimension == "ROWS":
+            return await run_sync(_with_ws, tab, lambda ws: ws.get_all_values())
+        return await run_sync(_with_ws, tab, lambda ws: ws.get_values(rng, major_dimension=major_dimension))
+
+    async def batch_get(self, tab: str, ranges: list[str],
+                        major_dimension: str = "ROWS") -> list[list[list[str]]]:
+        result = await run_sync(_with_ws, tab, lambda ws: ws.batch_get(ranges, major_dimension=major_dimension))
+        return [list(vr) for vr in result]
+
+    async def append_rows(self, tab: str, rows: list[list[str]]) -> dict:
+        return await run_sync(_with_ws, tab, lambda ws: ws.append_rows(rows, value_input_option=VALUE_INPUT_OPTION))
+
+    async def batch_update(self, tab: str, data: list[dict]) -> dict:
+        return await run_sync(_with_ws, tab, lambda ws: ws.batch_update(data, value_input_option=VALUE_INPUT_OPTION))
+
+    async def close(self) -> None:
+        pass
+
+_transport: ScheduledTransport | None = None
+scheduler = SheetsScheduler(SHEETS_READS_PER_MINUTE, SHEETS_WRITES_PER_MINUTE, SHEETS_BURST, SHEETS_DEADLINE)
+export_scheduler(scheduler)
+# Shared by every transport so its counters survive set_transport()
+single_flight = SingleFlight()
+export_single_flight(single_flight)
+
+async def _access_token() -> tuple[str, int]:
+    info = await run_sync(lambda: get_credentials().get_access_token())
+    return info.access_token, info.expires_in or 3600
+
+async def get_transport() -> ScheduledTransport:
+    """Return the async transport selected by SHEETS_BACKEND, creating it on first use."""
+    global _transport
+    if _transport is None:
+        if SHEETS_BACKEND == "aiohttp":
+            spreadsheet_id = SHEET_ID or await run_sync(lambda: registry.key)
+            kwargs = {"base_url": SHEETS_API_URL} if SHEETS_API_URL else {}
+            transport = AsyncSheetsClient(spreadsheet_id, _access_token, **kwargs)
+        else:
+            transport = GspreadTransport()
+        # Another caller may have finished creating it while we awaited the key
+        if _transport is None:
+            _transport = ScheduledTransport(MeteredTransport(transport), scheduler, single_flight)
+    return _transport
+
+async def _load_events() -> list[list[str]]:
+    return await (await get_transport()).get_values("Events")
+
+async def _load_roles() -> list[list[str]]:
+    if _mirror() is not None:
+        return transpose(mirror.values("UserRoles"), 4)
+    # Admins, MCs, Presenters, Impact Speakers in one request
+    return await (await get_transport()).get_values("UserRoles", "A:D", "COLUMNS")
+
+async def _load_recognitions() -> list[list[str]]:
+    return await (await get_transport()).get_values("Recognitions")
+
+def _tab_loader(tab: str):
+    async def load() -> list[list[str]]:
+        return await (await get_transport()).get_values(tab)
+    return load
+
+def _tail_loader(tab: str, last_column: str):
+    async def load_tail(first_row: int) -> list[list[str]]:
+        return await (await get_transport()).get_values(tab, f"A{first_row}:{last_column}")
+    return load_tail
+
+# Events is small and its older rows get edited (times, links, roles), so every refresh reloads it whole;
+# the index only re-parses rows whose cells changed
+events_index = EventsIndex(_load_events, EVENTS_TTL, TZ)
+recognitions_store = RecognitionsStore(_load_recognitions, RECOGNITIONS_TTL,
+                                       tail_loader=_tail_loader("Recognitions", "E"),
+                                       full_every=SHEETS_FULL_SYNC_EVERY)
+role_index = RoleIndex(_load_roles, ROLES_TTL)
+templates_tab = ValuesTab(_tab_loader("Templates"), REFERENCE_TTL)
+categories_tab = ValuesTab(_tab_loader("Recognition-Categories"), REFERENCE_TTL)
+event_types_tab = ValuesTab(_tab_loader("EventTypes"), REFERENCE_TTL)
+
+def _mirror_pulled(tab: str) -> None:
+    if tab == "UserRoles":
+        role_index.invalidate()
+
+mirror = SheetMirror(SHEETS_MIRROR, TZ) if SHEETS_MIRROR else None
+mirror_sync = (MirrorSync(mirror, get_transport, SHEETS_MIRROR_SYNC_INTERVAL, on_pull=_mirror_pulled)
+               if mirror is not None else None)
+
+# Picker choices, parsed once per version of the tab they come from
+_parsed = Parsed()
+
+def _mirror() -> SheetMirror | None:
+    """The mirror, once it holds a synced copy of the sheet."""
+    if mirror_sync is not None and mirror_sync.ready.is_set():
+        return mirror
     return None
 
-def get_categories():
-    """Get list of available categories from the Recognition-Categories sheet."""
+def set_transport(transport) -> None:
+    """Replace the async transport, e.g. with a client aimed at a local stand-in."""
+    global _transport
+    _transport = ScheduledTransport(MeteredTransport(transport), scheduler, single_flight)
+
+async def _append_rows(tab: str, rows: list[list[str]]) -> dict:
+    return await (await get_transport()).append_rows(tab, rows)
+
+append_queue = AppendQueue(_append_rows, SHEETS_APPEND_DELAY, SHEETS_APPEND_BATCH)
+
+def _cache_append(cache: CachedTab, row_index: int | None, row: list[str]) -> None:
+    """Show a committed append to readers of a cached tab without waiting for a refresh."""
+    if cache.loaded and row_index:
+        cache.add(row_index, row)
+    else:
+        cache.invalidate()
+
+async def aclose() -> None:
+    """Send queued appends, then close the async transport's HTTP session, if any."""
+    global _transport
+    await append_queue.flush()
+    if mirror_sync is not None:
+        try:
+            await mirror_sync.push()
+        except Exception as e:
+            print(f"Error pushing mirror writes: {e}; {mirror.pending()} left for the next start")
+    if _transport is not None:
+        await _transport.close()
+        _transport = None
+
+async def awarm_client() -> None:
+    """Build the credentials and gspread client off the event loop, ahead of the first request."""
     try:
-        ws = get_ws("Recognition-Categories")
-        
-        # Get all values from column A (first column)
-        categories = ws.col_values(1)
-        
-        # Remove empty strings and strip whitespace
-        categories = [cat.strip() for cat in categories if cat.strip()]
-        
-        # Remove header if it exists (first row might be a header)
-        if categories and categories[0].lower() in ['category', 'categories', 'name']:
-            categories = categories[1:]
-        
-        return categories
+        await run_sync(get_client)
+    except Exception as e:
+        print(f"Error warming up Google Sheets client: {e}")
+
+async def _timed(name: str, load) -> tuple[str, float | None]:
+    started = time.perf_counter()
+    try:
+        await load()
+    except Exception as e:
+        print(f"Warm-up of {name} failed: {e}")
+        return name, None
+    took = time.perf_counter() - started
+    print(f"Warmed up {name} in {took:.2f}s")
+    return name, took
+
+async def warm_up() -> dict[str, float | None]:
+    """Load the caches behind the menus concurrently, returning seconds per tab (None on failure).
+
+    Each load is the cache's own shared load, so handlers that arrive
+    meanwhile wait for it instead of fetching the tab again.
+    """
+    started = time.perf_counter()
+    await awarm_client()
+    if mirror_sync is not None:
+        # Every other read is answered by the mirror once its first pull lands
+        durations = dict([await _timed("mirror", mirror_sync.ready.wait),
+                          await _timed("UserRoles", role_index.refresh)])
+    else:
+        caches = {
+            "UserRoles": role_index,
+            "Events": events_index,
+            "Recognitions": recognitions_store,
+            "Templates": templates_tab,
+            "Recognition-Categories": categories_tab,
+            "EventTypes": event_types_tab,
+        }
+        durations = dict(await asyncio.gather(*(_timed(name, cache.refresh) for name, cache in caches.items())))
+    print(f"Warm-up finished in {time.perf_counter() - started:.2f}s")
+    return durations
+
+def shutdown() -> None:
+    """Stop the Sheets thread pool, waiting for in-flight calls to finish."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
+
+async def aget_next_event() -> dict | None:
+    try:
+        if _mirror() is not None:
+            found = mirror.next_event(datetime.now(TZ))
+            return event_dict(list(found[1])) if found else None
+        return next_event(await events_index.get())
+    except SHEETS_ERRORS:
+        raise
+    except Exception as e:
+        print(f"Error getting next event: {e}")
+        return None
+
+async def aget_template(key: str) -> str | None:
+    if _mirror() is not None:
+        return template_url(records(mirror.values("Templates")), key)
+    return template_url(records((await templates_tab.get()).values), key)
+
+async def aget_categories() -> Choices:
+    try:
+        if _mirror() is not None:
+            version = mirror.version("Recognition-Categories")
+            return _parsed.get("categories", version, lambda: parse_categories(
+                transpose(mirror.values("Recognition-Categories"), 1)[0], version))
+        tab = await categories_tab.get()
+        return _parsed.get("categories", tab.version, lambda: parse_categories(tab.column(0), tab.version))
+    except SHEETS_ERRORS:
+        raise
     except Exception as e:
         print(f"Error getting categories from Recognition-Categories sheet: {e}")
-        # Return empty list if sheet doesn't exist or has issues
         return []
 
-def add_recognition(upline, downline, category, month, remarks):
-    """Add a recognition entry to the Recognitions sheet."""
+async def aadd_event(event_type: str, event_date: str, event_time: str, zoom_link: str,
+                     mc: str, presenter: str, impacts: list[str],
+                     status: str = "Scheduled", notes: str = "") -> None:
+    try:
+        row = event_row(event_type, event_date, event_time, zoom_link, mc, presenter,
+                        impacts, status, notes)
+        if _mirror() is not None:
+            mirror.append("Events", row)
+            mirror_sync.poke()
+            return
+        _cache_append(events_index, await append_queue.append("Events", row), row)
+    except Exception as e:
+        print(f"Error in add_event: {e}")
+        raise
+
+async def aadd_recognition(upline, downline, category, month, remarks) -> None:
     try:
-        ws = get_ws("Recognitions")
-        ws.append_row([upline, downline, category, month, remarks])
+        row = [upline, downline, category, month, remarks]
+        if _mirror() is not None:
+            mirror.append("Recognitions", row)
+            mirror_sync.poke()
+            return
+        _cache_append(recognitions_store, await append_queue.append("Recognitions", row), row)
     except Exception as e:
         print(f"Error in add_recognition: {e}")
         raise
 
-def get_recognitions(month=None, category=None):
-    """Get recognition entries, optionally filtered by month and/or category."""
+async def aget_recognitions(month=None, category=None) -> list[dict]:
     try:
-        ws = get_ws("Recognitions")
-        # Get all data from the sheet
-        all_data = ws.get_all_values()
-        
-        if not all_data:
-            return []
-        
-        # Skip header row if it exists
-        data = all_data[1:] if len(all_data) > 1 and all_data[0] else all_data
-        
-        # Filter by month and/or category if specified
-        filtered_data = []
-        for row in data:
-            if len(row) >= 5:  # Ensure we have all required columns
-                row_month = row[3].strip() if len(row) > 3 else ""
-                row_category = row[2].strip() if len(row) > 2 else ""
-                
-                # Apply filters
-                month_match = not month or row_month.lower() == month.lower()
-                category_match = not category or row_category.lower() == category.lower()
-                
-                if month_match and category_match:
-                    filtered_data.append({
-                        'upline': row[0] if len(row) > 0 else "",
-                        'downline': row[1] if len(row) > 1 else "",
-                        'category': row_category,
-                        'month': row_month,
-                        'remarks': row[4] if len(row) > 4 else ""
-                    })
-        
-        return filtered_data
+        if _mirror() is not None:
+            keys = ('upline', 'downline', 'category', 'month', 'remarks')
+            return [dict(zip(keys, row)) for row in mirror.recognitions(month, category)]
+        return filter_recognitions(await recognitions_store.get(), month, category)
+    except SHEETS_ERRORS:
+        raise
     except Exception as e:
         print(f"Error getting recognitions: {e}")
         return []
 
-def get_available_months():
-    """Get list of unique months from recognitions."""
+async def aget_available_months() -> Choices:
     try:
-        ws = get_ws("Recognitions")
-        all_data = ws.get_all_values()
-        
-        if not all_data:
-            return []
-        
-        # Skip header row if it exists
-        data = all_data[1:] if len(all_data) > 1 and all_data[0] else all_data
-        
-        months = set()
-        for row in data:
-            if len(row) > 3 and row[3].strip():
-                months.add(row[3].strip())
-        
-        return sorted(list(months))
+        if _mirror() is not None:
+            version = mirror.version("Recognitions")
+            return _parsed.get("months", version, lambda: Choices(mirror.months(), version))
+        store = await recognitions_store.get()
+        return _parsed.get("months", store.version, lambda: Choices(store.months(), store.version))
+    except SHEETS_ERRORS:
+        raise
     except Exception as e:
         print(f"Error getting available months: {e}")
         return []
 
-def get_user_roles() -> tuple[list[str], list[str], list[str]]:
-    """Get user roles from UserRoles sheet.
-    
-    Returns:
-        tuple: (mcs, presenters, impacts) from columns B, C, D respectively
-    """
+async def aget_user_roles() -> tuple[Choices, Choices, Choices]:
     try:
-        ws = get_ws("UserRoles")
-        
-        # Get values from columns B, C, D (2, 3, 4)
-        mcs = ws.col_values(2)  # Column B
-        presenters = ws.col_values(3)  # Column C  
-        impacts = ws.col_values(4)  # Column D
-        
-        # Process each list: filter empty, trim, remove duplicates
-        def process_role_list(role_list):
-            processed = [role.strip() for role in role_list if role.strip()]
-            # Remove header if present
-            if processed and processed[0].lower() in ['mc', 'mcs', 'presenter', 'presenters', 'impact', 'impacts', 'impact speaker', 'impact speakers']:
-                processed = processed[1:]
-            return list(set(processed))  # Remove duplicates
-        
-        mcs_processed = process_role_list(mcs)
-        presenters_processed = process_role_list(presenters)
-        impacts_processed = process_role_list(impacts)
-        
-        print(f"User roles - MCs: {mcs_processed}, Presenters: {presenters_processed}, Impacts: {impacts_processed}")
-        return mcs_processed, presenters_processed, impacts_processed
-        
+        if _mirror() is not None:
+            version = mirror.version("UserRoles")
+            return _parsed.get("roles", version, lambda: parse_user_roles(
+                transpose(mirror.values("UserRoles"), 4)[1:], version))
+        # MCs, Presenters, Impact Speakers from the roles already cached for role lookups
+        index = await role_index.get()
+        return _parsed.get("roles", index.version, lambda: parse_user_roles(
+            pad_columns(index.columns, 4)[1:], index.version))
+    except SHEETS_ERRORS:
+        raise
     except Exception as e:
         print(f"Error getting user roles from UserRoles sheet: {e}")
         return [], [], []
 
-def get_event_types() -> list[str]:
-    """Get list of event types from the EventTypes sheet.
-    
-    Returns:
-        list[str]: List of event types from column A
-        
-    Raises:
-        ValueError: If no event types are found
-    """
+async def aget_event_types() -> Choices:
     try:
-        ws = get_ws("EventTypes")
-        # Get all values from column A (first column)
-        event_types = ws.col_values(1)
-        print(f"Raw event types from sheet: {event_types}")
-        # Filter out empty values and skip header if present
-        event_types = [event_type.strip() for event_type in event_types if event_type.strip()]
-        # Remove header if it exists (first row might be a header)
-        if event_types and event_types[0].lower() in ['event type', 'event types', 'type', 'name']:
-            event_types = event_types[1:]
-        
-        if not event_types:
-            raise ValueError("No event types found in EventTypes sheet. Please add event types to column A.")
-            
-        print(f"Processed event types: {event_types}")
-        return event_types
+        if _mirror() is not None:
+            version = mirror.version("EventTypes")
+            return _parsed.get("event_types", version, lambda: parse_event_types(
+                transpose(mirror.values("EventTypes"), 1)[0], version))
+        tab = await event_types_tab.get()
+        return _parsed.get("event_types", tab.version, lambda: parse_event_types(tab.column(0), tab.version))
+    except SHEETS_ERRORS:
+        raise
     except Exception as e:
         print(f"Error getting event types from EventTypes sheet: {e}")
         if "No event types found" in str(e):
             raise
         return []
 
-def list_upcoming_events(limit_days: int) -> list[tuple[int, dict]]:
-    """Get upcoming events within the specified number of days.
-    
-    Args:
-        limit_days: Number of days from today to include
-        
-    Returns:
-        list[tuple[int, dict]]: List of (row_index, event_dict) tuples
-    """
+async def alist_upcoming_events(limit_days: int) -> list[tuple[int, dict]]:
     try:
-        ws = get_ws("Events")
-        all_data = ws.get_all_values()
-        
-        if not all_data:
-            return []
-        
-        # Skip header row
-        data = all_data[1:] if len(all_data) > 1 else []
-        
-        today = datetime.now(TZ).date()
-        end_date = today + timedelta(days=limit_days)
-        
-        upcoming_events = []
-        
-        for i, row in enumerate(data, start=2):  # Start from row 2 (1-based, including header)
-            if len(row) < 2:  # Need at least type and date
-                continue
-                
-            try:
-                event_date = datetime.strptime(row[1].strip(), "%Y-%m-%d").date()
-                if today <= event_date <= end_date:
-                    event_dict = {
-                        'type': row[0] if len(row) > 0 else '',
-                        'date': row[1] if len(row) > 1 else '',
-                        'time': row[2] if len(row) > 2 else '',
-                        'zoom_link': row[3] if len(row) > 3 else '',
-                        'mc': row[4] if len(row) > 4 else '',
-                        'presenter': row[5] if len(row) > 5 else '',
-                        'impact': row[6] if len(row) > 6 else '',
-                        'status': row[7] if len(row) > 7 else '',
-                        'notes': row[8] if len(row) > 8 else ''
-                    }
-                    upcoming_events.append((i, event_dict))
-            except ValueError:
-                # Skip invalid date format
-                continue
-        
-        # Sort by date and time
-        upcoming_events.sort(key=lambda x: (x[1]['date'], x[1]['time']))
-        return upcoming_events
-        
+        if _mirror() is not None:
+            today = datetime.now(TZ).date()
+            return mirror_events(mirror.events_between(today, today + timedelta(days=limit_days)))
+        return upcoming_events(await events_index.get(), limit_days)
+    except SHEETS_ERRORS:
+        raise
     except Exception as e:
         print(f"Error listing upcoming events: {e}")
         return []
 
-def get_next_event() -> dict | None:
-    """Get the nearest upcoming event.
-    
-    Returns:
-        dict | None: Event dictionary or None if no upcoming events
-    """
-    try:
-        ws = get_ws("Events")
-        all_data = ws.get_all_values()
-        
-        if not all_data:
-            return None
-        
-        # Skip header row
-        data = all_data[1:] if len(all_data) > 1 else []
-        
-        now = datetime.now(TZ)
-        upcoming_events = []
-        
-        for row in data:
-            if len(row) < 3:  # Need type, date, time
-                continue
-                
-            try:
-                event_date = datetime.strptime(row[1].strip(), "%Y-%m-%d").date()
-                event_time = datetime.strptime(row[2].strip(), "%H:%M").time()
-                event_datetime = datetime.combine(event_date, event_time, tzinfo=TZ)
-                
-                if event_datetime >= now:
-                    event_dict = {
-                        'type': row[0] if len(row) > 0 else '',
-                        'date': row[1] if len(row) > 1 else '',
-                        'time': row[2] if len(row) > 2 else '',
-                        'zoom_link': row[3] if len(row) > 3 else '',
-                        'mc': row[4] if len(row) > 4 else '',
-                        'presenter': row[5] if len(row) > 5 else '',
-                        'impact': row[6] if len(row) > 6 else '',
-                        'status': row[7] if len(row) > 7 else '',
-                        'notes': row[8] if len(row) > 8 else ''
-                    }
-                    upcoming_events.append((event_datetime, event_dict))
-            except ValueError:
-                # Skip invalid date/time format
-                continue
-        
-        if not upcoming_events:
-            return None
-        
-        # Sort by datetime and return the nearest
-        upcoming_events.sort(key=lambda x: x[0])
-        return upcoming_events[0][1]
-        
-    except Exception as e:
-        print(f"Error getting next event: {e}")
-        return None
+async def apatch_event(event_row_index: int, **fields) -> None:
+    columns = event_columns(fields)
+    if _mirror() is not None:
+        if columns:
+            mirror.patch("Events", event_row_index, columns)
+            mirror_sync.poke()
+        return
+    data = row_cells(event_row_index, columns)
+    if data:
+        await (await get_transport()).batch_update("Events", data)
+        if events_index.loaded:
+            events_index.patch(event_row_index, columns)
 
-def update_event_roles(event_row_index: int, mc: str | None = None, presenter: str | None = None, impacts: list[str] | None = None) -> None:
-    """Update event roles for a specific row.
-    
-    Args:
-        event_row_index: 1-based row index (including header)
-        mc: MC name to set (None to skip)
-        presenter: Presenter name to set (None to skip)
-        impacts: List of impact speaker names (None to skip)
-    """
+async def aupdate_event_roles(event_row_index: int, mc: str | None = None, presenter: str | None = None,
+                              impacts: list[str] | None = None) -> None:
     try:
-        ws = get_ws("Events")
-        
-        # Update MC (column E, index 4)
-        if mc is not None:
-            ws.update_cell(event_row_index, 5, mc)
-        
-        # Update Presenter (column F, index 5)
-        if presenter is not None:
-            ws.update_cell(event_row_index, 6, presenter)
-        
-        # Update Impact (column G, index 6)
-        if impacts is not None:
-            impact_str = ", ".join(impacts) if impacts else ""
-            ws.update_cell(event_row_index, 7, impact_str)
-            
+        await apatch_event(event_row_index, **role_fields(mc, presenter, impacts))
         print(f"Updated event roles for row {event_row_index}: MC={mc}, Presenter={presenter}, Impacts={impacts}")
-        
     except Exception as e:
         print(f"Error updating event roles: {e}")
         raise
 
-def list_events_for_date(target_date: date) -> list[dict]:
-    """Get all events for a specific date.
-    
-    Args:
-        target_date: Date to search for (date object)
-        
-    Returns:
-        list[dict]: List of event dictionaries for the date
-    """
+async def alist_events_for_date(target_date: date) -> list[dict]:
     try:
-        ws = get_ws("Events")
-        all_data = ws.get_all_values()
-        
-        if not all_data:
-            return []
-        
-        # Skip header row
-        data = all_data[1:] if len(all_data) > 1 else []
-        
-        events_for_date = []
-        
-        for row in data:
-            if len(row) < 2:  # Need at least type and date
-                continue
-                
-            try:
-                event_date = datetime.strptime(row[1].strip(), "%Y-%m-%d").date()
-                if event_date == target_date:
-                    event_dict = {
-                        'type': row[0] if len(row) > 0 else '',
-                        'date': row[1] if len(row) > 1 else '',
-                        'time': row[2] if len(row) > 2 else '',
-                        'zoom_link': row[3] if len(row) > 3 else '',
-                        'mc': row[4] if len(row) > 4 else '',
-                        'presenter': row[5] if len(row) > 5 else '',
-                        'impact': row[6] if len(row) > 6 else '',
-                        'status': row[7] if len(row) > 7 else '',
-                        'notes': row[8] if len(row) > 8 else ''
-                    }
-                    events_for_date.append(event_dict)
-            except ValueError:
-                # Skip invalid date format
-                continue
-        
-        # Sort by time
-        events_for_date.sort(key=lambda x: x['time'])
-        return events_for_date
-        
+        if _mirror() is not None:
+            return [event for _, event in mirror_events(mirror.events_between(target_date, target_date))]
+        return events_for_date(await events_index.get(), target_date)
+    except SHEETS_ERRORS:
+        raise
     except Exception as e:
         print(f"Error listing events for date {target_date}: {e}")
         return []
+
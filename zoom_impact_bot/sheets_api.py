@@ -0,0 +1,129 @@
+"""Async Google Sheets v4 client over a pooled aiohttp session.
+
+Only the `values` endpoints the bot needs are implemented. The base URL
+and the access token source are injectable, so the client can be pointed
+at a local HTTP stand-in.
+"""
+import time
+from typing import Awaitable, Callable
+from urllib.parse import quote
+
+import aiohttp
+from yarl import URL
+
+API_URL = "https://sheets.googleapis.com/v4/spreadsheets"
+# Written values are stored exactly as sent: user text starting with "=" must not become a formula, and
+# dates and times must read back as written ("20:30", not "20:30:00") for parsing and the tail watermark
+VALUE_INPUT_OPTION = "RAW"
+
+# Returns (access_token, seconds_until_expiry)
+TokenProvider = Callable[[], Awaitable[tuple[str, int]]]
+
+class SheetsAPIError(Exception):
+    """Non-2xx response from the Sheets API."""
+
+    def __init__(self, code: int, message: str):
+        super().__init__(f"SheetsAPIError: [{code}]: {message}")
+        self.code = code
+        self.message = message
+
+def a1(tab: str, rng: str | None = None) -> str:
+    """Build an absolute A1 range such as 'Recognition-Categories'!A:A."""
+    name = "'" + tab.replace("'", "''") + "'"
+    return f"{name}!{rng}" if rng else name
+
+def column_letter(column: int) -> str:
+    """A1 letter(s) for a 0-based column index."""
+    letters = ""
+    column += 1
+    while column:
+        column, rem = divmod(column - 1, 26)
+        letters = chr(ord("A") + rem) + letters
+    return letters
+
+def row_cells(row_index: int, columns: dict[int, str]) -> list[dict]:
+    """batchUpdate data for some 0-based columns of one row, one range per run of adjacent columns."""
+    runs: list[tuple[int, list[str]]] = []
+    for column in sorted(columns):
+        if runs and column == runs[-1][0] + len(runs[-1][1]):
+            runs[-1][1].append(columns[column])
+        else:
+            runs.append((column, [columns[column]]))
+    return [{"range": f"{column_letter(first)}{row_index}:{column_letter(first + len(values) - 1)}{row_index}",
+             "values": [values]} for first, values in runs]
+
+class AsyncSheetsClient:
+    """Minimal async client for one spreadsheet's values endpoints."""
+
+    def __init__(self, spreadsheet_id: str, token_provider: TokenProvider,
+                 base_url: str = API_URL, limit: int = 100, timeout: float = 30):
+        self._base = f"{base_url.rstrip('/')}/{quote(spreadsheet_id, safe='')}"
+        self._token_provider = token_provider
+        self._limit = limit
+        self._timeout = aiohttp.ClientTimeout(total=timeout)
+        self._session: aiohttp.ClientSession | None = None
+        self._token = ""
+        self._token_expires = 0.0
+
+    async def get_values(self, tab: str, rng: str | None = None,
+                         major_dimension: str = "ROWS") -> list[list[str]]:
+        """values.get for one range (the whole tab when rng is None)."""
+        data = await self._request("GET", f"/values/{quote(a1(tab, rng), safe='')}",
+                                   params={"majorDimension": major_dimension})
+        return data.get("values", [])
+
+    async def batch_get(self, tab: str, ranges: list[str],
+                        major_dimension: str = "ROWS") -> list[list[list[str]]]:
+        """values.batchGet for several ranges of one tab, in request order."""
+        params = [("ranges", a1(tab, rng)) for rng in ranges]
+        params.append(("majorDimension", major_dimension))
+        data = await self._request("GET", "/values:batchGet", params=params)
+        return [vr.get("values", []) for vr in data.get("valueRanges", [])]
+
+    async def append_rows(self, tab: str, rows: list[list[str]]) -> dict:
+        """values.append after the last row of the tab's table."""
+        return await self._request("POST", f"/values/{quote(a1(tab), safe='')}:append",
+                                   params={"valueInputOption": VALUE_INPUT_OPTION},
+                                   json={"values": rows})
+
+    async def batch_update(self, tab: str, data: list[dict]) -> dict:
+        """values.batchUpdate; each item is {"range": "E5", "values": [[...]]}."""
+        body = {
+            "valueInputOption": VALUE_INPUT_OPTION,
+            "data": [{"range": a1(tab, item["range"]), "values": item["values"]} for item in data],
+        }
+        return await self._request("POST", "/values:batchUpdate", json=body)
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self._limit, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self._timeout)
+        return self._session
+
+    async def _get_token(self, force: bool = False) -> str:
+        # Refresh a minute early so a token never expires mid-request
+        if force or not self._token or time.monotonic() > self._token_expires - 60:
+            self._token, expires_in = await self._token_provider()
+            self._token_expires = time.monotonic() + expires_in
+        return self._token
+
+    async def _request(self, method: str, path: str, params=None, json=None) -> dict:
+        session = await self._get_session()
+        url = URL(self._base + path, encoded=True)
+        for attempt in range(2):
+            headers = {"Authorization": f"Bearer {await self._get_token(force=attempt > 0)}"}
+            async with session.request(method, url, params=params, json=json, headers=headers) as resp:
+                if resp.status == 401 and attempt == 0:
+                    continue
+                if resp.status >= 400:
+                    try:
+                        message = (await resp.json())["error"]["message"]
+                    except Exception:
+                        message = await resp.text()
+                    raise SheetsAPIError(resp.status, message)
+                return await resp.json()
@@ -0,0 +1,125 @@
+"""FSM storage for wizard state.
+
+Every multi-step flow keeps its progress in the aiogram FSM storage. By
+default that is a bounded in-memory store. Abandoned wizards expire after
+WIZARD_TTL, and the least recently used sessions are evicted past
+WIZARD_MAX_SESSIONS. With REDIS_URL set, state lives in Redis, so it
+survives restarts and is shared between replicas.
+"""
+import os
+import time
+from collections import OrderedDict
+from copy import copy
+from dataclasses import dataclass, field
+from typing import Any, Mapping
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+
+# Seconds a wizard may sit idle before its state is dropped
+WIZARD_TTL = float(os.getenv("WIZARD_TTL", "3600"))
+# Most wizard sessions kept in memory; the least recently used go first
+WIZARD_MAX_SESSIONS = int(os.getenv("WIZARD_MAX_SESSIONS", "10000"))
+# Redis URL for shared, persistent wizard state (empty: keep it in memory)
+REDIS_URL = os.getenv("REDIS_URL", "")
+
+@dataclass
+class _Session:
+    state: str | None = None
+    data: dict[str, Any] = field(default_factory=dict)
+    touched: float = 0.0
+
+class TTLMemoryStorage(BaseStorage):
+    """In-memory FSM storage bounded by idle time and session count.
+
+    Sessions are kept in least-recently-used order, so expired ones are
+    always at the front and are dropped there as new ones arrive.
+    """
+
+    def __init__(self, ttl: float = WIZARD_TTL, max_sessions: int = WIZARD_MAX_SESSIONS):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._sessions: OrderedDict[StorageKey, _Session] = OrderedDict()
+        self.expired = 0
+        self.evicted = 0
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        state = state.state if isinstance(state, State) else state
+        session = self._get(key)
+        if session is None:
+            if state is None:
+                return
+            session = self._create(key)
+        session.state = state
+        self._drop_if_empty(key, session)
+
+    async def get_state(self, key: StorageKey) -> str | None:
+        session = self._get(key)
+        return session.state if session else None
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        session = self._get(key)
+        if session is None:
+            if not data:
+                return
+            session = self._create(key)
+        session.data = dict(data)
+        self._drop_if_empty(key, session)
+
+    async def get_data(self, key: StorageKey) -> dict[str, Any]:
+        session = self._get(key)
+        return session.data.copy() if session else {}
+
+    async def get_value(self, storage_key: StorageKey, dict_key: str, default: Any | None = None) -> Any | None:
+        session = self._get(storage_key)
+        return copy(session.data.get(dict_key, default)) if session else default
+
+    async def close(self) -> None:
+        self._sessions.clear()
+
+    def stats(self) -> dict:
+        return {"sessions": len(self._sessions), "expired": self.expired, "evicted": self.evicted}
+
+    def _get(self, key: StorageKey) -> _Session | None:
+        session = self._sessions.get(key)
+        if session is None:
+            return None
+        now = time.monotonic()
+        if now - session.touched > self.ttl:
+            del self._sessions[key]
+            self.expired += 1
+            return None
+        session.touched = now
+        self._sessions.move_to_end(key)
+        return session
+
+    def _create(self, key: StorageKey) -> _Session:
+        now = time.monotonic()
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if now - oldest.touched > self.ttl:
+                self._sessions.popitem(last=False)
+                self.expired += 1
+            elif len(self._sessions) >= self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evicted += 1
+            else:
+                break
+        session = self._sessions[key] = _Session(touched=now)
+        return session
+
+    def _drop_if_empty(self, key: StorageKey, session: _Session) -> None:
+        # A finished or cancelled wizard frees its slot right away
+        if session.state is None and not session.data:
+            del self._sessions[key]
+
+def create_storage() -> BaseStorage:
+    """Redis storage when REDIS_URL is set, bounded memory storage otherwise."""
+    if REDIS_URL:
+        try:
+            from aiogram.fsm.storage.redis import RedisStorage
+        except ImportError:
+            raise SystemExit("REDIS_URL is set but the redis package is not installed. Run: pip install redis")
+        ttl = int(WIZARD_TTL)
+        return RedisStorage.from_url(REDIS_URL, state_ttl=ttl, data_ttl=ttl)
+    return TTLMemoryStorage()
@@ -0,0 +1,86 @@
+"""Per-update tracing of Google Sheets calls.
+
+While a handler runs, every Sheets call made on its behalf is recorded in
+a trace tied to the Telegram update. Calls made by tasks the handler
+starts are included too. A handler slower than SLOW_UPDATE_SECONDS is
+logged as one JSON line listing each call, its range and its duration.
+"""
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+# Handlers taking longer than this many seconds are logged with their Sheets calls (0: log every update)
+SLOW_UPDATE_SECONDS = float(os.getenv("SLOW_UPDATE_SECONDS", "1"))
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class Trace:
+    update_id: int | None
+    event: str
+    handler: str
+    started: float = field(default_factory=time.perf_counter)
+    calls: list[dict] = field(default_factory=list)
+
+    def summary(self) -> dict:
+        return {
+            "update_id": self.update_id,
+            "event": self.event,
+            "handler": self.handler,
+            "ms": round((time.perf_counter() - self.started) * 1000, 1),
+            "sheets_calls": len(self.calls),
+            "sheets_ms": round(sum(call["ms"] for call in self.calls), 1),
+            "calls": self.calls,
+        }
+
+current: ContextVar[Trace | None] = ContextVar("sheets_trace", default=None)
+
+@contextmanager
+def sheets_call(op: str, target: str):
+    """Record one Sheets call in the current update's trace, if there is one."""
+    trace = current.get()
+    if trace is None:
+        yield
+        return
+    started = time.perf_counter()
+    error = None
+    try:
+        yield
+    except Exception as e:
+        error = str(getattr(e, "code", None) or type(e).__name__)
+        raise
+    finally:
+        call = {"op": op, "range": target, "ms": round((time.perf_counter() - started) * 1000, 1)}
+        if error:
+            call["error"] = error
+        trace.calls.append(call)
+
+def handler_name(event, data: dict) -> str:
+    """Name of the function handling an event, for metrics and traces.
+
+    A handler that routes events on by itself, like the callback router,
+    is asked for the name of the function it will call.
+    """
+    callback = getattr(data.get("handler"), "callback", None)
+    route_name = getattr(getattr(callback, "__self__", None), "route_name", None)
+    if route_name is not None:
+        return route_name(event)
+    return getattr(callback, "__name__", "unknown")
+
+def trace_updates(event_type: str, threshold: float = SLOW_UPDATE_SECONDS):
+    """Inner middleware tracing each matched handler, e.g. dp.message.middleware(trace_updates("message"))."""
+    async def middleware(handler, event, data):
+        update = data.get("event_update")
+        trace = Trace(getattr(update, "update_id", None), event_type, handler_name(event, data))
+        token = current.set(trace)
+        try:
+            return await handler(event, data)
+        finally:
+            current.reset(token)
+            if time.perf_counter() - trace.started >= threshold:
+                logger.warning("slow update %s", json.dumps(trace.summary(), ensure_ascii=False))
+    return middleware
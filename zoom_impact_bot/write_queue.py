@@ -0,0 +1,112 @@
+"""Write-behind batching for row appends.
+
+Appends to the same tab that arrive within a short window are sent as a
+single values.append call, which keeps bursts of submissions inside the
+per-minute write quota.
+"""
+import asyncio
+from typing import Awaitable, Callable
+
+from zoom_impact_bot.indexes import append_start_row
+from zoom_impact_bot.scheduler import SheetsBusyError
+
+# Appends rows to a tab and returns the values.append response
+Appender = Callable[[str, list[list[str]]], Awaitable[dict]]
+# A queued row, the future its caller awaits and how many batches carrying it were refused
+Entry = tuple[list[str], asyncio.Future, int]
+
+def _refused(e: Exception) -> bool:
+    """True when an append certainly wrote nothing: it never got quota, or Sheets answered 429."""
+    return isinstance(e, SheetsBusyError) or getattr(e, "code", None) == 429
+
+class AppendQueue:
+    """Coalesces pending appends per tab into one append_rows call.
+
+    A batch is sent `delay` seconds after its first row arrives, or as soon
+    as it holds `max_rows` rows. Each caller awaits the sheet row number its
+    row was written to (None if the response did not say), or the error
+    that failed the batch.
+
+    A refused batch is put back at the head of its tab's queue, ahead of
+    rows queued since, up to `retries` times. Any other error may have
+    left the rows written, so it fails the callers instead of risking
+    duplicate rows.
+    """
+
+    def __init__(self, appender: Appender, delay: float = 0.3, max_rows: int = 50, retries: int = 2):
+        self._appender = appender
+        self.delay = delay
+        self.max_rows = max_rows
+        self.retries = retries
+        self._pending: dict[str, list[Entry]] = {}
+        self._timers: dict[str, asyncio.TimerHandle] = {}
+        self._commits: set[asyncio.Task] = set()
+        self.batches = 0
+        self.rows = 0
+        self.errors = 0
+        self.requeued = 0
+
+    async def append(self, tab: str, row: list[str]) -> int | None:
+        """Queue one row and wait until its batch is committed."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = self._pending.setdefault(tab, [])
+        pending.append((row, future, 0))
+        if len(pending) >= self.max_rows:
+            self._flush_tab(tab)
+        elif tab not in self._timers:
+            self._timers[tab] = loop.call_later(self.delay, self._flush_tab, tab)
+        return await future
+
+    async def flush(self) -> None:
+        """Send everything queued now and wait until every row is written or failed."""
+        while self._pending or self._commits:
+            for tab in list(self._pending):
+                self._flush_tab(tab)
+            if self._commits:
+                await asyncio.gather(*self._commits, return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            "pending": sum(len(batch) for batch in self._pending.values()),
+            "in_flight": len(self._commits),
+            "batches": self.batches,
+            "rows": self.rows,
+            "errors": self.errors,
+            "requeued": self.requeued,
+        }
+
+    def _flush_tab(self, tab: str) -> None:
+        timer = self._timers.pop(tab, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(tab, [])
+        if not batch:
+            return
+        task = asyncio.ensure_future(self._commit(tab, batch))
+        self._commits.add(task)
+        task.add_done_callback(self._commits.discard)
+
+    async def _commit(self, tab: str, batch: list[Entry]) -> None:
+        try:
+            response = await self._appender(tab, [row for row, _, _ in batch])
+        except Exception as e:
+            self.errors += 1
+            retry = []
+            for row, future, tries in batch:
+                if _refused(e) and tries < self.retries:
+                    retry.append((row, future, tries + 1))
+                elif not future.done():
+                    future.set_exception(e)
+            if retry:
+                self.requeued += len(retry)
+                self._pending[tab] = retry + self._pending.get(tab, [])
+                if tab not in self._timers:
+                    self._timers[tab] = asyncio.get_running_loop().call_later(self.delay, self._flush_tab, tab)
+            return
+        self.batches += 1
+        self.rows += len(batch)
+        start = append_start_row(response)
+        for offset, (_, future, _) in enumerate(batch):
+            if not future.done():
+                future.set_result(start + offset if start else None)